@@ -0,0 +1,288 @@
+"""
+Benchmark: todos los conversores de tools.py sobre corpus sintéticos.
+
+Genera PDF y DOCX de prueba con fitz y python-docx (texto, escaneo,
+imágenes; 1, 100 o 1000 páginas) y mide pdf_to_docx, el modo raster, el
+OCR (si hay tesseract), los dos compresores, convert_image y los
+extractores de imágenes. Cada caso se ejecuta en un proceso nuevo para que
+el pico de memoria (RSS) sea solo suyo.
+
+El resultado es un JSON con páginas/s (o imágenes/s), MB/s y pico de RSS
+por caso, para guardar y comparar ejecuciones con --compare.
+
+Uso:
+    python benchmarks/bench_converters.py --sizes 1,100 -o resultados.json
+    python benchmarks/bench_converters.py --only raster,compress-pdf --sizes 1000 --fixtures .bench
+    python benchmarks/bench_converters.py --compare antes.json -o despues.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import tools  # noqa: E402
+from corpus import CORPORA, fixture  # noqa: E402
+
+# Corpus de entrada de cada conversor y unidad en la que se mide
+CONVERTERS = {
+    "pdf2docx": (["text"], "pages"),
+    "raster": (["text", "scan"], "pages"),
+    "ocr": (["scan"], "pages"),
+    "compress-pdf": (["scan", "images"], "pages"),
+    "compress-docx": (["docx-images"], "images"),
+    "convert-image": (["photo"], "images"),
+    "extract-pdf": (["images"], "pages"),
+    "extract-docx": (["docx-images"], "images"),
+}
+
+
+# ---------------------------------------------------------------------------
+# Ejecución de casos
+# ---------------------------------------------------------------------------
+
+def peak_rss_mb() -> dict:
+    """Pico de memoria residente del proceso y de sus hijos ya terminados, en MB."""
+    try:
+        import resource
+    except ImportError:
+        # Windows: solo el proceso actual, si psutil está disponible
+        try:
+            import psutil
+        except ImportError:
+            return {"self": None, "children": None}
+        return {"self": round(psutil.Process().memory_info().peak_wset / 1e6, 1), "children": None}
+
+    # ru_maxrss va en KB en Linux y en bytes en macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    # En Linux ru_maxrss conserva el pico del proceso padre tras el fork;
+    # VmHWM es solo el de este proceso
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    own = int(line.split()[1]) * 1024
+                    break
+    except OSError:
+        pass
+    return {
+        "self": round(own / 1e6, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale / 1e6, 1),
+    }
+
+
+def _input_bytes(path: Path) -> int:
+    """Tamaño del archivo, o de los archivos de la carpeta."""
+    if path.is_dir():
+        return sum(p.stat().st_size for p in path.iterdir() if p.is_file())
+    return path.stat().st_size
+
+
+def _count_units(path: Path, unit: str) -> int:
+    """Páginas del PDF o imágenes del DOCX/carpeta de entrada."""
+    if path.is_dir():
+        return sum(1 for p in path.iterdir() if p.is_file())
+    if path.suffix == ".docx":
+        import zipfile
+
+        with zipfile.ZipFile(str(path)) as zipf:
+            return sum(1 for n in zipf.namelist() if n.startswith("word/media/"))
+    import fitz
+
+    with fitz.open(str(path)) as doc:
+        return doc.page_count
+
+
+def run_converter(converter: str, inp: Path, outdir: Path, dpi: int, workers: int) -> None:
+    """Ejecuta un conversor sobre inp escribiendo en outdir."""
+    if converter == "pdf2docx":
+        tools.pdf_to_docx(inp, outdir / "out.docx", overwrite=True)
+    elif converter == "raster":
+        tools.pdf_to_docx_raster_with_progress(inp, outdir / "out.docx", dpi=dpi, overwrite=True, workers=workers)
+    elif converter == "ocr":
+        tools.ocr_pdf_to_docx_with_progress(inp, outdir / "out.docx", dpi=dpi, workers=workers)
+    elif converter == "compress-pdf":
+        tools.compress_pdf_with_progress(inp, outdir / "out.pdf", preset="ebook")
+    elif converter == "compress-docx":
+        tools.compress_docx_images_with_progress(inp, outdir / "out.docx", quality=70, max_width=1024, workers=workers)
+    elif converter == "convert-image":
+        tools.batch_convert_images(
+            sorted(inp.iterdir()), outdir, output_format="webp", quality=80, resize=(1600, 1600),
+            overwrite=True, workers=workers
+        )
+    elif converter == "extract-pdf":
+        tools.extract_images_from_pdf_with_progress(inp, outdir, "png", workers=workers)
+    elif converter == "extract-docx":
+        tools.extract_images_from_docx_with_progress(inp, outdir)
+    else:
+        raise ValueError(f"Conversor desconocido: {converter}")
+
+
+def run_case(converter: str, inp: str, dpi: int, workers: int) -> dict:
+    """Mide un conversor en el proceso actual (se llama en un proceso nuevo)."""
+    outdir = Path(tempfile.mkdtemp(prefix="apppdf-bench-"))
+    try:
+        t0 = time.perf_counter()
+        c0 = time.process_time()
+        run_converter(converter, Path(inp), outdir, dpi, workers)
+        return {
+            "seconds": time.perf_counter() - t0,
+            "cpu_seconds": time.process_time() - c0,
+            "output_bytes": _input_bytes(outdir),
+            "peak_rss_mb": peak_rss_mb(),
+        }
+    finally:
+        shutil.rmtree(outdir, ignore_errors=True)
+
+
+def measure(converter: str, corpus: str, inp: Path, unit: str, args: argparse.Namespace) -> dict:
+    """Repite un caso args.repeat veces, cada vez en un proceso nuevo."""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    units = _count_units(inp, unit)
+    size_mb = _input_bytes(inp) / 1e6
+    record = {
+        "case": f"{converter}/{corpus}/{inp.stem.rsplit('-', 1)[-1]}",
+        "converter": converter, "corpus": corpus, "unit": unit, "units": units,
+        "input_mb": round(size_mb, 3), "dpi": args.dpi, "workers": args.workers,
+    }
+    runs = []
+    try:
+        for _ in range(args.repeat):
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                runs.append(pool.submit(run_case, converter, str(inp), args.dpi, args.workers).result())
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+        return record
+
+    seconds = statistics.median(r["seconds"] for r in runs)
+    record.update({
+        "seconds": round(seconds, 4),
+        "seconds_min": round(min(r["seconds"] for r in runs), 4),
+        "cpu_seconds": round(statistics.median(r["cpu_seconds"] for r in runs), 4),
+        f"{unit}_per_s": round(units / seconds, 3) if seconds else None,
+        "mb_per_s": round(size_mb / seconds, 3) if seconds else None,
+        "output_mb": round(runs[-1]["output_bytes"] / 1e6, 3),
+        "peak_rss_mb": max((r["peak_rss_mb"]["self"] or 0) for r in runs) or None,
+        "peak_rss_children_mb": max((r["peak_rss_mb"]["children"] or 0) for r in runs) or None,
+    })
+    return record
+
+
+# ---------------------------------------------------------------------------
+# Informe
+# ---------------------------------------------------------------------------
+
+def environment() -> dict:
+    """Versiones y máquina, para saber qué se compara con qué."""
+    from importlib import metadata
+
+    versions = {}
+    for package in ("PyMuPDF", "Pillow", "pdf2docx", "python-docx", "pikepdf", "pytesseract"):
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=Path(__file__).resolve().parent, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "packages": versions,
+    }
+
+
+def print_summary(results: list[dict], previous: dict) -> None:
+    """Tabla legible en stderr; con previous, añade la variación de tiempo."""
+    for r in results:
+        if "error" in r:
+            print(f"  {r['case']:<32} ERROR {r['error']}", file=sys.stderr)
+            continue
+        rate = r[f"{r['unit']}_per_s"]
+        line = (
+            f"  {r['case']:<32} {r['seconds']:8.2f} s  {rate:9.2f} {r['unit']}/s  "
+            f"{r['mb_per_s']:8.2f} MB/s  RSS {r['peak_rss_mb'] or 0:7.1f} MB"
+        )
+        old = previous.get(r["case"])
+        if old and old.get("seconds"):
+            line += f"  ({(r['seconds'] / old['seconds'] - 1) * 100:+.1f}% tiempo)"
+        print(line, file=sys.stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de los conversores")
+    parser.add_argument("--sizes", default="1,100", help="Páginas por corpus separadas por comas (p. ej. 1,100,1000)")
+    parser.add_argument("--only", help=f"Conversores a medir separados por comas ({', '.join(CONVERTERS)})")
+    parser.add_argument("--corpora", help=f"Corpus a usar separados por comas ({', '.join(CORPORA)})")
+    parser.add_argument("--dpi", type=int, default=150, help="DPI para raster y OCR")
+    parser.add_argument("--workers", type=int, default=1, help="Procesos para los conversores que lo admiten")
+    parser.add_argument("--repeat", type=int, default=1, help="Repeticiones por caso (se informa la mediana)")
+    parser.add_argument("--fixtures", help="Carpeta donde generar y reutilizar los corpus (por defecto, temporal)")
+    parser.add_argument("--compare", help="JSON de una ejecución anterior con el que comparar tiempos")
+    parser.add_argument("-o", "--output", help="Archivo JSON de salida (por defecto, stdout)")
+    args = parser.parse_args()
+    args.repeat = max(1, args.repeat)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    converters = args.only.split(",") if args.only else list(CONVERTERS)
+    corpora = set(args.corpora.split(",")) if args.corpora else set(CORPORA)
+    for name in converters:
+        if name not in CONVERTERS:
+            parser.error(f"Conversor desconocido: {name}")
+    if "ocr" in converters and not shutil.which("tesseract"):
+        print("tesseract no está instalado: se omite OCR", file=sys.stderr)
+        converters.remove("ocr")
+
+    fixtures_dir = Path(args.fixtures) if args.fixtures else Path(tempfile.mkdtemp(prefix="apppdf-fixtures-"))
+    fixtures_dir.mkdir(parents=True, exist_ok=True)
+    previous = {}
+    if args.compare:
+        previous = {r["case"]: r for r in json.loads(Path(args.compare).read_text(encoding="utf-8"))["results"]}
+
+    results = []
+    try:
+        for converter in converters:
+            inputs, unit = CONVERTERS[converter]
+            for corpus in inputs:
+                if corpus not in corpora:
+                    continue
+                for size in sizes:
+                    # convert-image mide fotos de 12 MP: como mucho 20 por caso
+                    count = min(size, 20) if corpus == "photo" else size
+                    inp = fixture(fixtures_dir, corpus, count)
+                    print(f"{converter} / {inp.name}...", file=sys.stderr, flush=True)
+                    results.append(measure(converter, corpus, inp, unit, args))
+    finally:
+        if not args.fixtures:
+            shutil.rmtree(fixtures_dir, ignore_errors=True)
+
+    print_summary(results, previous)
+    report = json.dumps({"environment": environment(), "results": results}, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(report + "\n", encoding="utf-8")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: paso de páginas renderizadas de fitz a PIL.
+
+Compara, por página, el ciclo PNG (``pix.tobytes("png")`` + ``Image.open``)
+con ``tools.pixmap_to_pil`` (copia de muestras y sin copia) y el render en
+gris que usa el OCR.
+
+Uso:
+    python benchmarks/bench_pixmap_handoff.py --pages 10 --dpi 300
+"""
+import argparse
+import sys
+import time
+from io import BytesIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools import render_page, pixmap_to_pil  # noqa: E402
+from corpus import text_document  # noqa: E402
+
+
+def time_per_page(doc, fn) -> float:
+    """Tiempo medio por página (ms) de fn(page)."""
+    t0 = time.perf_counter()
+    for page in doc:
+        fn(page)
+    return (time.perf_counter() - t0) * 1000 / doc.page_count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark Pixmap -> PIL")
+    parser.add_argument("--pages", type=int, default=10, help="Páginas a renderizar")
+    parser.add_argument("--dpi", type=int, default=300, help="Resolución de render")
+    args = parser.parse_args()
+
+    from PIL import Image
+
+    doc = text_document(args.pages)
+    dpi = args.dpi
+
+    def png_roundtrip(page):
+        pix = render_page(page, dpi)
+        Image.open(BytesIO(pix.tobytes("png"))).load()
+
+    def samples_copy(page):
+        pix = render_page(page, dpi)
+        pixmap_to_pil(pix).load()
+
+    def samples_zero_copy(page):
+        pix = render_page(page, dpi)
+        pixmap_to_pil(pix, copy=False).load()
+
+    def samples_gray(page):
+        pix = render_page(page, dpi, grayscale=True)
+        pixmap_to_pil(pix, copy=False).load()
+
+    def render_only(page):
+        render_page(page, dpi)
+
+    results = {
+        "render (referencia)": time_per_page(doc, render_only),
+        "PNG encode + decode": time_per_page(doc, png_roundtrip),
+        "pixmap_to_pil (copia)": time_per_page(doc, samples_copy),
+        "pixmap_to_pil (sin copia)": time_per_page(doc, samples_zero_copy),
+        "render gris + sin copia": time_per_page(doc, samples_gray),
+    }
+
+    baseline = results["PNG encode + decode"]
+    print(f"{args.pages} páginas a {dpi} DPI (ms por página)")
+    for name, ms in results.items():
+        saved = baseline - ms
+        print(f"  {name:<28} {ms:8.1f} ms   ahorro vs PNG: {saved:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Corpus sintéticos para los benchmarks (PDF de texto, escaneados y con
+imágenes, DOCX con imágenes y carpetas de fotos).
+
+Los genera fixture() bajo demanda y los reutiliza entre ejecuciones.
+"""
+import os
+import sys
+from io import BytesIO
+from pathlib import Path
+
+CORPORA = ("text", "scan", "images", "docx-images", "photo")
+
+
+def _photo(width: int, height: int, seed: int):
+    """Imagen tipo foto: degradado con ruido, distinta para cada semilla."""
+    from PIL import Image, ImageFilter
+
+    noise = Image.effect_noise((width, height), 40 + seed % 30).filter(ImageFilter.GaussianBlur(2))
+    gradient = Image.linear_gradient("L").resize((width, height)).rotate(seed * 37 % 360)
+    return Image.merge("RGB", (noise, gradient, Image.eval(noise, lambda v: (v + seed * 11) % 256)))
+
+
+def _jpeg_bytes(img, quality: int = 85) -> bytes:
+    buf = BytesIO()
+    img.save(buf, format="JPEG", quality=quality)
+    return buf.getvalue()
+
+
+def text_document(pages: int):
+    """PDF de texto en memoria (documento fitz): 40 líneas y una forma por página."""
+    import fitz
+
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        for line in range(40):
+            page.insert_text((50, 60 + line * 18), f"Pagina {i + 1} linea {line + 1} " * 3, fontsize=10)
+        page.draw_rect(fitz.Rect(300, 500, 550, 780), color=(0, 0, 1), fill=(0.9, 0.6, 0.2))
+    return doc
+
+
+def build_text_pdf(path: Path, pages: int) -> None:
+    """PDF de texto (ver text_document)."""
+    doc = text_document(pages)
+    doc.save(str(path), garbage=3, deflate=True)
+    doc.close()
+
+
+def build_scan_pdf(path: Path, pages: int) -> None:
+    """PDF escaneado: cada página es un JPEG en gris a 150 DPI de una página de texto."""
+    import fitz
+
+    source = fitz.open()
+    doc = fitz.open()
+    for i in range(pages):
+        page = source.new_page()
+        for line in range(40):
+            page.insert_text((50, 60 + line * 18), f"Documento escaneado {i + 1}, renglon {line + 1}", fontsize=11)
+        pix = page.get_pixmap(dpi=150, colorspace=fitz.csGRAY)
+        out = doc.new_page(width=page.rect.width, height=page.rect.height)
+        out.insert_image(out.rect, stream=pix.tobytes("jpeg", jpg_quality=80))
+    doc.save(str(path))
+    doc.close()
+    source.close()
+
+
+def build_images_pdf(path: Path, pages: int) -> None:
+    """PDF con cuatro fotos distintas por página (y un logo repetido)."""
+    import fitz
+    from PIL import Image
+
+    logo = BytesIO()
+    Image.new("RGB", (120, 60), (200, 30, 30)).save(logo, format="PNG")
+    logo_xref = 0
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        for k in range(4):
+            rect = fitz.Rect(40 + (k % 2) * 270, 80 + (k // 2) * 340, 290 + (k % 2) * 270, 400 + (k // 2) * 340)
+            page.insert_image(rect, stream=_jpeg_bytes(_photo(800, 600, i * 4 + k)))
+        logo_rect = fitz.Rect(40, 20, 160, 60)
+        if logo_xref:
+            page.insert_image(logo_rect, xref=logo_xref)
+        else:
+            logo_xref = page.insert_image(logo_rect, stream=logo.getvalue())
+    doc.save(str(path))
+    doc.close()
+
+
+def build_images_docx(path: Path, pages: int) -> None:
+    """DOCX con dos fotos por página: una JPEG y una PNG."""
+    from docx import Document
+    from docx.shared import Inches
+
+    document = Document()
+    for i in range(pages):
+        document.add_paragraph(f"Pagina {i + 1}")
+        document.add_picture(BytesIO(_jpeg_bytes(_photo(1600, 1200, i * 2))), width=Inches(5))
+        png = BytesIO()
+        _photo(800, 600, i * 2 + 1).save(png, format="PNG")
+        png.seek(0)
+        document.add_picture(png, width=Inches(4))
+        document.add_page_break()
+    document.save(str(path))
+
+
+def build_photo(path: Path, count: int) -> None:
+    """Carpeta con count fotos JPEG de 4000x3000."""
+    path.mkdir(parents=True, exist_ok=True)
+    for i in range(count):
+        _photo(4000, 3000, i).save(path / f"foto_{i:04d}.jpg", format="JPEG", quality=90)
+
+
+BUILDERS = {
+    "text": (build_text_pdf, ".pdf"),
+    "scan": (build_scan_pdf, ".pdf"),
+    "images": (build_images_pdf, ".pdf"),
+    "docx-images": (build_images_docx, ".docx"),
+    "photo": (build_photo, ""),
+}
+
+
+def fixture(fixtures_dir: Path, corpus: str, size: int) -> Path:
+    """Ruta del corpus, generándolo si aún no existe en fixtures_dir."""
+    builder, suffix = BUILDERS[corpus]
+    path = fixtures_dir / f"{corpus}-{size}{suffix}"
+    if not path.exists():
+        print(f"Generando {path.name}...", file=sys.stderr, flush=True)
+        tmp_path = path.with_name(f"tmp-{path.name}")
+        builder(tmp_path, size)
+        os.replace(tmp_path, path)
+    return path
@@ -1,17 +1,33 @@
 import argparse
+import multiprocessing
+from functools import partial
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Any
 
+import metrics
 from tools import (
     pdf_to_docx,
     docx_to_pdf,
-    compress_pdf,
-    compress_docx_images,
-    pdf_to_docx_raster,
+    compress_pdf_with_progress,
+    compress_docx_images_with_progress,
+    pdf_to_docx_raster_with_progress,
     batch_pdf_to_docx,
     batch_docx_to_pdf,
     scan_files,
-    ocr_pdf_to_docx,
+    JobManifest,
+    delete_orphan_outputs,
+    ocr_pdf_to_docx_with_progress,
+    ConversionCache,
+    default_cache_dir,
+    run_cached,
+    PageRenderCache,
+    JobQueue,
+    JobFunc,
+    RESAMPLE_FILTERS,
+    extract_images_from_pdf_with_progress,
+    batch_extract_images_from_docx,
+    Profiler,
+    format_timings,
 )
 
 
@@ -22,8 +38,22 @@ def build_parser() -> argparse.ArgumentParser:
     )
     sub = parser.add_subparsers(dest="cmd", required=True)
 
+    # Opciones de caché compartidas por los conversores
+    cache_opts = argparse.ArgumentParser(add_help=False)
+    cache_opts.add_argument("--cache-dir", help=f"Carpeta de caché de resultados (por defecto {default_cache_dir()})")
+    cache_opts.add_argument("--cache-max-mb", type=int, default=2048, help="Tamaño máximo de la caché en MB (por defecto 2048)")
+    cache_opts.add_argument("--no-cache", action="store_true", help="No usar la caché de resultados")
+
+    # Perfilado de las conversiones
+    profile_opts = argparse.ArgumentParser(add_help=False)
+    profile_opts.add_argument(
+        "--profile", metavar="ARCHIVO",
+        help="Perfilar la ejecución y mostrar el tiempo por etapa: ARCHIVO.prof guarda un cProfile "
+             "(pstats/snakeviz), ARCHIVO.folded pilas colapsadas (flamegraph/speedscope)"
+    )
+
     # pdf2docx
-    p1 = sub.add_parser("pdf2docx", help="Convertir PDF a DOCX")
+    p1 = sub.add_parser("pdf2docx", help="Convertir PDF a DOCX", parents=[cache_opts, profile_opts])
     p1.add_argument("input", help="Ruta al PDF")
     p1.add_argument("-o", "--output", help="Ruta del DOCX de salida")
     p1.add_argument("--start", type=int, help="Página inicial (1-basado)")
@@ -31,108 +61,433 @@ def build_parser() -> argparse.ArgumentParser:
     p1.add_argument("--overwrite", action="store_true", help="Sobrescribe si el DOCX existe")
 
     # pdf2docx-raster (máxima fidelidad visual)
-    p1r = sub.add_parser("pdf2docx-raster", help="PDF → DOCX por imagen (máxima fidelidad, no editable)")
+    p1r = sub.add_parser("pdf2docx-raster", help="PDF → DOCX por imagen (máxima fidelidad, no editable)", parents=[cache_opts, profile_opts])
     p1r.add_argument("input", help="Ruta al PDF")
     p1r.add_argument("-o", "--output", help="Ruta del DOCX de salida")
     p1r.add_argument("--dpi", type=int, default=200, help="Resolución de render (por defecto 200 DPI)")
+    p1r.add_argument("--workers", type=int, default=1, help="Procesos para renderizar páginas en paralelo (por defecto 1)")
     p1r.add_argument("--overwrite", action="store_true", help="Sobrescribe si el DOCX existe")
+    p1r.add_argument("--render-cache-dir", help="Carpeta para compartir páginas renderizadas entre procesos y ejecuciones")
+    p1r.add_argument("--streaming", action="store_true", help="Escribe cada página al DOCX al vuelo (memoria constante)")
 
     # ocr-pdf2docx
-    pocr = sub.add_parser("ocr-pdf2docx", help="OCR: PDF (imagen) → DOCX (texto)")
+    pocr = sub.add_parser("ocr-pdf2docx", help="OCR: PDF (imagen) → DOCX (texto)", parents=[cache_opts, profile_opts])
     pocr.add_argument("input", help="Ruta al PDF")
     pocr.add_argument("-o", "--output", help="Ruta del DOCX de salida")
     pocr.add_argument("--dpi", type=int, default=300, help="DPI para render de páginas")
     pocr.add_argument("--lang", default="spa", help="Idioma Tesseract, ej.: spa, eng, spa+eng")
+    pocr.add_argument("--workers", type=int, default=1, help="Procesos de OCR en paralelo (por defecto 1)")
+    pocr.add_argument("--render-cache-dir", help="Carpeta para compartir páginas renderizadas entre procesos y ejecuciones")
+    pocr.add_argument("--streaming", action="store_true", help="Escribe cada página al DOCX al vuelo (memoria constante)")
 
     # docx2pdf
-    p2 = sub.add_parser("docx2pdf", help="Convertir DOCX a PDF")
+    p2 = sub.add_parser("docx2pdf", help="Convertir DOCX a PDF", parents=[profile_opts])
     p2.add_argument("input", help="Ruta al DOCX")
     p2.add_argument("-o", "--output", help="Ruta del PDF de salida")
     p2.add_argument("--overwrite", action="store_true", help="Sobrescribe si el PDF existe")
 
     # compress-pdf
-    p3 = sub.add_parser("compress-pdf", help="Optimizar PDF (limpieza/deflate)")
+    p3 = sub.add_parser("compress-pdf", help="Optimizar PDF (limpieza/deflate)", parents=[cache_opts, profile_opts])
     p3.add_argument("input", help="Ruta al PDF")
     p3.add_argument("-o", "--output", help="Ruta del PDF de salida (optimizado)", required=True)
+    p3.add_argument("--preset", choices=["screen", "ebook", "print"], help="Reducir y recodificar imágenes: screen (72 DPI), ebook (150 DPI), print (300 DPI)")
+    p3.add_argument("--image-dpi", type=int, help="Resolución máxima de las imágenes (sustituye la del preset)")
+    p3.add_argument("--quality", type=int, help="Calidad JPEG de las imágenes recodificadas (1-95)")
+    p3.add_argument("--jpx", action="store_true", help="Recodificar en JPEG2000 en lugar de JPEG")
+    p3.add_argument("--bilevel", action="store_true", default=None, help="Guardar en 1 bit los escaneos en blanco y negro (por defecto solo con --preset screen)")
+    p3.add_argument("--no-bilevel", dest="bilevel", action="store_false", help="No pasar nunca imágenes a 1 bit")
 
     # compress-docx
-    p4 = sub.add_parser("compress-docx", help="Comprimir imágenes dentro de DOCX")
+    p4 = sub.add_parser("compress-docx", help="Comprimir imágenes dentro de DOCX", parents=[cache_opts, profile_opts])
     p4.add_argument("input", help="Ruta al DOCX")
     p4.add_argument("-o", "--output", help="Ruta del DOCX de salida (comprimido)", required=True)
     p4.add_argument("--quality", type=int, default=75, help="Calidad JPEG (1-95, por defecto 75)")
     p4.add_argument("--max-width", type=int, help="Ancho máximo de imagen")
     p4.add_argument("--max-height", type=int, help="Alto máximo de imagen")
+    p4.add_argument("--workers", type=int, default=1, help="Procesos para recodificar imágenes en paralelo (por defecto 1)")
+    p4.add_argument("--resample", choices=RESAMPLE_FILTERS, default="lanczos", help="Filtro al reducir imágenes, de más calidad a más rápido (por defecto lanczos)")
+
+    # extract-images
+    p4e = sub.add_parser("extract-images", help="Extraer las imágenes de uno o varios PDF/DOCX", parents=[profile_opts])
+    p4e.add_argument("inputs", nargs="+", help="Archivos PDF o DOCX")
+    p4e.add_argument("--outdir", help="Carpeta de salida (una subcarpeta por archivo)", required=True)
+    p4e.add_argument("--format", choices=["png", "jpg", "webp"], default="png", help="Formato para las imágenes de PDF (por defecto png)")
+    p4e.add_argument("--min-size", type=int, default=0, help="DOCX: omitir imágenes de menos de N bytes")
+    p4e.add_argument("--types", help="DOCX: extensiones a extraer separadas por comas, p. ej. png,jpg")
+    p4e.add_argument("--no-dedupe", action="store_true", help="DOCX: extraer también las imágenes repetidas")
+    p4e.add_argument("--workers", type=int, default=1, help="Procesos en paralelo (por defecto 1)")
 
     # batch (carpeta)
-    p5 = sub.add_parser("batch", help="Procesar por lotes en una carpeta")
+    p5 = sub.add_parser("batch", help="Procesar por lotes en una carpeta", parents=[cache_opts, profile_opts])
     p5.add_argument("input", help="Carpeta a procesar")
     p5.add_argument("--outdir", help="Carpeta de salida", required=True)
     p5.add_argument("--pdf2docx", action="store_true", help="Convertir todos los PDF a DOCX (editable)")
     p5.add_argument("--pdf2docx-raster", action="store_true", help="Convertir todos los PDF a DOCX por imagen (máxima fidelidad)")
     p5.add_argument("--dpi", type=int, default=200, help="DPI para modo raster")
+    p5.add_argument("--workers", type=int, default=1, help="Archivos a convertir en paralelo, cada uno en su proceso (por defecto 1)")
+    p5.add_argument("--page-workers", type=int, default=1, help="Procesos por archivo para renderizar páginas en modo raster (por defecto 1)")
+    p5.add_argument("--no-recursive", action="store_true", help="No buscar en subcarpetas")
+    p5.add_argument("--include", action="append", help="Patrón glob de archivos a incluir (repetible), p. ej. 'informes/*'")
+    p5.add_argument("--exclude", action="append", help="Patrón glob de archivos o carpetas a excluir (repetible)")
+    p5.add_argument("--manifest", help="Archivo JSONL con el estado de cada archivo (por defecto OUTDIR/.apppdf-manifest.jsonl)")
+    p5.add_argument("--resume", action="store_true", help="Reanudar: omitir los archivos ya completados y reintentar los fallidos")
+    p5.add_argument("--max-retries", type=int, default=2, help="Reintentos por archivo fallido con --resume (por defecto 2)")
+    p5.add_argument("--sync", action="store_true", help="Sincronizar: convertir solo los archivos nuevos o modificados desde la última ejecución")
+    p5.add_argument("--hash", action="store_true", help="Con --sync, detectar cambios por hash del contenido en lugar de tamaño/fecha")
+    p5.add_argument("--delete-orphans", action="store_true", help="Borrar las salidas cuyos archivos de origen ya no existen (nunca si la carpeta de entrada sale vacía)")
+    p5.add_argument("--timeout", type=float, help="Tiempo máximo por archivo en segundos (se aborta y se marca como error)")
     p5.add_argument("--docx2pdf", action="store_true", help="Convertir todos los DOCX a PDF")
     p5.add_argument("--overwrite", action="store_true", help="Sobrescribir archivos de salida si existen")
 
+    # watch (carpeta vigilada)
+    p6 = sub.add_parser("watch", help="Vigilar una carpeta y convertir lo que llegue", parents=[cache_opts])
+    p6.add_argument("input", help="Carpeta a vigilar")
+    p6.add_argument("--outdir", help="Carpeta de salida", required=True)
+    p6.add_argument("--config", help="Reglas de ruteo en JSON (por defecto PDF→DOCX y DOCX→PDF)")
+    p6.add_argument("--workers", type=int, help="Conversiones en paralelo (por defecto 2)")
+    p6.add_argument("--max-queue", type=int, help="Máximo de archivos en conversión o esperando proceso (por defecto 8)")
+    p6.add_argument("--max-pending", type=int, default=10000, help="Máximo de archivos esperando a terminar de copiarse (por defecto 10000)")
+    p6.add_argument("--settle", type=float, help="Segundos sin cambios antes de convertir un archivo (por defecto 2)")
+    p6.add_argument("--poll", action="store_true", help="Forzar sondeo en lugar de inotify")
+    p6.add_argument("--poll-interval", type=float, default=2.0, help="Segundos entre sondeos (por defecto 2)")
+    p6.add_argument("--rescan-interval", type=float, default=300.0, help="Segundos entre reescaneos completos de respaldo (0 = nunca)")
+    p6.add_argument("--max-retries", type=int, default=2, help="Reintentos por archivo fallido antes de ignorarlo hasta que cambie (por defecto 2)")
+    p6.add_argument("--status-file", help="Archivo JSON donde publicar el estado de las colas cada pocos segundos")
+    p6.add_argument("--metrics-file", help="Archivo .prom donde volcar las métricas (formato Prometheus) cada pocos segundos")
+    p6.add_argument("--no-recursive", action="store_true", help="No vigilar subcarpetas")
+
+    p7 = sub.add_parser("serve", help="Servicio HTTP local de conversión", parents=[cache_opts])
+    p7.add_argument("--host", default="127.0.0.1", help="Dirección de escucha (por defecto 127.0.0.1)")
+    p7.add_argument("--port", type=int, default=8765, help="Puerto (por defecto 8765)")
+    p7.add_argument("--workers", type=int, default=2, help="Conversiones en paralelo (por defecto 2)")
+    p7.add_argument("--max-jobs", type=int, default=32, help="Máximo de trabajos pendientes antes de responder 503 (por defecto 32)")
+    p7.add_argument("--max-upload-mb", type=int, default=512, help="Tamaño máximo de archivo subido en MB (por defecto 512)")
+    p7.add_argument("--job-ttl", type=float, default=3600.0, help="Segundos que se conservan los resultados (por defecto 3600)")
+    p7.add_argument("--work-dir", help="Carpeta para archivos recibidos y resultados (por defecto una temporal)")
+
     return parser
 
 
+def build_cache(args: argparse.Namespace) -> Optional[ConversionCache]:
+    """Crea la caché de resultados según las opciones --cache-dir/--no-cache."""
+    if getattr(args, "no_cache", True):
+        return None
+    cache_dir = Path(args.cache_dir) if args.cache_dir else default_cache_dir()
+    return ConversionCache(cache_dir, max_bytes=args.cache_max_mb * 1024 * 1024)
+
+
+def print_batch_summary(title: str, outdir: Path, results: list[dict]) -> None:
+    """Imprime el resumen de un lote y los errores por archivo."""
+    counts = {}
+    for r in results:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+    in_bytes = sum(r["input_bytes"] or 0 for r in results if r["status"] == "ok")
+    out_bytes = sum(r["output_bytes"] or 0 for r in results if r["status"] == "ok")
+    elapsed = sum(r["elapsed"] for r in results)
+    print(
+        f"{title} completado en: {outdir} (ok={counts.get('ok', 0)}, "
+        f"omitidos={counts.get('skipped', 0)}, "
+        f"errores={counts.get('error', 0) + counts.get('timeout', 0)})"
+    )
+    print(f"  {in_bytes / 1e6:.1f} MB -> {out_bytes / 1e6:.1f} MB, {elapsed:.1f} s de conversión")
+    for r in results:
+        if r["status"] in ("error", "timeout"):
+            print(f" - ERROR {r['input']}: {r['error']}")
+
+
+def build_profiler(args: argparse.Namespace) -> Optional[Profiler]:
+    """Perfilador pedido con --profile (el modo sale de la extensión del archivo)."""
+    path = getattr(args, "profile", None)
+    if not path:
+        return None
+    path = Path(path)
+    mode = "collapsed" if path.suffix.lower() in (".folded", ".collapsed", ".txt") else "cprofile"
+    return Profiler(path, mode)
+
+
+def print_timings(name: str, result: Any) -> None:
+    """Imprime el desglose por etapa si el resultado lo trae."""
+    if not isinstance(result, dict) or "timings" not in result or result.get("cached"):
+        return
+    print(f"Tiempos de {name}:")
+    for line in format_timings(result["timings"]):
+        print(f"  {line}")
+
+
+def run_job(jobs: JobQueue, name: str, task: JobFunc, profiler: Optional[Profiler] = None) -> Any:
+    """Ejecuta un trabajo en la cola y espera su resultado; Ctrl+C lo cancela.
+
+    Con profiler, el trabajo se perfila en su hilo y el perfil se guarda al
+    terminar junto con el desglose por etapa.
+    """
+    from concurrent.futures import CancelledError, wait
+
+    if profiler is not None:
+        task = partial(profiler.run, task)
+    job = jobs.submit(task, name=name)
+    try:
+        # Espera con timeout para que Ctrl+C llegue también en Windows
+        while not wait([job.future], timeout=0.5).done:
+            pass
+    except KeyboardInterrupt:
+        print("Cancelando...", flush=True)
+        job.cancel()
+        try:
+            job.result()
+        except (InterruptedError, CancelledError):
+            pass
+        raise SystemExit(130)
+    result = job.result()
+    if profiler is not None:
+        profiler.dump()
+        print_timings(name, result)
+        print(f"Perfil guardado en: {profiler.output_path}")
+    return result
+
+
 def main():
+    multiprocessing.freeze_support()
     parser = build_parser()
     args = parser.parse_args()
+    cache = build_cache(args)
+    # Una ejecución de la CLI no reutiliza renders en memoria: solo en disco
+    render_cache = None
+    if getattr(args, "render_cache_dir", None):
+        render_cache = PageRenderCache(max_bytes=0, disk_dir=Path(args.render_cache_dir))
+    # Las conversiones pasan por la cola para poder cancelarlas con Ctrl+C
+    jobs = JobQueue(max_workers=1)
+    run = partial(run_job, jobs, profiler=build_profiler(args))
 
     if args.cmd == "pdf2docx":
         inp = Path(args.input)
         out = Path(args.output) if args.output else inp.with_suffix(".docx")
-        pdf_to_docx(inp, out, args.start, args.end, args.overwrite)
+        run("pdf2docx", lambda progress, cancelled: run_cached(
+            cache, "pdf2docx", inp, out, {"start": args.start, "end": args.end},
+            lambda: pdf_to_docx(inp, out, args.start, args.end, True),
+            overwrite=args.overwrite,
+        ))
         print(f"Conversión completada: {out}")
 
     elif args.cmd == "pdf2docx-raster":
         inp = Path(args.input)
         out = Path(args.output) if args.output else inp.with_suffix(".docx")
         dpi = getattr(args, 'dpi', 200)
-        pdf_to_docx_raster(inp, out, dpi=dpi, overwrite=args.overwrite)
+        run("pdf2docx-raster", lambda progress, cancelled: run_cached(
+            cache, "pdf2docx-raster", inp, out, {"dpi": dpi, "streaming": args.streaming},
+            lambda: pdf_to_docx_raster_with_progress(
+                inp, out, dpi=dpi, overwrite=True, cancel_check=cancelled,
+                workers=max(1, args.workers), streaming=args.streaming, render_cache=render_cache
+            ),
+            overwrite=args.overwrite,
+        ))
         print(f"Conversión (raster) completada: {out}")
 
     elif args.cmd == "ocr-pdf2docx":
         inp = Path(args.input)
         out = Path(args.output) if args.output else inp.with_suffix(".docx")
-        ocr_pdf_to_docx(inp, out, dpi=args.dpi, lang=args.lang)
+        run("ocr-pdf2docx", lambda progress, cancelled: run_cached(
+            cache, "ocr-pdf2docx", inp, out, {"dpi": args.dpi, "lang": args.lang, "streaming": args.streaming},
+            lambda: ocr_pdf_to_docx_with_progress(
+                inp, out, dpi=args.dpi, lang=args.lang, cancel_check=cancelled,
+                streaming=args.streaming, workers=max(1, args.workers), render_cache=render_cache
+            ),
+        ))
         print(f"OCR completado (texto): {out}")
 
     elif args.cmd == "docx2pdf":
         inp = Path(args.input)
         out = Path(args.output) if args.output else inp.with_suffix(".pdf")
-        docx_to_pdf(inp, out, args.overwrite)
+        run("docx2pdf", lambda progress, cancelled: docx_to_pdf(inp, out, args.overwrite))
         print(f"Conversión completada: {out}")
 
     elif args.cmd == "compress-pdf":
         inp = Path(args.input)
         out = Path(args.output)
-        compress_pdf(inp, out)
+        opts = {
+            "preset": args.preset,
+            "target_dpi": args.image_dpi,
+            "quality": max(1, min(95, args.quality)) if args.quality else None,
+            "image_format": "jpx" if args.jpx else "jpeg",
+            "bilevel": args.bilevel,
+        }
+        run("compress-pdf", lambda progress, cancelled: run_cached(
+            cache, "compress-pdf", inp, out, opts,
+            lambda: compress_pdf_with_progress(inp, out, cancel_check=cancelled, **opts),
+        ))
         print(f"PDF optimizado: {out}")
 
     elif args.cmd == "compress-docx":
         inp = Path(args.input)
         out = Path(args.output)
         q = max(1, min(95, args.quality))
-        compress_docx_images(inp, out, quality=q, max_width=args.max_width, max_height=args.max_height)
+        run("compress-docx", lambda progress, cancelled: run_cached(
+            cache, "compress-docx", inp, out,
+            {"quality": q, "max_width": args.max_width, "max_height": args.max_height, "resample": args.resample},
+            lambda: compress_docx_images_with_progress(
+                inp, out, quality=q, max_width=args.max_width, max_height=args.max_height,
+                cancel_check=cancelled, workers=max(1, args.workers), resample=args.resample
+            ),
+        ))
         print(f"DOCX comprimido: {out}")
 
+    elif args.cmd == "extract-images":
+        outdir = Path(args.outdir)
+        inputs = [Path(p) for p in args.inputs]
+        workers = max(1, args.workers)
+        docxs = [p for p in inputs if p.suffix.lower() == ".docx"]
+        pdfs = [p for p in inputs if p.suffix.lower() == ".pdf"]
+        for p in inputs:
+            if p not in docxs and p not in pdfs:
+                print(f" - Omitido (no es PDF ni DOCX): {p}")
+        for pdf in pdfs:
+            result = run("extract-pdf", lambda progress, cancelled: extract_images_from_pdf_with_progress(
+                pdf, outdir / pdf.stem, args.format, cancel_check=cancelled, workers=workers
+            ))
+            print(
+                f"{pdf.name}: {len(result['extracted'])} imágenes "
+                f"(sin recodificar={result['native']}, repetidas={result['duplicates']}, errores={len(result['errors'])})"
+            )
+        if docxs:
+            types = [t for t in args.types.split(",") if t.strip()] if args.types else None
+            summary = run("extract-docx", lambda progress, cancelled: batch_extract_images_from_docx(
+                docxs, outdir, min_size=args.min_size, types=types, dedupe=not args.no_dedupe,
+                workers=workers, cancel_check=cancelled
+            ))
+            print(
+                f"DOCX: {summary['extracted']} imágenes de {summary['total']} archivos, "
+                f"{summary['bytes'] / 1e6:.1f} MB (repetidas={summary['duplicates']}, "
+                f"filtradas={summary['skipped']}, errores={len(summary['errors'])})"
+            )
+            for name, err in summary["errors"]:
+                print(f" - ERROR {name}: {err}")
+
     elif args.cmd == "batch":
         folder = Path(args.input)
+        if not folder.is_dir():
+            parser.error(f"batch: la carpeta de entrada no existe: {folder}")
         outdir = Path(args.outdir)
-        pdfs, docxs = scan_files(folder)
-        if args.pdf2docx or args.pdf2docx_raster:
-            mode = "raster" if args.pdf2docx_raster else "editable"
-            ok, errs = batch_pdf_to_docx(pdfs, outdir, mode=mode, overwrite=args.overwrite, dpi=args.dpi)
-            print(f"PDF→DOCX ({mode}) completado en: {outdir} (ok={ok}, errores={len(errs)})")
-            for f, msg in errs:
-                print(f" - ERROR {f}: {msg}")
-        if args.docx2pdf:
-            ok, errs = batch_docx_to_pdf(docxs, outdir, overwrite=args.overwrite)
-            print(f"DOCX→PDF completado en: {outdir} (ok={ok}, errores={len(errs)})")
-            for f, msg in errs:
-                print(f" - ERROR {f}: {msg}")
+        outdir.mkdir(parents=True, exist_ok=True)
+        pdfs, docxs = scan_files(folder, recursive=not args.no_recursive, include=args.include, exclude=args.exclude)
+        manifest_path = Path(args.manifest) if args.manifest else outdir / ".apppdf-manifest.jsonl"
+        with JobManifest(manifest_path) as manifest:
+            resume_opts = {
+                "manifest": manifest, "resume": args.resume, "max_retries": max(0, args.max_retries),
+                "sync": args.sync, "use_hash": args.hash,
+            }
+            if args.pdf2docx or args.pdf2docx_raster:
+                mode = "raster" if args.pdf2docx_raster else "editable"
+                results = run("batch-pdf2docx", lambda progress, cancelled: batch_pdf_to_docx(
+                    pdfs, outdir, mode=mode, overwrite=args.overwrite, dpi=args.dpi,
+                    workers=max(1, args.workers), page_workers=max(1, args.page_workers),
+                    cache=cache, root=folder, timeout=args.timeout, cancel_check=cancelled, **resume_opts,
+                ))
+                print_batch_summary(f"PDF→DOCX ({mode})", outdir, results)
+            if args.docx2pdf:
+                results = run("batch-docx2pdf", lambda progress, cancelled: batch_docx_to_pdf(
+                    docxs, outdir, overwrite=args.overwrite, root=folder, timeout=args.timeout,
+                    cancel_check=cancelled, **resume_opts,
+                ))
+                print_batch_summary("DOCX→PDF", outdir, results)
+            if args.delete_orphans:
+                deleted = delete_orphan_outputs(manifest, folder, pdfs + docxs)
+                print(f"Salidas huérfanas borradas: {len(deleted)}")
+                for p in deleted:
+                    print(f" - {p}")
+
+    elif args.cmd == "watch":
+        run_watch(args, cache)
+
+    elif args.cmd == "serve":
+        run_serve(args, cache)
+
+
+def run_watch(args: argparse.Namespace, cache: Optional[ConversionCache]) -> None:
+    """Ejecuta el servicio de carpeta vigilada hasta Ctrl+C o SIGTERM."""
+    import json
+    import os
+    import signal
+    import time
+
+    from watcher import FolderWatchService, load_watch_config
+
+    config = load_watch_config(Path(args.config) if args.config else None)
+    status_path = Path(args.status_file) if args.status_file else None
+    metrics_path = Path(args.metrics_file) if args.metrics_file else None
+
+    def on_event(kind: str, info: dict) -> None:
+        stamp = time.strftime("%H:%M:%S")
+        if kind == "queued":
+            print(f"[{stamp}] En cola ({info['converter']}): {info['input']}", flush=True)
+        elif kind == "done":
+            suffix = " (caché)" if info["cached"] else ""
+            print(f"[{stamp}] Listo en {info['elapsed']:.1f}s{suffix}: {info['output']}", flush=True)
+        elif kind == "error":
+            print(f"[{stamp}] ERROR {info['input']}: {info['error']}", flush=True)
+        elif kind == "started":
+            print(f"[{stamp}] Vigilando {info['root']} ({info['mode']}) -> {info['outdir']}", flush=True)
+        elif kind in ("status", "stopped"):
+            if status_path:
+                tmp_path = status_path.with_name(f"{status_path.name}.tmp")
+                tmp_path.write_text(json.dumps(dict(info, time=time.time())), encoding="utf-8")
+                os.replace(tmp_path, status_path)
+            if metrics_path:
+                metrics.REGISTRY.write(metrics_path)
+
+    service = FolderWatchService(
+        Path(args.input), Path(args.outdir), config,
+        workers=args.workers or config.get("workers", 2),
+        max_queue=args.max_queue or config.get("max_queue", 8),
+        max_pending=args.max_pending,
+        settle=args.settle if args.settle is not None else config.get("settle", 2.0),
+        recursive=not args.no_recursive,
+        force_polling=args.poll,
+        poll_interval=args.poll_interval,
+        rescan_interval=args.rescan_interval,
+        max_retries=max(0, args.max_retries),
+        cache=cache,
+        on_event=on_event,
+    )
+    signal.signal(signal.SIGTERM, lambda *_: service.stop())
+    try:
+        service.run()
+    except KeyboardInterrupt:
+        pass
+    status = service.status()
+    print(f"Detenido: {status['done']} convertidos, {status['errors']} errores")
+
+
+
+def run_serve(args: argparse.Namespace, cache: Optional[ConversionCache]) -> None:
+    """Ejecuta el servicio HTTP hasta Ctrl+C o SIGTERM."""
+    import time
+
+    from server import ConversionServer, run_server
+
+    def on_event(kind: str, info: dict) -> None:
+        stamp = time.strftime("%H:%M:%S")
+        if kind == "started":
+            print(f"[{stamp}] Escuchando en http://{info['host']}:{info['port']} ({info['workers']} procesos)", flush=True)
+        elif kind == "queued":
+            print(f"[{stamp}] Trabajo {info['id']} ({info['converter']}, {info['bytes'] / 1e6:.1f} MB)", flush=True)
+        elif kind == "done":
+            suffix = " (caché)" if info["cached"] else ""
+            print(f"[{stamp}] Trabajo {info['id']} listo en {info['elapsed']:.1f}s{suffix}", flush=True)
+        elif kind == "error":
+            print(f"[{stamp}] Trabajo {info['id']} ERROR: {info['error']}", flush=True)
+
+    server = ConversionServer(
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        max_jobs=args.max_jobs,
+        max_upload_mb=args.max_upload_mb,
+        job_ttl=args.job_ttl,
+        work_dir=Path(args.work_dir) if args.work_dir else None,
+        cache=cache,
+        on_event=on_event,
+    )
+    run_server(server)
+    print("Servidor detenido")
 
 
 if __name__ == "__main__":
@@ -1,6 +1,8 @@
+import multiprocessing
 import customtkinter  # Asegura detección en PyInstaller
 from gui import Pdf2WordApp
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     app = Pdf2WordApp()
     app.mainloop()
@@ -1,20 +1,26 @@
+import os
 import threading
+import multiprocessing
+from collections import deque
 import customtkinter as ctk
 from tkinter import filedialog, messagebox
 from pathlib import Path
-from typing import Optional, Callable
+from typing import Optional, Callable, Any
 from datetime import datetime
 
 from tools import (
-    pdf_to_docx, pdf_to_docx_with_progress,
+    pdf_to_docx_with_progress,
     docx_to_pdf,
     compress_pdf_with_progress,
     compress_docx_images_with_progress,
-    pdf_to_docx_raster, pdf_to_docx_raster_with_progress,
+    pdf_to_docx_raster_with_progress,
     ocr_pdf_to_docx_with_progress,
-    convert_image,
-    get_image_info, extract_images_from_pdf, extract_images_from_docx,
-    SUPPORTED_IMAGE_FORMATS
+    convert_image, batch_convert_images,
+    get_image_info, extract_images_from_pdf_with_progress, extract_images_from_docx_with_progress,
+    ConversionCache, default_cache_dir, run_cached,
+    batch_pdf_to_docx, batch_docx_to_pdf, JobManifest,
+    JobQueue, JobHandle, format_timings,
+    SUPPORTED_IMAGE_FORMATS, RESAMPLE_FILTERS
 )
 
 # Configurar apariencia
@@ -23,7 +29,21 @@ ctk.set_default_color_theme("blue")
 
 
 class ProgressModal(ctk.CTkToplevel):
-    """Modal de progreso con log detallado estilo terminal."""
+    """Modal de progreso con log detallado estilo terminal.
+
+    Los hilos de trabajo solo dejan los eventos (log, progreso, estado) en un
+    buffer; el modal lo vacia cada DRAIN_MS con una sola insercion en el
+    textbox, asi los callbacks por pagina de lotes grandes no saturan el
+    bucle de Tk. El log conserva como mucho LOG_MAX_LINES lineas.
+
+    El boton "Tiempos" despliega un panel de depuracion con el desglose por
+    etapa de la conversion (ver set_timings).
+    """
+
+    DRAIN_MS = 50
+    LOG_MAX_LINES = 2000
+    HEIGHT = 420
+    DEBUG_HEIGHT = 200
 
     def __init__(self, parent, title: str = "Procesando..."):
         super().__init__(parent)
@@ -44,7 +64,21 @@ class ProgressModal(ctk.CTkToplevel):
 
         self._completed = False
         self._cancelled = False
+        self._job: Optional[JobHandle] = None
+
+        # Buffer de eventos pendientes de pintar (lo llenan los hilos de trabajo)
+        self._lock = threading.Lock()
+        self._pending_lines: deque[str] = deque(maxlen=self.LOG_MAX_LINES)
+        self._pending_progress: Optional[tuple[float, str]] = None
+        self._pending_status: Optional[str] = None
+        self._pending_title: Optional[str] = None
+        self._pending_complete: Optional[bool] = None
+        self._pending_timings: Optional[dict] = None
+        self._log_lines = 0
+        self._debug_visible = False
+
         self._build_ui(title)
+        self._drain_id = self.after(self.DRAIN_MS, self._drain)
 
     def _build_ui(self, title: str) -> None:
         # Header
@@ -103,6 +137,27 @@ class ProgressModal(ctk.CTkToplevel):
         )
         self.cancel_btn.pack(side="left")
 
+        self.debug_btn = ctk.CTkButton(
+            btn_frame, text="Tiempos", width=100,
+            fg_color="transparent", border_width=1,
+            command=self._toggle_debug
+        )
+        self.debug_btn.pack(side="left", padx=10)
+        self._btn_frame = btn_frame
+
+        # Panel de depuracion (oculto hasta pulsar "Tiempos")
+        self.debug_frame = ctk.CTkFrame(self, fg_color=("gray85", "gray20"))
+        self.debug_text = ctk.CTkTextbox(
+            self.debug_frame, height=self.DEBUG_HEIGHT - 30,
+            font=ctk.CTkFont(family="Consolas", size=11),
+            fg_color=("gray95", "gray10"),
+            text_color=("gray20", "gray80"),
+            corner_radius=8
+        )
+        self.debug_text.pack(fill="both", expand=True, padx=10, pady=10)
+        self.debug_text.insert("end", "Sin tiempos todavia: se muestran al terminar la conversion.")
+        self.debug_text.configure(state="disabled")
+
         self.close_btn = ctk.CTkButton(
             btn_frame, text="Cerrar", width=120,
             state="disabled",
@@ -111,85 +166,140 @@ class ProgressModal(ctk.CTkToplevel):
         self.close_btn.pack(side="right")
 
     def log(self, message: str, level: str = "info") -> None:
-        """Agrega un mensaje al log."""
+        """Agrega un mensaje al log (se puede llamar desde cualquier hilo)."""
         timestamp = datetime.now().strftime("%H:%M:%S")
         prefix = ""
-        color = None
 
         if level == "success":
             prefix = "[OK] "
-            color = "#4CAF50"
         elif level == "error":
             prefix = "[ERROR] "
-            color = "#F44336"
         elif level == "warning":
             prefix = "[AVISO] "
-            color = "#FF9800"
         elif level == "progress":
             prefix = ">>> "
-            color = "#2196F3"
 
-        def update():
-            self.log_text.configure(state="normal")
-            self.log_text.insert("end", f"[{timestamp}] {prefix}{message}\n")
-            self.log_text.see("end")
-            self.log_text.configure(state="disabled")
-
-        self.after(0, update)
+        with self._lock:
+            self._pending_lines.append(f"[{timestamp}] {prefix}{message}\n")
 
     def set_progress(self, current: int, total: int, message: str = "") -> None:
-        """Actualiza la barra de progreso."""
+        """Actualiza la barra de progreso (solo se pinta el ultimo valor de cada intervalo)."""
         if total > 0:
-            progress = current / total
-            percent = int(progress * 100)
-
-            def update():
-                self.progress_bar.set(progress)
-                self.progress_label.configure(text=f"{percent}%")
-                if message:
-                    self.status_label.configure(text=message)
-
-            self.after(0, update)
+            with self._lock:
+                self._pending_progress = (current / total, message)
 
     def set_status(self, status: str) -> None:
         """Actualiza el texto de estado."""
-        self.after(0, lambda: self.status_label.configure(text=status))
+        with self._lock:
+            self._pending_status = status
 
     def set_title(self, title: str) -> None:
         """Actualiza el titulo."""
-        self.after(0, lambda: self.title_label.configure(text=title))
+        with self._lock:
+            self._pending_title = title
+
+    def set_timings(self, result: Any) -> None:
+        """Muestra en el panel de depuracion el desglose por etapa de un resultado.
+
+        Acepta el dict que devuelven las funciones de tools; si no trae
+        "timings" (o viene de la cache) no hace nada.
+        """
+        if not isinstance(result, dict) or "timings" not in result or result.get("cached"):
+            return
+        with self._lock:
+            self._pending_timings = result["timings"]
 
     def complete(self, success: bool = True, message: str = "") -> None:
         """Marca el proceso como completado."""
         self._completed = True
-
-        def update():
+        if success:
+            self.log(message or "Proceso completado exitosamente", "success")
+        else:
+            self.log(message or "El proceso termino con errores", "error")
+        with self._lock:
+            self._pending_complete = success
+
+    def _drain(self) -> None:
+        """Pinta los eventos acumulados desde el ultimo intervalo."""
+        with self._lock:
+            lines = list(self._pending_lines)
+            self._pending_lines.clear()
+            progress, self._pending_progress = self._pending_progress, None
+            status, self._pending_status = self._pending_status, None
+            title, self._pending_title = self._pending_title, None
+            completion, self._pending_complete = self._pending_complete, None
+            timings, self._pending_timings = self._pending_timings, None
+
+        if title is not None:
+            self.title_label.configure(text=title)
+        if status is not None:
+            self.status_label.configure(text=status)
+        if progress is not None:
+            value, message = progress
+            self.progress_bar.set(value)
+            self.progress_label.configure(text=f"{int(value * 100)}%")
+            if message:
+                self.status_label.configure(text=message)
+        if completion is not None:
             self.progress_bar.set(1.0)
             self.progress_label.configure(text="100%")
-
-            if success:
+            if completion:
                 self.status_label.configure(text="Completado", text_color="#4CAF50")
-                self.log(message or "Proceso completado exitosamente", "success")
             else:
                 self.status_label.configure(text="Error", text_color="#F44336")
-                self.log(message or "El proceso termino con errores", "error")
-
             self.cancel_btn.configure(state="disabled")
             self.close_btn.configure(state="normal")
+        if lines:
+            self._append_log(lines)
+        if timings is not None:
+            self.debug_text.configure(state="normal")
+            self.debug_text.delete("1.0", "end")
+            self.debug_text.insert("end", "\n".join(format_timings(timings, slowest_pages=10)))
+            self.debug_text.configure(state="disabled")
+
+        self._drain_id = self.after(self.DRAIN_MS, self._drain)
+
+    def _append_log(self, lines: list[str]) -> None:
+        """Inserta las lineas de una vez y descarta las mas antiguas si se pasa del limite."""
+        lines = lines[-self.LOG_MAX_LINES:]
+        self.log_text.configure(state="normal")
+        self.log_text.insert("end", "".join(lines))
+        self._log_lines += len(lines)
+        excess = self._log_lines - self.LOG_MAX_LINES
+        if excess > 0:
+            self.log_text.delete("1.0", f"{excess + 1}.0")
+            self._log_lines -= excess
+        self.log_text.see("end")
+        self.log_text.configure(state="disabled")
 
-        self.after(0, update)
+    def _toggle_debug(self) -> None:
+        """Muestra u oculta el panel de tiempos ampliando la ventana."""
+        self._debug_visible = not self._debug_visible
+        if self._debug_visible:
+            self.debug_frame.pack(fill="both", padx=20, pady=(0, 10), before=self._btn_frame)
+            self.geometry(f"550x{self.HEIGHT + self.DEBUG_HEIGHT}")
+        else:
+            self.debug_frame.pack_forget()
+            self.geometry(f"550x{self.HEIGHT}")
 
     def is_cancelled(self) -> bool:
         """Verifica si el usuario cancelo."""
         return self._cancelled
 
+    def attach_job(self, job: JobHandle) -> None:
+        """Asocia el trabajo de la cola que muestra el modal (Cancelar lo cancela)."""
+        self._job = job
+
     def _on_cancel(self) -> None:
         self._cancelled = True
+        if self._job is not None:
+            self._job.cancel()
         self.log("Cancelando operacion...", "warning")
         self.cancel_btn.configure(state="disabled")
         self.status_label.configure(text="Cancelando...")
 
     def _on_close(self) -> None:
+        self.after_cancel(self._drain_id)
         self.grab_release()
         self.destroy()
 
@@ -207,6 +317,14 @@ class Pdf2WordApp(ctk.CTk):
         self.geometry("900x650")
         self.minsize(800, 600)
 
+        # Cache de resultados (se crea al primer uso)
+        self.var_use_cache = ctk.BooleanVar(value=True)
+        self._cache: Optional[ConversionCache] = None
+
+        # Cola de trabajos: limita cuantas conversiones corren a la vez y
+        # cuantos procesos usan entre todas
+        self.jobs = JobQueue(max_workers=2, cpu_budget=os.cpu_count() or 1)
+
         # Variables de estado - PDF->DOCX
         self.var_input = ctk.StringVar()
         self.var_output = ctk.StringVar()
@@ -217,6 +335,7 @@ class Pdf2WordApp(ctk.CTk):
         self.var_raster_dpi = ctk.IntVar(value=200)
         self.var_ocr_lang = ctk.StringVar(value="spa")
         self.var_ocr_dpi = ctk.IntVar(value=300)
+        self.var_ocr_workers = ctk.IntVar(value=os.cpu_count() or 1)
 
         # Variables - DOCX->PDF
         self.var_docx_in = ctk.StringVar()
@@ -226,6 +345,7 @@ class Pdf2WordApp(ctk.CTk):
         # Variables - Compresion
         self.var_pdf_comp_in = ctk.StringVar()
         self.var_pdf_comp_out = ctk.StringVar()
+        self.var_pdf_preset = ctk.StringVar(value="Sin perdida")
         self.var_docx_comp_in = ctk.StringVar()
         self.var_docx_comp_out = ctk.StringVar()
         self.var_quality = ctk.IntVar(value=75)
@@ -238,7 +358,10 @@ class Pdf2WordApp(ctk.CTk):
         self.var_batch_raster = ctk.BooleanVar(value=False)
         self.var_batch_docx2pdf = ctk.BooleanVar(value=False)
         self.var_batch_overwrite = ctk.BooleanVar(value=True)
+        self.var_batch_resume = ctk.BooleanVar(value=False)
         self.var_batch_dpi = ctk.IntVar(value=200)
+        self.var_batch_workers = ctk.IntVar(value=os.cpu_count() or 1)
+        self.var_batch_page_workers = ctk.IntVar(value=1)
 
         # Variables - Imagenes
         self.var_img_input = ctk.StringVar()
@@ -248,8 +371,13 @@ class Pdf2WordApp(ctk.CTk):
         self.var_img_width = ctk.StringVar()
         self.var_img_height = ctk.StringVar()
         self.var_img_maintain_aspect = ctk.BooleanVar(value=True)
+        self.var_img_resample = ctk.StringVar(value="Lanczos")
         self.var_img_overwrite = ctk.BooleanVar(value=False)
         self.var_img_outdir = ctk.StringVar()
+        self.var_img_thumb = ctk.BooleanVar(value=False)
+        self.var_img_thumb_size = ctk.IntVar(value=256)
+        self.var_img_ico = ctk.BooleanVar(value=False)
+        self.var_img_workers = ctk.IntVar(value=os.cpu_count() or 1)
         self.img_batch_files: list[Path] = []
 
         # Variables - Extraccion
@@ -282,6 +410,8 @@ class Pdf2WordApp(ctk.CTk):
         self.theme_switch.select()
         self.theme_switch.pack(side="right", padx=10)
 
+        ctk.CTkCheckBox(header_frame, text="Usar cache", variable=self.var_use_cache).pack(side="right", padx=10)
+
         # Tabview principal
         self.tabview = ctk.CTkTabview(self, corner_radius=10)
         self.tabview.pack(fill="both", expand=True, padx=20, pady=10)
@@ -366,6 +496,8 @@ class Pdf2WordApp(ctk.CTk):
         dpi_ocr_frame.pack(pady=5, padx=15, fill="x")
         ctk.CTkLabel(dpi_ocr_frame, text="DPI:").pack(side="left")
         ctk.CTkEntry(dpi_ocr_frame, textvariable=self.var_ocr_dpi, width=60).pack(side="left", padx=5)
+        ctk.CTkLabel(dpi_ocr_frame, text="Procesos:").pack(side="left", padx=(10, 0))
+        ctk.CTkEntry(dpi_ocr_frame, textvariable=self.var_ocr_workers, width=40).pack(side="left", padx=5)
         ctk.CTkButton(ocr_card, text="Convertir", fg_color="#FF9800", hover_color="#F57C00", command=self.on_convert_pdf2docx_ocr).pack(pady=(5, 15), padx=15, fill="x")
 
     def _build_docx2pdf_tab(self, parent) -> None:
@@ -446,6 +578,14 @@ class Pdf2WordApp(ctk.CTk):
         ctk.CTkLabel(resize_frame, text="Alto:").pack(side="left", padx=(10, 0))
         ctk.CTkEntry(resize_frame, textvariable=self.var_img_height, width=70, placeholder_text="px").pack(side="left", padx=5)
         ctk.CTkCheckBox(resize_frame, text="Mantener proporcion", variable=self.var_img_maintain_aspect).pack(side="left", padx=15)
+        # De mas calidad (Lanczos) a mas rapido (Nearest)
+        ctk.CTkLabel(resize_frame, text="Filtro:").pack(side="left", padx=(5, 5))
+        ctk.CTkOptionMenu(
+            resize_frame,
+            variable=self.var_img_resample,
+            values=[name.capitalize() for name in RESAMPLE_FILTERS],
+            width=100
+        ).pack(side="left", padx=5)
 
         # Info de imagen
         self.img_info_label = ctk.CTkLabel(single_frame, text="", text_color=("gray50", "gray60"))
@@ -483,6 +623,16 @@ class Pdf2WordApp(ctk.CTk):
         ctk.CTkEntry(out_frame, textvariable=self.var_img_outdir, placeholder_text="Carpeta de destino...").grid(row=0, column=1, padx=5, pady=5, sticky="ew")
         ctk.CTkButton(out_frame, text="Elegir", width=80, command=self.on_choose_img_outdir).grid(row=0, column=2, padx=0, pady=5)
 
+        # Salidas extra: cada imagen se decodifica una vez y se escriben todas
+        extras_frame = ctk.CTkFrame(batch_frame, fg_color="transparent")
+        extras_frame.pack(fill="x", padx=15, pady=5)
+        ctk.CTkLabel(extras_frame, text="Ademas:").pack(side="left", padx=(0, 10))
+        ctk.CTkCheckBox(extras_frame, text="Miniatura JPG", variable=self.var_img_thumb).pack(side="left", padx=5)
+        ctk.CTkEntry(extras_frame, textvariable=self.var_img_thumb_size, width=60, placeholder_text="px").pack(side="left", padx=5)
+        ctk.CTkCheckBox(extras_frame, text="Icono ICO", variable=self.var_img_ico).pack(side="left", padx=15)
+        ctk.CTkLabel(extras_frame, text="Procesos:").pack(side="left", padx=(15, 5))
+        ctk.CTkEntry(extras_frame, textvariable=self.var_img_workers, width=50).pack(side="left", padx=5)
+
         ctk.CTkButton(
             batch_frame, text="Convertir Lote", width=180, height=45,
             fg_color="#4CAF50", hover_color="#388E3C",
@@ -542,6 +692,17 @@ class Pdf2WordApp(ctk.CTk):
         ctk.CTkEntry(pdf_frame, textvariable=self.var_pdf_comp_out, placeholder_text="PDF optimizado...").grid(row=1, column=1, padx=5, pady=12, sticky="ew")
         ctk.CTkButton(pdf_frame, text="Guardar como", width=100, command=self.on_browse_pdf_comp_out).grid(row=1, column=2, padx=15, pady=12)
 
+        preset_frame = ctk.CTkFrame(pdf_frame, fg_color="transparent")
+        preset_frame.grid(row=2, column=0, columnspan=2, padx=15, pady=10, sticky="w")
+        ctk.CTkLabel(preset_frame, text="Imagenes:").pack(side="left", padx=(0, 5))
+        ctk.CTkOptionMenu(
+            preset_frame,
+            variable=self.var_pdf_preset,
+            values=["Sin perdida", "screen", "ebook", "print"],
+            width=120
+        ).pack(side="left", padx=10)
+        ctk.CTkLabel(preset_frame, text="screen 72 DPI | ebook 150 DPI | print 300 DPI", text_color=("gray50", "gray60")).pack(side="left", padx=5)
+
         ctk.CTkButton(pdf_frame, text="Optimizar PDF", width=150, fg_color="#9C27B0", hover_color="#7B1FA2", command=self.on_compress_pdf).grid(row=2, column=2, padx=15, pady=15)
 
         # Compresion DOCX
@@ -617,11 +778,16 @@ class Pdf2WordApp(ctk.CTk):
         ctk.CTkCheckBox(checks_frame, text="Modo Imagen", variable=self.var_batch_raster).pack(side="left", padx=10)
         ctk.CTkCheckBox(checks_frame, text="DOCX → PDF", variable=self.var_batch_docx2pdf).pack(side="left", padx=10)
         ctk.CTkCheckBox(checks_frame, text="Sobrescribir", variable=self.var_batch_overwrite).pack(side="left", padx=10)
+        ctk.CTkCheckBox(checks_frame, text="Reanudar", variable=self.var_batch_resume).pack(side="left", padx=10)
 
         dpi_frame = ctk.CTkFrame(options_frame, fg_color="transparent")
         dpi_frame.pack(fill="x", padx=15, pady=(0, 12))
         ctk.CTkLabel(dpi_frame, text="DPI (modo imagen):").pack(side="left")
         ctk.CTkEntry(dpi_frame, textvariable=self.var_batch_dpi, width=60).pack(side="left", padx=10)
+        ctk.CTkLabel(dpi_frame, text="Archivos a la vez:").pack(side="left", padx=(20, 0))
+        ctk.CTkEntry(dpi_frame, textvariable=self.var_batch_workers, width=60).pack(side="left", padx=10)
+        ctk.CTkLabel(dpi_frame, text="Procesos por archivo:").pack(side="left", padx=(20, 0))
+        ctk.CTkEntry(dpi_frame, textvariable=self.var_batch_page_workers, width=60).pack(side="left", padx=10)
 
         ctk.CTkButton(options_frame, text="Iniciar Conversion", width=220, height=50, fg_color="#4CAF50", hover_color="#388E3C", font=ctk.CTkFont(size=16, weight="bold"), corner_radius=12, command=self.on_run_batch).pack(side="right", padx=15, pady=15)
 
@@ -655,6 +821,47 @@ class Pdf2WordApp(ctk.CTk):
             ctk.set_appearance_mode("dark")
             self.theme_switch.select()
 
+    def _get_cache(self) -> Optional[ConversionCache]:
+        """Devuelve la cache de resultados si esta activada."""
+        if not self.var_use_cache.get():
+            return None
+        if self._cache is None:
+            self._cache = ConversionCache(default_cache_dir())
+        return self._cache
+
+    def _run_cached(self, converter: str, inp: Path, out: Path, params: dict, func: Callable, overwrite: bool = True, modal: Optional["ProgressModal"] = None):
+        """Ejecuta una conversion a traves de la cache de resultados."""
+        on_hit = (lambda: modal.log("Resultado recuperado de la cache", "success")) if modal else None
+        return run_cached(self._get_cache(), converter, inp, out, params, func, overwrite=overwrite, on_hit=on_hit)
+
+    def _submit_job(self, modal: "ProgressModal", name: str, task: Callable, cost: int = 1) -> JobHandle:
+        """Encola task(progress, cancelled) y refleja su progreso y final en el modal.
+
+        task devuelve el mensaje con el que se completa el modal.
+        """
+        def on_progress(current, total, msg):
+            modal.set_progress(current, total, msg)
+            modal.log(msg, "progress")
+
+        def on_done(job: JobHandle):
+            if job.status == "done":
+                modal.complete(True, job.result())
+            elif job.status == "cancelled":
+                modal.complete(False, "Operacion cancelada")
+            else:
+                err = job.exception()
+                modal.log(str(err), "error")
+                modal.complete(False, str(err))
+
+        modal.set_status("En cola...")
+        job = self.jobs.submit(
+            task, name=name, cost=cost, on_progress=on_progress,
+            on_start=lambda _job: modal.set_status("Procesando...")
+        )
+        modal.attach_job(job)
+        job.add_done_callback(on_done)
+        return job
+
     # --- File browsers ---
     def on_browse_pdf(self) -> None:
         path = filedialog.askopenfilename(
@@ -739,26 +946,25 @@ class Pdf2WordApp(ctk.CTk):
         modal.log(f"Archivo: {input_pdf.name}")
         modal.log(f"Salida: {output_docx.name}")
 
-        def task():
-            try:
-                def progress_cb(current, total, msg):
-                    modal.set_progress(current, total, msg)
-                    modal.log(msg, "progress")
-
-                pdf_to_docx_with_progress(
-                    input_pdf, output_docx, start_i, end_i, overwrite,
-                    progress_callback=progress_cb,
-                    cancel_check=modal.is_cancelled
-                )
-                modal.complete(True, f"Archivo creado: {output_docx.name}")
-            except InterruptedError:
-                modal.complete(False, "Operacion cancelada por el usuario")
-            except Exception as e:
-                modal.log(str(e), "error")
-                modal.complete(False, str(e))
-
-        th = threading.Thread(target=task, daemon=True)
-        th.start()
+        def task(progress, cancelled):
+            result = self._run_cached(
+                "pdf2docx", input_pdf, output_docx, {"start": start_i, "end": end_i},
+                lambda: pdf_to_docx_with_progress(
+                    input_pdf, output_docx, start_i, end_i, True,
+                    progress_callback=progress,
+                    cancel_check=cancelled
+                ),
+                overwrite=overwrite, modal=modal
+            )
+            modal.set_timings(result)
+            if result["page_times"]:
+                slowest = max(result["page_times"].items(), key=lambda item: item[1])
+                modal.log(f"Tiempo total: {result['total_time']:.1f}s | Pagina mas lenta: {slowest[0]} ({slowest[1]:.2f}s)")
+            for page_num, err in result["page_errors"]:
+                modal.log(f"Pagina {page_num} omitida: {err}", "warning")
+            return f"Archivo creado: {output_docx.name}"
+
+        self._submit_job(modal, "pdf2docx", task)
 
     def on_convert_pdf2docx_raster(self) -> None:
         in_path = self.var_input.get().strip()
@@ -776,26 +982,20 @@ class Pdf2WordApp(ctk.CTk):
         modal.log(f"Archivo: {input_pdf.name}")
         modal.log(f"DPI: {dpi}")
 
-        def task():
-            try:
-                def progress_cb(current, total, msg):
-                    modal.set_progress(current, total, msg)
-                    modal.log(msg, "progress")
-
-                pdf_to_docx_raster_with_progress(
-                    input_pdf, output_docx, dpi=dpi, overwrite=overwrite,
-                    progress_callback=progress_cb,
-                    cancel_check=modal.is_cancelled
-                )
-                modal.complete(True, f"Archivo creado: {output_docx.name}")
-            except InterruptedError:
-                modal.complete(False, "Operacion cancelada")
-            except Exception as e:
-                modal.log(str(e), "error")
-                modal.complete(False, str(e))
-
-        th = threading.Thread(target=task, daemon=True)
-        th.start()
+        def task(progress, cancelled):
+            result = self._run_cached(
+                "pdf2docx-raster", input_pdf, output_docx, {"dpi": dpi, "streaming": False},
+                lambda: pdf_to_docx_raster_with_progress(
+                    input_pdf, output_docx, dpi=dpi, overwrite=True,
+                    progress_callback=progress,
+                    cancel_check=cancelled
+                ),
+                overwrite=overwrite, modal=modal
+            )
+            modal.set_timings(result)
+            return f"Archivo creado: {output_docx.name}"
+
+        self._submit_job(modal, "pdf2docx-raster", task)
 
     def on_convert_pdf2docx_ocr(self) -> None:
         in_path = self.var_input.get().strip()
@@ -808,31 +1008,27 @@ class Pdf2WordApp(ctk.CTk):
         output_docx = Path(out_path) if out_path else input_pdf.with_suffix(".docx")
         dpi = int(self.var_ocr_dpi.get()) if str(self.var_ocr_dpi.get()).strip() else 300
         lang = self.var_ocr_lang.get().strip() or "spa"
+        workers = int(self.var_ocr_workers.get()) if str(self.var_ocr_workers.get()).strip() else 1
+        workers = max(1, workers)
 
         modal = ProgressModal(self, "Conversion OCR")
         modal.log(f"Archivo: {input_pdf.name}")
-        modal.log(f"Idioma: {lang} | DPI: {dpi}")
-
-        def task():
-            try:
-                def progress_cb(current, total, msg):
-                    modal.set_progress(current, total, msg)
-                    modal.log(msg, "progress")
-
-                ocr_pdf_to_docx_with_progress(
-                    input_pdf, output_docx, dpi=dpi, lang=lang,
-                    progress_callback=progress_cb,
-                    cancel_check=modal.is_cancelled
-                )
-                modal.complete(True, f"Archivo creado: {output_docx.name}")
-            except InterruptedError:
-                modal.complete(False, "Operacion cancelada")
-            except Exception as e:
-                modal.log(str(e), "error")
-                modal.complete(False, str(e))
-
-        th = threading.Thread(target=task, daemon=True)
-        th.start()
+        modal.log(f"Idioma: {lang} | DPI: {dpi} | Procesos: {workers}")
+
+        def task(progress, cancelled):
+            result = self._run_cached(
+                "ocr-pdf2docx", input_pdf, output_docx, {"dpi": dpi, "lang": lang, "streaming": False},
+                lambda: ocr_pdf_to_docx_with_progress(
+                    input_pdf, output_docx, dpi=dpi, lang=lang, workers=workers,
+                    progress_callback=progress,
+                    cancel_check=cancelled
+                ),
+                modal=modal
+            )
+            modal.set_timings(result)
+            return f"Archivo creado: {output_docx.name}"
+
+        self._submit_job(modal, "ocr-pdf2docx", task, cost=workers)
 
     def on_convert_docx2pdf(self) -> None:
         inp = self.var_docx_in.get().strip()
@@ -843,8 +1039,10 @@ class Pdf2WordApp(ctk.CTk):
             return
         input_docx = Path(inp)
         output_pdf = Path(out) if out else input_docx.with_suffix('.pdf')
-        th = threading.Thread(target=self._convert_docx2pdf_task, args=(input_docx, output_pdf, overwrite), daemon=True)
-        th.start()
+        self.jobs.submit(
+            lambda progress, cancelled: self._convert_docx2pdf_task(input_docx, output_pdf, overwrite),
+            name="docx2pdf"
+        )
 
     def _convert_docx2pdf_task(self, input_docx: Path, output_pdf: Path, overwrite: bool) -> None:
         try:
@@ -867,34 +1065,37 @@ class Pdf2WordApp(ctk.CTk):
 
         input_path = Path(inp)
         output_path = Path(out)
+        preset = self.var_pdf_preset.get()
+        preset = preset if preset in ("screen", "ebook", "print") else None
 
         modal = ProgressModal(self, "Optimizando PDF")
         modal.log(f"Archivo: {input_path.name}")
+        modal.log(f"Imagenes: {preset or 'sin perdida'}")
         original_size = input_path.stat().st_size
         modal.log(f"Tamaño original: {self._format_size(original_size)}")
 
-        def task():
-            try:
-                def progress_cb(current, total, msg):
-                    modal.set_progress(current, total, msg)
-                    modal.log(msg, "progress")
-
-                result = compress_pdf_with_progress(
+        def task(progress, cancelled):
+            opts = {"preset": preset, "target_dpi": None, "quality": None, "image_format": "jpeg", "bilevel": None}
+            result = self._run_cached(
+                "compress-pdf", input_path, output_path, opts,
+                lambda: compress_pdf_with_progress(
                     input_path, output_path,
-                    progress_callback=progress_cb,
-                    cancel_check=modal.is_cancelled
-                )
-                modal.log(f"Tamaño final: {self._format_size(result['new_size'])}")
-                modal.log(f"Reduccion: {result['reduction_percent']:.1f}%", "success")
-                modal.complete(True, f"PDF optimizado ({result['reduction_percent']:.1f}% reducido)")
-            except InterruptedError:
-                modal.complete(False, "Operacion cancelada")
-            except Exception as e:
-                modal.log(str(e), "error")
-                modal.complete(False, str(e))
-
-        th = threading.Thread(target=task, daemon=True)
-        th.start()
+                    progress_callback=progress,
+                    cancel_check=cancelled,
+                    **opts
+                ),
+                modal=modal
+            )
+            modal.set_timings(result)
+            if result.get("images_deduplicated"):
+                modal.log(f"Imagenes duplicadas unificadas: {result['images_deduplicated']}")
+            if result.get("images_recompressed"):
+                modal.log(f"Imagenes recomprimidas: {result['images_recompressed']}")
+            modal.log(f"Tamaño final: {self._format_size(result['new_size'])}")
+            modal.log(f"Reduccion: {result['reduction_percent']:.1f}%", "success")
+            return f"PDF optimizado ({result['reduction_percent']:.1f}% reducido)"
+
+        self._submit_job(modal, "compress-pdf", task)
 
     def on_compress_docx(self) -> None:
         inp = self.var_docx_comp_in.get().strip()
@@ -918,30 +1119,28 @@ class Pdf2WordApp(ctk.CTk):
         original_size = input_path.stat().st_size
         modal.log(f"Tamaño original: {self._format_size(original_size)}")
 
-        def task():
-            try:
-                def progress_cb(current, total, msg):
-                    modal.set_progress(current, total, msg)
-                    modal.log(msg, "progress")
+        workers = os.cpu_count() or 1
 
-                result = compress_docx_images_with_progress(
+        def task(progress, cancelled):
+            result = self._run_cached(
+                "compress-docx", input_path, output_path,
+                {"quality": q, "max_width": max_w, "max_height": max_h, "resample": "lanczos"},
+                lambda: compress_docx_images_with_progress(
                     input_path, output_path, quality=q,
                     max_width=max_w, max_height=max_h,
-                    progress_callback=progress_cb,
-                    cancel_check=modal.is_cancelled
-                )
-                modal.log(f"Imagenes procesadas: {result['images_processed']}")
-                modal.log(f"Tamaño final: {self._format_size(result['new_size'])}")
-                modal.log(f"Reduccion: {result['reduction_percent']:.1f}%", "success")
-                modal.complete(True, f"DOCX comprimido ({result['reduction_percent']:.1f}% reducido)")
-            except InterruptedError:
-                modal.complete(False, "Operacion cancelada")
-            except Exception as e:
-                modal.log(str(e), "error")
-                modal.complete(False, str(e))
-
-        th = threading.Thread(target=task, daemon=True)
-        th.start()
+                    workers=workers,
+                    progress_callback=progress,
+                    cancel_check=cancelled
+                ),
+                modal=modal
+            )
+            modal.set_timings(result)
+            modal.log(f"Imagenes procesadas: {result['images_processed']}")
+            modal.log(f"Tamaño final: {self._format_size(result['new_size'])}")
+            modal.log(f"Reduccion: {result['reduction_percent']:.1f}%", "success")
+            return f"DOCX comprimido ({result['reduction_percent']:.1f}% reducido)"
+
+        self._submit_job(modal, "compress-docx", task, cost=workers)
 
     def _format_size(self, size_bytes: int) -> str:
         """Formatea bytes a formato legible."""
@@ -990,7 +1189,12 @@ class Pdf2WordApp(ctk.CTk):
         do_raster = bool(self.var_batch_raster.get())
         do_docx2pdf = bool(self.var_batch_docx2pdf.get())
         dpi = int(self.var_batch_dpi.get()) if str(self.var_batch_dpi.get()).strip() else 200
+        workers = int(self.var_batch_workers.get()) if str(self.var_batch_workers.get()).strip() else 1
+        workers = max(1, workers)
+        page_workers = int(self.var_batch_page_workers.get()) if str(self.var_batch_page_workers.get()).strip() else 1
+        page_workers = max(1, page_workers)
         overwrite = bool(self.var_batch_overwrite.get())
+        resume = bool(self.var_batch_resume.get())
         items = list(self.batch_files)
 
         pdfs = [p for p in items if p.suffix.lower() == ".pdf"]
@@ -1001,79 +1205,67 @@ class Pdf2WordApp(ctk.CTk):
         modal.log(f"PDFs: {len(pdfs)} | DOCXs: {len(docxs)}")
         modal.log(f"Carpeta destino: {outdir}")
 
-        def task():
-            try:
-                total = 0
-                if do_pdf2docx:
-                    total += len(pdfs)
-                if do_docx2pdf:
-                    total += len(docxs)
-
-                if total == 0:
-                    modal.log("No hay archivos para procesar", "warning")
-                    modal.complete(True, "Sin archivos para procesar")
-                    return
+        def task(progress, cancelled):
+            total = 0
+            if do_pdf2docx:
+                total += len(pdfs)
+            if do_docx2pdf:
+                total += len(docxs)
+
+            if total == 0:
+                modal.log("No hay archivos para procesar", "warning")
+                return "Sin archivos para procesar"
+
+            done = 0
+            errors = []
+            cache = self._get_cache()
+
+            def on_result(r):
+                nonlocal done
+                name = r["input"].name
+                if r["status"] == "ok":
+                    suffix = " (cache)" if r["cached"] else ""
+                    modal.log(f"Completado: {name} ({r['elapsed']:.1f}s){suffix}", "success")
+                elif r["status"] == "skipped":
+                    modal.log(f"Omitido (ya existe): {name}", "warning")
+                else:
+                    modal.log(f"Error en {name}: {r['error']}", "error")
+                    errors.append(name)
+                done += 1
+                modal.set_progress(done, total, f"{done}/{total} archivos")
 
-                done = 0
-                errors = []
+            # El manifiesto en la carpeta destino permite reanudar el lote
+            manifest = JobManifest(outdir / ".apppdf-manifest.jsonl")
+            if resume:
+                modal.log("Reanudando: se omiten los archivos ya completados")
 
+            try:
                 if do_pdf2docx:
                     mode = "imagen" if do_raster else "editable"
-                    modal.log(f"Convirtiendo PDFs a DOCX (modo {mode})...")
-
-                    for p in pdfs:
-                        if modal.is_cancelled():
-                            raise InterruptedError("Cancelado")
-
-                        tgt = outdir / (p.stem + ".docx")
-                        modal.log(f"Procesando: {p.name}", "progress")
-
-                        try:
-                            if do_raster:
-                                pdf_to_docx_raster(p, tgt, dpi=dpi, overwrite=overwrite)
-                            else:
-                                pdf_to_docx(p, tgt, None, None, overwrite)
-                            modal.log(f"Completado: {p.name}", "success")
-                        except Exception as e:
-                            modal.log(f"Error en {p.name}: {e}", "error")
-                            errors.append(p.name)
-
-                        done += 1
-                        modal.set_progress(done, total, f"{done}/{total} archivos")
+                    per_file = f", {page_workers} por archivo" if do_raster and page_workers > 1 else ""
+                    modal.log(f"Convirtiendo PDFs a DOCX (modo {mode}, {workers} a la vez{per_file})...")
+                    batch_pdf_to_docx(
+                        pdfs, outdir, mode="raster" if do_raster else "editable",
+                        overwrite=overwrite, dpi=dpi, workers=workers, page_workers=page_workers, cache=cache,
+                        cancel_check=cancelled, on_result=on_result,
+                        manifest=manifest, resume=resume
+                    )
 
                 if do_docx2pdf:
                     modal.log("Convirtiendo DOCXs a PDF...")
+                    batch_docx_to_pdf(
+                        docxs, outdir, overwrite=overwrite,
+                        cancel_check=cancelled, on_result=on_result,
+                        manifest=manifest, resume=resume
+                    )
+            finally:
+                manifest.close()
 
-                    for d in docxs:
-                        if modal.is_cancelled():
-                            raise InterruptedError("Cancelado")
-
-                        tgt = outdir / (d.stem + ".pdf")
-                        modal.log(f"Procesando: {d.name}", "progress")
-
-                        try:
-                            docx_to_pdf(d, tgt, overwrite)
-                            modal.log(f"Completado: {d.name}", "success")
-                        except Exception as e:
-                            modal.log(f"Error en {d.name}: {e}", "error")
-                            errors.append(d.name)
+            if errors:
+                return f"Completado con {len(errors)} errores"
+            return f"Lote completado: {done} archivos"
 
-                        done += 1
-                        modal.set_progress(done, total, f"{done}/{total} archivos")
-
-                if errors:
-                    modal.complete(True, f"Completado con {len(errors)} errores")
-                else:
-                    modal.complete(True, f"Lote completado: {done} archivos")
-
-            except InterruptedError:
-                modal.complete(False, "Operacion cancelada")
-            except Exception as e:
-                modal.log(str(e), "error")
-                modal.complete(False, str(e))
-
-        th = threading.Thread(target=task, daemon=True)
-        th.start()
+        self._submit_job(modal, "batch", task, cost=workers * (page_workers if do_raster else 1))
 
     def _update_progress(self, current: int, total: int) -> None:
         if total > 0:
@@ -1159,18 +1351,19 @@ class Pdf2WordApp(ctk.CTk):
                 return
 
         maintain_aspect = bool(self.var_img_maintain_aspect.get())
+        resample = self.var_img_resample.get().lower()
 
-        th = threading.Thread(
-            target=self._convert_image_task,
-            args=(Path(inp), Path(out), fmt, quality, resize, maintain_aspect, overwrite),
-            daemon=True
+        self.jobs.submit(
+            lambda progress, cancelled: self._convert_image_task(
+                Path(inp), Path(out), fmt, quality, resize, maintain_aspect, overwrite, resample
+            ),
+            name="convert-image"
         )
-        th.start()
 
-    def _convert_image_task(self, inp: Path, out: Path, fmt: str, quality: int, resize, maintain_aspect: bool, overwrite: bool) -> None:
+    def _convert_image_task(self, inp: Path, out: Path, fmt: str, quality: int, resize, maintain_aspect: bool, overwrite: bool, resample: str = "lanczos") -> None:
         try:
             self._set_status("Convirtiendo imagen...", indeterminate=True)
-            convert_image(inp, out, fmt, quality, resize, maintain_aspect, overwrite)
+            convert_image(inp, out, fmt, quality, resize, maintain_aspect, overwrite, resample)
         except Exception as e:
             self._set_status("Error al convertir imagen")
             self.after(0, lambda: messagebox.showerror("Error", str(e)))
@@ -1231,49 +1424,43 @@ class Pdf2WordApp(ctk.CTk):
                 pass
 
         maintain_aspect = bool(self.var_img_maintain_aspect.get())
+        resample = self.var_img_resample.get().lower()
+        workers = int(self.var_img_workers.get()) if str(self.var_img_workers.get()).strip() else 1
+        workers = max(1, workers)
+
+        outputs = [{
+            "format": fmt, "quality": quality, "resize": resize,
+            "maintain_aspect": maintain_aspect, "resample": resample,
+        }]
+        if self.var_img_thumb.get():
+            size = int(self.var_img_thumb_size.get()) if str(self.var_img_thumb_size.get()).strip() else 256
+            outputs.append({
+                "format": "jpeg", "quality": 85, "resize": (size, size),
+                "resample": resample, "suffix": "_thumb",
+            })
+        if self.var_img_ico.get() and fmt != "ico":
+            outputs.append({"format": "ico"})
 
         modal = ProgressModal(self, "Convirtiendo Imagenes")
         modal.log(f"Imagenes: {len(files)}")
         modal.log(f"Formato destino: {fmt.upper()}")
         modal.log(f"Calidad: {quality}%")
+        if len(outputs) > 1:
+            modal.log(f"Salidas por imagen: {', '.join(o['format'].upper() + o.get('suffix', '') for o in outputs)}")
 
-        def task():
-            try:
-                total = len(files)
-                done = 0
-                errors = []
-
-                for f in files:
-                    if modal.is_cancelled():
-                        raise InterruptedError("Cancelado")
-
-                    ext = fmt if fmt != "jpeg" else "jpg"
-                    target = outdir / (f.stem + "." + ext)
-                    modal.log(f"Convirtiendo: {f.name}", "progress")
-
-                    try:
-                        convert_image(f, target, fmt, quality, resize, maintain_aspect, overwrite)
-                        modal.log(f"Completado: {f.name} -> {target.name}", "success")
-                    except Exception as e:
-                        modal.log(f"Error en {f.name}: {e}", "error")
-                        errors.append(f.name)
-
-                    done += 1
-                    modal.set_progress(done, total, f"{done}/{total} imagenes")
-
-                if errors:
-                    modal.complete(True, f"Completado con {len(errors)} errores")
-                else:
-                    modal.complete(True, f"Convertidas {done} imagenes")
+        def task(progress, cancelled):
+            result = batch_convert_images(
+                files, outdir, outputs=outputs, overwrite=overwrite, workers=workers,
+                progress_callback=progress, cancel_check=cancelled
+            )
+            for name, err in result["errors"]:
+                modal.log(f"Error en {name}: {err}", "error")
 
-            except InterruptedError:
-                modal.complete(False, "Operacion cancelada")
-            except Exception as e:
-                modal.log(str(e), "error")
-                modal.complete(False, str(e))
+            if result["errors"]:
+                return f"Completado con {len(result['errors'])} errores"
+            return f"Convertidas {result['converted']} imagenes ({result['outputs']} archivos)"
 
-        th = threading.Thread(target=task, daemon=True)
-        th.start()
+        self._submit_job(modal, "convert-images", task, cost=workers)
 
     # --- Extract images handlers ---
     def on_browse_extract_input(self) -> None:
@@ -1307,32 +1494,42 @@ class Pdf2WordApp(ctk.CTk):
             return
 
         fmt = self.var_extract_format.get().lower()
-        th = threading.Thread(
-            target=self._extract_images_task,
-            args=(Path(inp), Path(outdir), fmt),
-            daemon=True
-        )
-        th.start()
+        inp, outdir = Path(inp), Path(outdir)
+        workers = int(self.var_img_workers.get()) if str(self.var_img_workers.get()).strip() else 1
+        workers = max(1, workers)
 
-    def _extract_images_task(self, inp: Path, outdir: Path, fmt: str) -> None:
-        try:
-            self._set_status("Extrayendo imagenes...", indeterminate=True)
+        modal = ProgressModal(self, "Extrayendo Imagenes")
+        modal.log(f"Archivo: {inp.name}")
+        modal.log(f"Carpeta: {outdir}")
+
+        def task(progress, cancelled):
             ext = inp.suffix.lower()
             if ext == ".pdf":
-                extracted = extract_images_from_pdf(inp, outdir, fmt)
+                result = extract_images_from_pdf_with_progress(
+                    inp, outdir, fmt, progress_callback=progress,
+                    cancel_check=cancelled, workers=workers
+                )
+                for xref, err in result["errors"]:
+                    modal.log(f"Error en imagen {xref}: {err}", "error")
+                modal.log(
+                    f"Sin recodificar: {result['native']} | Recodificadas: {result['transcoded']}"
+                    f" | Repetidas omitidas: {result['duplicates']}"
+                )
+                extracted = result["extracted"]
             elif ext == ".docx":
-                extracted = extract_images_from_docx(inp, outdir)
+                result = extract_images_from_docx_with_progress(
+                    inp, outdir, progress_callback=progress, cancel_check=cancelled
+                )
+                modal.log(f"Repetidas omitidas: {result['duplicates']}")
+                extracted = result["extracted"]
             else:
                 raise ValueError(f"Formato no soportado: {ext}")
-        except Exception as e:
-            self._set_status("Error al extraer")
-            self.after(0, lambda: messagebox.showerror("Error", str(e)))
-            return
+            return f"Extraidas {len(extracted)} imagenes en {outdir}"
 
-        self._set_status("Extraccion completada")
-        self.after(0, lambda: messagebox.showinfo("Listo", f"Extraidas {len(extracted)} imagenes en:\n{outdir}"))
+        self._submit_job(modal, "extract-images", task, cost=workers)
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     app = Pdf2WordApp()
     app.mainloop()
@@ -0,0 +1,272 @@
+"""
+Métricas de las conversiones en formato de exposición de Prometheus.
+
+tools registra cada conversión una sola vez al terminarla (nunca dentro de
+los bucles por página): duración por conversor y DPI, páginas y bytes
+procesados y errores por tipo de excepción. El servidor HTTP las publica en
+``GET /metrics`` y ``Registry.write`` las vuelca a un archivo de texto (para
+el textfile collector de node_exporter, por ejemplo).
+
+Cada proceso tiene su propio registro. Los trabajos que corren en un pool
+devuelven lo que registraron (``Registry.snapshot`` / ``delta``) y el
+proceso principal lo suma con ``Registry.merge``: así lo hacen los pools de
+tools (run_batch y _map_bounded, usado por batch_convert_images y las
+extracciones de imágenes), el servidor y la carpeta vigilada. Lo que
+registra un proceso que muere o se aborta por tiempo límite se pierde.
+"""
+import os
+import threading
+from pathlib import Path
+from typing import Optional, Any
+
+# Límites de los histogramas de duración (segundos)
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    """Base común: nombre, ayuda, etiquetas y series por valores de etiqueta."""
+
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._series: dict[tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: tuple) -> tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} espera las etiquetas {self.labelnames}")
+        return tuple("" if v is None else str(v) for v in labels)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Contador que solo crece."""
+
+    kind = "counter"
+
+    def inc(self, *labels: Any, amount: float = 1.0) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0.0) + amount
+
+    def value(self, *labels: Any) -> float:
+        return self._series.get(self._key(labels), 0.0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            series = sorted(self._series.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in series
+        ]
+
+    def _snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._series)
+
+    def _delta(self, before: dict) -> dict:
+        now = self._snapshot()
+        return {k: v - before.get(k, 0.0) for k, v in now.items() if v != before.get(k, 0.0)}
+
+    def _merge(self, delta: dict) -> None:
+        with self._lock:
+            for key, value in delta.items():
+                self._series[key] = self._series.get(key, 0.0) + value
+
+
+class Gauge(Counter):
+    """Valor que sube y baja (se fija con set)."""
+
+    kind = "gauge"
+
+    def set(self, value: float, *labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = value
+
+
+class Histogram(_Metric):
+    """Histograma acumulado con límites fijos."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # [cuentas por límite (no acumuladas) + la de +Inf, suma, total]
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            index = len(self.buckets)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    index = i
+                    break
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        with self._lock:
+            series = sorted((k, [list(v[0]), v[1], v[2]]) for k, v in self._series.items())
+        lines = self.header()
+        for key, (counts, total, count) in series:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+    def _snapshot(self) -> dict:
+        with self._lock:
+            return {k: (tuple(v[0]), v[1], v[2]) for k, v in self._series.items()}
+
+    def _delta(self, before: dict) -> dict:
+        delta = {}
+        for key, (counts, total, count) in self._snapshot().items():
+            old_counts, old_total, old_count = before.get(key, ((0,) * len(counts), 0.0, 0))
+            if count != old_count:
+                delta[key] = (
+                    tuple(a - b for a, b in zip(counts, old_counts)), total - old_total, count - old_count
+                )
+        return delta
+
+    def _merge(self, delta: dict) -> None:
+        with self._lock:
+            for key, (counts, total, count) in delta.items():
+                series = self._series.setdefault(key, [[0] * (len(self.buckets) + 1), 0.0, 0])
+                series[0] = [a + b for a, b in zip(series[0], counts)]
+                series[1] += total
+                series[2] += count
+
+
+class Registry:
+    """Conjunto de métricas de un proceso."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def _add(self, metric: _Metric) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"Métrica duplicada: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._add(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        return self._add(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: tuple[str, ...] = (),
+                  buckets: tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self) -> str:
+        """Texto en formato de exposición de Prometheus (versión 0.0.4)."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Path) -> None:
+        """Vuelca render() a path de forma atómica."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(self.render(), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def snapshot(self) -> dict:
+        """Estado actual de contadores e histogramas (para calcular un delta)."""
+        return {
+            name: metric._snapshot() for name, metric in self._metrics.items()
+            if not isinstance(metric, Gauge)
+        }
+
+    def delta(self, before: dict) -> dict:
+        """Lo registrado desde snapshot before; es picklable y se suma con merge."""
+        delta = {}
+        for name, metric in self._metrics.items():
+            if isinstance(metric, Gauge):
+                continue
+            changed = metric._delta(before.get(name, {}))
+            if changed:
+                delta[name] = changed
+        return delta
+
+    def merge(self, delta: Optional[dict]) -> None:
+        """Suma el delta de otro proceso a este registro."""
+        for name, changed in (delta or {}).items():
+            metric = self._metrics.get(name)
+            if metric is not None:
+                metric._merge(changed)
+
+
+REGISTRY = Registry()
+
+CONVERSIONS = REGISTRY.counter(
+    "apppdf_conversions_total", "Conversiones terminadas por conversor y estado (ok, error, cancelled)",
+    ("converter", "status")
+)
+CONVERSION_SECONDS = REGISTRY.histogram(
+    "apppdf_conversion_seconds", "Duración de cada conversión en segundos", ("converter", "dpi")
+)
+PAGES = REGISTRY.counter("apppdf_pages_total", "Páginas procesadas", ("converter",))
+BYTES = REGISTRY.counter(
+    "apppdf_bytes_total", "Bytes leídos (direction=in) y escritos (direction=out)", ("converter", "direction")
+)
+ERRORS = REGISTRY.counter("apppdf_errors_total", "Errores por conversor y tipo de excepción", ("converter", "type"))
+CACHE_HITS = REGISTRY.counter("apppdf_cache_hits_total", "Conversiones servidas desde la caché", ("converter",))
+
+
+def record_conversion(
+    converter: str,
+    seconds: float,
+    status: str = "ok",
+    pages: int = 0,
+    bytes_in: int = 0,
+    bytes_out: int = 0,
+    dpi: Optional[int] = None,
+    error: Optional[BaseException] = None
+) -> None:
+    """Registra una conversión terminada en REGISTRY."""
+    CONVERSIONS.inc(converter, status)
+    CONVERSION_SECONDS.observe(seconds, converter, dpi)
+    if pages:
+        PAGES.inc(converter, amount=pages)
+    if bytes_in:
+        BYTES.inc(converter, "in", amount=bytes_in)
+    if bytes_out:
+        BYTES.inc(converter, "out", amount=bytes_out)
+    if error is not None:
+        ERRORS.inc(converter, type(error).__name__)
@@ -0,0 +1,581 @@
+"""
+Servicio HTTP local para las conversiones de tools (solo biblioteca estándar).
+
+- Cada endpoint recibe el archivo como cuerpo de un POST (Content-Length o
+  chunked) y lo vuelca a disco por bloques, sin cargarlo entero en memoria.
+  Los parámetros van en la query string::
+
+      curl --data-binary @doc.pdf "http://127.0.0.1:8765/raster?dpi=150" -o doc.docx
+      curl --data-binary @foto.png "http://127.0.0.1:8765/images/convert?format=webp&quality=80" -o foto.webp
+
+- Las conversiones corren en un pool de procesos acotado. Por defecto la
+  respuesta es el archivo convertido; con ``?async=1`` (o la cabecera
+  ``Prefer: respond-async``) se responde 202 con un id de trabajo que se
+  consulta en ``GET /jobs/<id>`` y se descarga en ``GET /jobs/<id>/result``.
+- ``GET /metrics`` publica las métricas de las conversiones en formato de
+  exposición de Prometheus (ver metrics).
+- Escucha en 127.0.0.1 por defecto: no hay autenticación.
+"""
+import asyncio
+import json
+import mimetypes
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Optional, Callable, Any
+from urllib.parse import urlsplit, parse_qs, quote
+
+import metrics
+from tools import (
+    BATCH_CONVERTERS,
+    BATCH_CONVERTER_PARAMS,
+    SUPPORTED_IMAGE_FORMATS,
+    ConversionCache,
+    batch_convert_file,
+)
+
+
+# Ruta -> conversor de batch_convert_file. docx2pdf no se expone: depende de
+# Word y no admite varias conversiones a la vez.
+SERVER_ENDPOINTS = {
+    "/pdf2docx": "pdf2docx",
+    "/raster": "pdf2docx-raster",
+    "/ocr": "ocr-pdf2docx",
+    "/compress-pdf": "compress-pdf",
+    "/compress-docx": "compress-docx",
+    "/images/convert": "convert-image",
+}
+
+_INT_PARAMS = {"start", "end", "dpi", "target_dpi", "quality", "max_width", "max_height"}
+_BOOL_PARAMS = {"streaming", "bilevel"}
+# Parámetros de la query que no son del conversor
+_CONTROL_PARAMS = {"async", "filename"}
+
+_METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+_JOB_STATUSES = ("receiving", "pending", "done", "error", "cancelled")
+SERVER_JOBS = metrics.REGISTRY.gauge("apppdf_server_jobs", "Trabajos conservados por el servidor por estado", ("status",))
+
+_DEFAULT_INPUT_EXTS = {"pdf": ".pdf", "docx": ".docx"}
+_CONTENT_TYPES = {
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".pdf": "application/pdf",
+}
+
+_STATUS_TEXT = {
+    200: "OK", 202: "Accepted", 204: "No Content", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 409: "Conflict", 411: "Length Required", 413: "Payload Too Large",
+    422: "Unprocessable Entity", 431: "Request Header Fields Too Large",
+    500: "Internal Server Error", 503: "Service Unavailable",
+}
+
+_CHUNK = 256 * 1024
+
+ServerEventCallback = Callable[[str, dict], None]
+
+
+def _header_result(result: Any) -> Any:
+    """Resultado para la cabecera X-Conversion-Result, sin los tiempos por página.
+
+    Con documentos largos la lista de páginas no cabe en una cabecera; sigue
+    disponible completa en GET /jobs/<id>.
+    """
+    if isinstance(result, dict) and isinstance(result.get("timings"), dict):
+        timings = {k: v for k, v in result["timings"].items() if k != "pages"}
+        return dict(result, timings=timings)
+    return result
+
+
+def _content_disposition(name: str) -> str:
+    """Cabecera Content-Disposition de descarga para name.
+
+    filename lleva una versión ASCII sin comillas ni barras; filename*
+    (RFC 5987) el nombre completo en UTF-8 con escape %.
+    """
+    fallback = "".join(c if " " <= c < "\x7f" and c not in '"\\' else "_" for c in name)
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(name, safe='')}"
+
+
+class HTTPError(Exception):
+    """Error que se devuelve al cliente como JSON con el código indicado."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _init_server_worker() -> None:
+    """Los procesos del pool ignoran Ctrl+C: el servidor decide cuándo parar."""
+    import signal
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def parse_params(converter: str, query: dict[str, list[str]]) -> dict:
+    """Convierte la query string en los parámetros del conversor.
+
+    Solo se aceptan los parámetros de BATCH_CONVERTER_PARAMS; el resto
+    (salvo async y filename) es un error 400.
+    """
+    defaults = BATCH_CONVERTER_PARAMS[converter]
+    unknown = set(query) - set(defaults) - _CONTROL_PARAMS
+    if unknown:
+        raise HTTPError(400, f"Parámetros no válidos para {converter}: {', '.join(sorted(unknown))}")
+
+    params = dict(defaults)
+    for name in defaults:
+        if name not in query:
+            continue
+        value = query[name][-1]
+        try:
+            if name in _INT_PARAMS:
+                params[name] = int(value)
+            elif name in _BOOL_PARAMS:
+                params[name] = value.lower() in ("1", "true", "yes", "si", "sí")
+            elif name == "resize":
+                width, height = value.lower().split("x")
+                params[name] = [int(width), int(height)]
+            else:
+                params[name] = value
+        except ValueError:
+            raise HTTPError(400, f"Valor no válido para {name}: {value!r}")
+
+    if converter == "convert-image":
+        params["format"] = params["format"].lower()
+        if params["format"] not in SUPPORTED_IMAGE_FORMATS:
+            raise HTTPError(400, f"Formato no soportado: {params['format']}")
+    return params
+
+
+class _Job:
+    """Estado de una conversión recibida por HTTP."""
+
+    def __init__(self, converter: str, params: dict, filename: str, work_dir: Path):
+        self.id = uuid.uuid4().hex
+        self.converter = converter
+        self.params = params
+        self.work_dir = work_dir / self.id
+        self.input_path = self.work_dir / "in" / filename
+        out_ext = BATCH_CONVERTERS[converter][1] or f".{params['format']}"
+        self.output_path = self.work_dir / "out" / f"{Path(filename).stem}{out_ext}"
+        self.status = "receiving"
+        self.result: Any = None
+        self.cached = False
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self.future: Optional[Future] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "converter": self.converter,
+            "params": self.params,
+            "status": self.status,
+            "result": self.result,
+            "cached": self.cached,
+            "error": self.error,
+            "elapsed": (self.finished or time.time()) - self.created,
+            "result_url": f"/jobs/{self.id}/result" if self.status == "done" else None,
+        }
+
+    def discard(self) -> None:
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+class ConversionServer:
+    """Servidor HTTP asyncio que reparte conversiones en un pool de procesos.
+
+    Como mucho ``max_jobs`` trabajos pueden estar pendientes (recibiéndose o
+    convirtiéndose); por encima se responde 503. Los trabajos terminados se
+    borran de disco pasados ``job_ttl`` segundos.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        workers: int = 2,
+        max_jobs: int = 32,
+        max_upload_mb: int = 512,
+        job_ttl: float = 3600.0,
+        work_dir: Optional[Path] = None,
+        cache: Optional[ConversionCache] = None,
+        on_event: Optional[ServerEventCallback] = None
+    ):
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        self.max_jobs = max(1, max_jobs)
+        self.max_upload = max_upload_mb * 1024 * 1024
+        self.job_ttl = job_ttl
+        self.cache = cache
+        self.on_event = on_event
+        self._own_work_dir = work_dir is None
+        self.work_dir = work_dir or Path(tempfile.mkdtemp(prefix="apppdf-server-"))
+        self._jobs: dict[str, _Job] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _emit(self, kind: str, info: dict) -> None:
+        if self.on_event:
+            self.on_event(kind, info)
+
+    def _pending(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.status in ("receiving", "pending"))
+
+    def stop(self) -> None:
+        """Pide la parada del servidor (se puede llamar desde otro hilo)."""
+        if self._loop and self._stopping:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+
+    # --- Ciclo de vida -----------------------------------------------------
+
+    async def serve(self) -> None:
+        """Atiende peticiones hasta que se llama a stop()."""
+        self._loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_server_worker)
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]
+        cleaner = asyncio.create_task(self._cleanup_loop())
+        self._emit("started", {"host": self.host, "port": self.port, "workers": self.workers})
+        try:
+            async with server:
+                await self._stopping.wait()
+        finally:
+            cleaner.cancel()
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            if self._own_work_dir:
+                shutil.rmtree(self.work_dir, ignore_errors=True)
+            self._emit("stopped", {"jobs": len(self._jobs)})
+
+    async def _cleanup_loop(self) -> None:
+        """Borra de disco los trabajos terminados hace más de job_ttl."""
+        while True:
+            await asyncio.sleep(min(60.0, max(1.0, self.job_ttl / 2)))
+            limit = time.time() - self.job_ttl
+            for job in list(self._jobs.values()):
+                if job.finished is not None and job.finished < limit:
+                    del self._jobs[job.id]
+                    job.discard()
+
+    # --- HTTP --------------------------------------------------------------
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            try:
+                request = await self._read_head(reader)
+                await self._dispatch(reader, writer, *request)
+            except HTTPError as e:
+                await self._send_json(writer, e.status, {"error": str(e)})
+            except asyncio.IncompleteReadError:
+                pass
+            except Exception as e:
+                await self._send_json(writer, 500, {"error": str(e)})
+        except ConnectionError:
+            # El cliente cerró la conexión
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_head(reader: asyncio.StreamReader) -> tuple[str, str, dict, dict]:
+        """Lee la línea de petición y las cabeceras."""
+        try:
+            raw = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.LimitOverrunError:
+            raise HTTPError(431, "Cabeceras demasiado grandes")
+        lines = raw.decode("latin-1").split("\r\n")
+        try:
+            method, target, _version = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "Línea de petición no válida")
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        url = urlsplit(target)
+        return method.upper(), url.path.rstrip("/") or "/", parse_qs(url.query, keep_blank_values=True), headers
+
+    async def _dispatch(self, reader, writer, method: str, path: str, query: dict, headers: dict) -> None:
+        if path == "/health":
+            if method != "GET":
+                raise HTTPError(405, "Método no permitido")
+            await self._send_json(writer, 200, {
+                "status": "ok", "workers": self.workers, "pending": self._pending(), "jobs": len(self._jobs),
+                "endpoints": sorted(SERVER_ENDPOINTS),
+            })
+        elif path == "/metrics":
+            if method != "GET":
+                raise HTTPError(405, "Método no permitido")
+            await self._send_metrics(writer)
+        elif path in SERVER_ENDPOINTS:
+            if method != "POST":
+                raise HTTPError(405, "Método no permitido")
+            await self._convert(reader, writer, SERVER_ENDPOINTS[path], query, headers)
+        elif path.startswith("/jobs/"):
+            parts = path.split("/")[2:]
+            job = self._jobs.get(parts[0])
+            if job is None or len(parts) > 2 or (len(parts) == 2 and parts[1] != "result"):
+                raise HTTPError(404, "Trabajo no encontrado")
+            if len(parts) == 2:
+                if method != "GET":
+                    raise HTTPError(405, "Método no permitido")
+                await self._send_result(writer, job)
+            elif method == "GET":
+                await self._send_json(writer, 200, job.to_dict())
+            elif method == "DELETE":
+                await self._delete_job(writer, job)
+            else:
+                raise HTTPError(405, "Método no permitido")
+        else:
+            raise HTTPError(404, "Ruta no encontrada")
+
+    async def _convert(self, reader, writer, converter: str, query: dict, headers: dict) -> None:
+        """Recibe el archivo, encola la conversión y responde."""
+        params = parse_params(converter, query)
+        if self._pending() >= self.max_jobs:
+            raise HTTPError(503, "Demasiados trabajos en curso, reintenta más tarde")
+        length = headers.get("content-length")
+        chunked = "chunked" in headers.get("transfer-encoding", "").lower()
+        if length is None and not chunked:
+            raise HTTPError(411, "Falta Content-Length")
+        if length is not None and not chunked:
+            try:
+                length = int(length)
+            except ValueError:
+                raise HTTPError(400, "Content-Length no válido")
+            if length > self.max_upload:
+                raise HTTPError(413, f"El archivo supera {self.max_upload // (1024 * 1024)} MB")
+
+        job = _Job(converter, params, self._upload_name(converter, query, headers), self.work_dir)
+        self._jobs[job.id] = job
+        try:
+            if headers.get("expect", "").lower() == "100-continue":
+                writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+                await writer.drain()
+            job.input_path.parent.mkdir(parents=True)
+            job.output_path.parent.mkdir(parents=True)
+            if chunked:
+                size = await self._receive_chunked(reader, job.input_path)
+            else:
+                size = await self._receive(reader, job.input_path, length)
+        except BaseException:
+            del self._jobs[job.id]
+            job.discard()
+            raise
+
+        job.status = "pending"
+        job.task = asyncio.create_task(self._run_job(job))
+        self._emit("queued", {"id": job.id, "converter": converter, "bytes": size})
+
+        wants_async = query.get("async", ["0"])[-1] not in ("0", "false", "") or \
+            "respond-async" in headers.get("prefer", "")
+        if wants_async:
+            await self._send_json(writer, 202, job.to_dict(), {"Location": f"/jobs/{job.id}"})
+            return
+        await asyncio.shield(job.task)
+        await self._send_result(writer, job)
+
+    @staticmethod
+    def _upload_name(converter: str, query: dict, headers: dict) -> str:
+        """Nombre del archivo subido: ?filename=, Content-Disposition o uno por defecto."""
+        name = query.get("filename", [""])[-1]
+        disposition = headers.get("content-disposition", "")
+        if not name and "filename=" in disposition:
+            name = disposition.split("filename=", 1)[1].split(";")[0].strip().strip('"')
+        # Nunca usar rutas del cliente; sin caracteres de control ni comillas,
+        # que acaban en la cabecera Content-Disposition de la respuesta
+        name = Path(name.replace("\\", "/")).name
+        name = "".join(c for c in name if c.isprintable() and c != '"')
+        kind = BATCH_CONVERTERS[converter][0]
+        if kind in _DEFAULT_INPUT_EXTS:
+            ext = _DEFAULT_INPUT_EXTS[kind]
+            if not name.lower().endswith(ext):
+                name = f"{Path(name).stem or 'documento'}{ext}"
+        elif not Path(name).suffix:
+            guessed = mimetypes.guess_extension(headers.get("content-type", "").split(";")[0].strip())
+            name = f"{Path(name).stem or 'imagen'}{guessed or '.bin'}"
+        return name
+
+    async def _receive(self, reader: asyncio.StreamReader, path: Path, length: int) -> int:
+        """Vuelca a disco un cuerpo con Content-Length."""
+        remaining = length
+        with open(path, "wb") as f:
+            while remaining:
+                data = await reader.read(min(_CHUNK, remaining))
+                if not data:
+                    raise asyncio.IncompleteReadError(b"", remaining)
+                f.write(data)
+                remaining -= len(data)
+        return length
+
+    async def _receive_chunked(self, reader: asyncio.StreamReader, path: Path) -> int:
+        """Vuelca a disco un cuerpo con Transfer-Encoding: chunked."""
+        total = 0
+        with open(path, "wb") as f:
+            while True:
+                line = await reader.readuntil(b"\r\n")
+                try:
+                    size = int(line.split(b";", 1)[0].strip(), 16)
+                except ValueError:
+                    raise HTTPError(400, "Bloque chunked no válido")
+                if size == 0:
+                    # Cabeceras finales (trailers) hasta la línea vacía
+                    while await reader.readuntil(b"\r\n") != b"\r\n":
+                        pass
+                    return total
+                total += size
+                if total > self.max_upload:
+                    raise HTTPError(413, f"El archivo supera {self.max_upload // (1024 * 1024)} MB")
+                while size:
+                    data = await reader.read(min(_CHUNK, size))
+                    if not data:
+                        raise asyncio.IncompleteReadError(b"", size)
+                    f.write(data)
+                    size -= len(data)
+                await reader.readexactly(2)
+
+    async def _run_job(self, job: _Job) -> None:
+        """Ejecuta la conversión en el pool y guarda su resultado."""
+        pool = self._pool
+        try:
+            job.future = pool.submit(
+                batch_convert_file, job.converter, job.input_path, job.output_path,
+                job.params, True, self.cache
+            )
+            outcome = await asyncio.wrap_future(job.future)
+            job.result = outcome["result"]
+            job.cached = outcome["cached"]
+            job.status = "done"
+            metrics.REGISTRY.merge(outcome.get("metrics"))
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            metrics.CONVERSIONS.inc(job.converter, "cancelled")
+        except BrokenProcessPool as e:
+            # Un proceso murió (memoria, fallo nativo): se rehace el pool
+            job.status, job.error = "error", f"El proceso de conversión terminó inesperadamente: {e}"
+            metrics.record_conversion(
+                job.converter, time.time() - job.created, "error", dpi=job.params.get("dpi"), error=e
+            )
+            if self._pool is pool:
+                pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_server_worker)
+        except Exception as e:
+            job.status, job.error = "error", str(e)
+            # Lo que registró el proceso hijo se perdió con la excepción
+            metrics.record_conversion(
+                job.converter, time.time() - job.created, "error", dpi=job.params.get("dpi"), error=e
+            )
+        finally:
+            job.finished = time.time()
+            try:
+                job.input_path.unlink()
+            except OSError:
+                pass
+        if job.status == "done":
+            self._emit("done", {"id": job.id, "converter": job.converter, "elapsed": job.finished - job.created,
+                                "cached": job.cached})
+        elif job.status == "error":
+            self._emit("error", {"id": job.id, "converter": job.converter, "error": job.error})
+
+    async def _send_result(self, writer: asyncio.StreamWriter, job: _Job) -> None:
+        if job.status in ("receiving", "pending"):
+            raise HTTPError(409, "El trabajo no ha terminado")
+        if job.status != "done":
+            raise HTTPError(422, job.error or "Trabajo cancelado")
+        ext = job.output_path.suffix.lower()
+        content_type = _CONTENT_TYPES.get(ext) or mimetypes.guess_type(job.output_path.name)[0] \
+            or "application/octet-stream"
+        await self._send_file(writer, job.output_path, content_type, {
+            "Content-Disposition": _content_disposition(job.output_path.name),
+            "X-Job-Id": job.id,
+            "X-Conversion-Result": json.dumps(_header_result(job.result), default=str),
+        })
+
+    async def _delete_job(self, writer: asyncio.StreamWriter, job: _Job) -> None:
+        """Cancela un trabajo que aún no empezó o borra uno terminado."""
+        if job.status == "receiving":
+            raise HTTPError(409, "El archivo aún se está recibiendo")
+        if job.status == "pending":
+            if job.future is None:
+                job.task.cancel()
+            elif not job.future.cancel():
+                raise HTTPError(409, "El trabajo ya se está convirtiendo")
+        if job.task is not None:
+            await asyncio.gather(job.task, return_exceptions=True)
+        self._jobs.pop(job.id, None)
+        job.discard()
+        await self._send_response(writer, 204, {}, b"")
+
+    # --- Respuestas --------------------------------------------------------
+
+    @staticmethod
+    def _head(status: int, content_type: Optional[str], length: int, extra: Optional[dict]) -> bytes:
+        lines = [f"HTTP/1.1 {status} {_STATUS_TEXT.get(status, '')}"]
+        if content_type:
+            lines.append(f"Content-Type: {content_type}")
+        lines.append(f"Content-Length: {length}")
+        lines.append("Connection: close")
+        for name, value in (extra or {}).items():
+            lines.append(f"{name}: {value}")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1", "replace")
+
+    async def _send_response(self, writer, status: int, extra: dict, body: bytes,
+                             content_type: Optional[str] = None) -> None:
+        writer.write(self._head(status, content_type, len(body), extra) + body)
+        await writer.drain()
+
+    async def _send_json(self, writer, status: int, payload: Any, extra: Optional[dict] = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        await self._send_response(writer, status, extra or {}, body, "application/json; charset=utf-8")
+
+    async def _send_metrics(self, writer) -> None:
+        counts = dict.fromkeys(_JOB_STATUSES, 0)
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        for status, count in counts.items():
+            SERVER_JOBS.set(count, status)
+        body = metrics.REGISTRY.render().encode("utf-8")
+        await self._send_response(writer, 200, {}, body, _METRICS_CONTENT_TYPE)
+
+    async def _send_file(self, writer, path: Path, content_type: str, extra: dict) -> None:
+        """Envía un archivo por bloques respetando el control de flujo."""
+        with open(path, "rb") as f:
+            writer.write(self._head(200, content_type, os.fstat(f.fileno()).st_size, extra))
+            while True:
+                data = f.read(_CHUNK)
+                if not data:
+                    break
+                writer.write(data)
+                await writer.drain()
+        await writer.drain()
+
+
+def run_server(server: ConversionServer) -> None:
+    """Ejecuta el servidor hasta Ctrl+C o SIGTERM."""
+    import signal
+
+    async def main() -> None:
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, server.stop)
+            except (NotImplementedError, RuntimeError):
+                # Windows: Ctrl+C llega como KeyboardInterrupt
+                pass
+        await server.serve()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
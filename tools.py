@@ -1,14 +1,21 @@
 """
 Funciones de conversión y procesamiento para PDF Converter Pro.
 """
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional, Callable, Any
+from typing import Optional, Callable, Any, Iterable
+import functools
+import inspect
 import os
 import io
+import re
 import shutil
 import tempfile
+import time
 import zipfile
 
+import metrics
+
 # Type alias para callbacks de progreso
 ProgressCallback = Callable[[int, int, str], None]
 CancelCheck = Callable[[], bool]
@@ -16,31 +23,279 @@ CancelCheck = Callable[[], bool]
 # Formatos de imagen soportados
 SUPPORTED_IMAGE_FORMATS = ["png", "jpg", "jpeg", "webp", "bmp", "gif", "tiff", "ico"]
 
+# Filtros de reducción de imágenes, de más calidad a más rápido
+RESAMPLE_FILTERS = ("lanczos", "bicubic", "bilinear", "nearest")
+# Con 3.0 el resultado de reducing_gap es prácticamente igual al del filtro solo
+_REDUCING_GAP = 3.0
+
+
+# ===========================================================================
+# Instrumentación
+# ===========================================================================
+
+class Timings:
+    """Tiempos de reloj y de CPU por etapa, y por página, de una conversión.
+
+    Cada conversión crea uno, mide sus etapas con ``stage`` y devuelve
+    ``as_dict()`` en la clave "timings" de su resultado. La CPU medida es la
+    del hilo que llama; las etapas que corren en procesos del pool se miden
+    allí y se suman con ``add``. Solo se usa perf_counter/thread_time, así
+    que medir una página cuesta unos microsegundos.
+    """
+
+    def __init__(self) -> None:
+        self._start = time.perf_counter()
+        self._cpu_start = time.thread_time()
+        # nombre -> [reloj, cpu, llamadas], en orden de primera aparición
+        self.stages: dict[str, list] = {}
+        self.pages: dict[int, dict[str, float]] = {}
+
+    @contextmanager
+    def stage(self, name: str, page: Optional[int] = None):
+        """Mide el bloque como la etapa name (de la página page, 1-basada)."""
+        t0 = time.perf_counter()
+        c0 = time.thread_time()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - t0, time.thread_time() - c0, page)
+
+    def add(self, name: str, wall: float, cpu: float = 0.0, page: Optional[int] = None) -> None:
+        """Suma un tiempo ya medido a la etapa name."""
+        entry = self.stages.setdefault(name, [0.0, 0.0, 0])
+        entry[0] += wall
+        entry[1] += cpu
+        entry[2] += 1
+        if page is not None:
+            page_stages = self.pages.setdefault(page, {})
+            page_stages[name] = page_stages.get(name, 0.0) + wall
+
+    def as_dict(self) -> dict:
+        """Registro serializable: totales, etapas y tiempos por página."""
+        return {
+            "wall": round(time.perf_counter() - self._start, 6),
+            "cpu": round(time.thread_time() - self._cpu_start, 6),
+            "stages": {
+                name: {"wall": round(wall, 6), "cpu": round(cpu, 6), "calls": calls}
+                for name, (wall, cpu, calls) in self.stages.items()
+            },
+            "pages": [
+                {"page": page, **{name: round(t, 6) for name, t in stages.items()}}
+                for page, stages in sorted(self.pages.items())
+            ],
+        }
+
+
+def format_timings(timings: dict, slowest_pages: int = 5) -> list[str]:
+    """Líneas de texto con el desglose por etapa y las páginas más lentas."""
+    total = timings["wall"] or 1e-9
+    lines = [f"Total: {timings['wall']:.2f} s reloj, {timings['cpu']:.2f} s CPU (hilo)"]
+    for name, stage in sorted(timings["stages"].items(), key=lambda item: -item[1]["wall"]):
+        lines.append(
+            f"  {name:<14} {stage['wall']:8.3f} s  {stage['wall'] / total * 100:5.1f}%  "
+            f"CPU {stage['cpu']:7.3f} s  x{stage['calls']}"
+        )
+    pages = timings.get("pages") or []
+    if pages:
+        def page_total(p: dict) -> float:
+            return sum(v for k, v in p.items() if k != "page")
+
+        lines.append(f"Páginas más lentas (de {len(pages)}):")
+        for p in sorted(pages, key=page_total, reverse=True)[:slowest_pages]:
+            detail = ", ".join(f"{k} {v:.3f}" for k, v in p.items() if k != "page")
+            lines.append(f"  pág. {p['page']}: {page_total(p):.3f} s ({detail})")
+    return lines
+
+
+def _path_size(path: Any) -> int:
+    """Tamaño de un archivo, o 0 si no es un archivo existente."""
+    try:
+        return os.stat(path).st_size if path is not None and os.path.isfile(path) else 0
+    except (OSError, TypeError):
+        return 0
+
+
+def _output_bytes(result: Any, output_path: Any) -> int:
+    """Bytes escritos: la salida, o los archivos que devuelve la función."""
+    if isinstance(result, dict) and isinstance(result.get("extracted"), list):
+        result = result["extracted"]
+    if isinstance(result, list):
+        return sum(_path_size(p) for p in result)
+    return _path_size(output_path)
+
+
+def _measured(converter: str) -> Callable:
+    """Decorador: registra cada llamada en metrics (ver metrics.record_conversion).
+
+    Mide una vez por llamada, fuera de los bucles por página: duración,
+    páginas (si el resultado trae "pages"), bytes de la entrada (primer
+    argumento) y de la salida (segundo, o las rutas que devuelva) y el tipo
+    de excepción si falla. Una InterruptedError cuenta como "cancelled", no
+    como error.
+    """
+    def decorate(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        first_params = list(signature.parameters)[:2]
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            input_path, output_path = (bound.arguments.get(p) for p in first_params)
+            dpi = bound.arguments.get("dpi")
+            # Antes de convertir: la salida puede sobrescribir la entrada
+            bytes_in = _path_size(input_path)
+            t0 = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except InterruptedError:
+                metrics.record_conversion(converter, time.perf_counter() - t0, "cancelled", dpi=dpi)
+                raise
+            except Exception as e:
+                metrics.record_conversion(converter, time.perf_counter() - t0, "error", dpi=dpi, error=e)
+                raise
+            metrics.record_conversion(
+                converter, time.perf_counter() - t0,
+                pages=result.get("pages", 0) if isinstance(result, dict) else 0,
+                bytes_in=bytes_in, bytes_out=_output_bytes(result, output_path), dpi=dpi
+            )
+            return result
+        return wrapper
+    return decorate
+
+
+class Profiler:
+    """Perfila las llamadas hechas con run() y guarda el resultado.
+
+    Con mode="cprofile" acumula un cProfile (archivo .prof, para pstats o
+    snakeviz). Con mode="collapsed" muestrea cada interval segundos la pila
+    del hilo que llama y escribe pilas colapsadas ("a;b;c N"), el formato de
+    flamegraph.pl y speedscope. Ambos perfilan solo el hilo que llama, no
+    los procesos del pool.
+    """
+
+    def __init__(self, output_path: Path, mode: str = "cprofile", interval: float = 0.005):
+        if mode not in ("cprofile", "collapsed"):
+            raise ValueError(f"Modo de perfilado desconocido: {mode}")
+        self.output_path = output_path
+        self.mode = mode
+        self.interval = interval
+        self._profile: Any = None
+        self._stacks: dict[str, int] = {}
+
+    def run(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Ejecuta func(*args, **kwargs) perfilándola."""
+        if self.mode == "cprofile":
+            import cProfile
+
+            if self._profile is None:
+                self._profile = cProfile.Profile()
+            self._profile.enable()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._profile.disable()
+
+        import sys
+        import threading
+
+        target = threading.get_ident()
+        stop = threading.Event()
+
+        def sample() -> None:
+            while not stop.wait(self.interval):
+                frame = sys._current_frames().get(target)
+                names = []
+                while frame is not None:
+                    code = frame.f_code
+                    names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                if names:
+                    stack = ";".join(reversed(names))
+                    self._stacks[stack] = self._stacks.get(stack, 0) + 1
+
+        sampler = threading.Thread(target=sample, name="profiler", daemon=True)
+        sampler.start()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stop.set()
+            sampler.join()
+
+    def dump(self) -> None:
+        """Escribe lo acumulado hasta ahora en output_path."""
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.mode == "cprofile":
+            if self._profile is not None:
+                self._profile.dump_stats(str(self.output_path))
+            return
+        with open(self.output_path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(self._stacks.items()):
+                f.write(f"{stack} {count}\n")
+
 
 # ===========================================================================
 # PDF -> DOCX (Editable)
 # ===========================================================================
 
+@_measured("pdf2docx")
 def pdf_to_docx(
     input_pdf: Path,
     output_docx: Path,
     start: Optional[int] = None,
     end: Optional[int] = None,
     overwrite: bool = False
-) -> None:
-    """Convierte PDF a DOCX usando pdf2docx (texto editable)."""
+) -> dict:
+    """Convierte PDF a DOCX usando pdf2docx (texto editable).
+
+    Devuelve las páginas convertidas en "pages". pdf2docx hace la conversión
+    de una vez, así que "timings" solo separa la apertura de la conversión;
+    el desglose por página está en pdf_to_docx_with_progress.
+    """
     if output_docx.exists() and not overwrite:
         raise FileExistsError(f"El archivo ya existe: {output_docx}")
 
     from pdf2docx import Converter
 
-    cv = Converter(str(input_pdf))
+    timings = Timings()
+    with timings.stage("open"):
+        cv = Converter(str(input_pdf))
     try:
-        cv.convert(str(output_docx), start=start, end=end)
+        pages = len(range(len(cv.fitz_doc))[start or 0:end])
+        with timings.stage("convert"):
+            cv.convert(str(output_docx), start=start or 0, end=end)
     finally:
         cv.close()
+    return {"pages": pages, "timings": timings.as_dict()}
+
+
+class _PageProgressDoc:
+    """Envoltorio del documento fitz que pdf2docx recorre al analizar.
+
+    pdf2docx extrae cada página con ``fitz_doc[i]`` durante el análisis del
+    documento; interceptar ese acceso permite reportar progreso y cancelar
+    entre páginas sin reimplementar esa fase.
+    """
+
+    def __init__(self, doc: Any, on_page: Callable[[int], None]):
+        self._doc = doc
+        self._on_page = on_page
 
+    def __getitem__(self, index: int) -> Any:
+        self._on_page(index)
+        return self._doc[index]
 
+    def __iter__(self):
+        return iter(self._doc)
+
+    def __len__(self) -> int:
+        return len(self._doc)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._doc, name)
+
+
+@_measured("pdf2docx")
 def pdf_to_docx_with_progress(
     input_pdf: Path,
     output_docx: Path,
@@ -49,50 +304,124 @@ def pdf_to_docx_with_progress(
     overwrite: bool = False,
     progress_callback: Optional[ProgressCallback] = None,
     cancel_check: Optional[CancelCheck] = None
-) -> None:
-    """Convierte PDF a DOCX con reporte de progreso."""
+) -> dict:
+    """Convierte PDF a DOCX con reporte de progreso real por página.
+
+    Ejecuta por separado las fases de pdf2docx (análisis, parseo y
+    generación) página a página, de modo que el progreso refleja el trabajo
+    hecho y la cancelación se aplica como mucho tras la página en curso.
+    Devuelve los tiempos por página y el desglose por etapa en "timings"
+    (ver Timings).
+    """
     if output_docx.exists() and not overwrite:
         raise FileExistsError(f"El archivo ya existe: {output_docx}")
 
+    from docx import Document
     from pdf2docx import Converter
 
+    def check_cancel() -> None:
+        if cancel_check and cancel_check():
+            raise InterruptedError("Operación cancelada por el usuario")
+
+    t_start = time.perf_counter()
+    timings = Timings()
     cv = Converter(str(input_pdf))
     try:
-        # Obtener número de páginas
-        import fitz
-        doc = fitz.open(str(input_pdf))
-        total_pages = doc.page_count
-        doc.close()
-
-        actual_start = start if start else 0
-        actual_end = end if end else total_pages
+        settings = cv.default_settings
+        cv.load_pages(start or 0, end)
+        pages = [page for page in cv.pages if not page.skip_parsing]
+        total_pages = len(pages)
+        # Tres pasos por página: análisis, parseo y generación
+        total_steps = total_pages * 3
+        page_times = {page.id + 1: 0.0 for page in pages}
+        page_errors = []
 
         if progress_callback:
-            progress_callback(0, actual_end - actual_start, f"Iniciando conversión de {total_pages} páginas...")
+            progress_callback(0, total_steps, f"Analizando {total_pages} páginas...")
 
-        # Convertir página por página para reportar progreso
-        for i in range(actual_start, actual_end):
-            if cancel_check and cancel_check():
-                raise InterruptedError("Operación cancelada por el usuario")
+        # Fase 1: análisis del documento (extracción, secciones, cabeceras)
+        analyzed = 0
+
+        def on_analyze_page(index: int) -> None:
+            nonlocal analyzed
+            check_cancel()
+            analyzed += 1
+            if progress_callback:
+                progress_callback(analyzed, total_steps, f"Analizando página {index + 1}")
+
+        with timings.stage("analyze"):
+            cv.pages.parse(_PageProgressDoc(cv.fitz_doc, on_analyze_page), **settings)
+        analyze_time = timings.stages["analyze"][0]
+
+        # Fase 2: parseo de cada página (párrafos, imágenes, tablas)
+        for i, page in enumerate(pages, start=1):
+            check_cancel()
+            page_num = page.id + 1
+            t0 = time.perf_counter()
+            try:
+                with timings.stage("parse", page_num):
+                    page.parse(**settings)
+            except Exception as e:
+                if not settings['ignore_page_error']:
+                    raise
+                page_errors.append((page_num, str(e)))
+            elapsed = time.perf_counter() - t0
+            page_times[page_num] += elapsed
 
-            page_num = i + 1
             if progress_callback:
-                progress_callback(i - actual_start + 1, actual_end - actual_start, f"Página {page_num}/{actual_end}")
+                progress_callback(total_pages + i, total_steps, f"Página {page_num} procesada ({elapsed:.2f}s)")
+
+        # Fase 3: generación del DOCX
+        parsed_pages = [page for page in pages if page.finalized]
+        if not parsed_pages:
+            raise ValueError("No se pudo procesar ninguna página del PDF")
+
+        word_doc = Document()
+        for i, page in enumerate(pages, start=1):
+            check_cancel()
+            page_num = page.id + 1
+            if page.finalized:
+                t0 = time.perf_counter()
+                try:
+                    with timings.stage("make_docx", page_num):
+                        page.make_docx(word_doc)
+                except Exception as e:
+                    if not settings['ignore_page_error']:
+                        raise
+                    page_errors.append((page_num, str(e)))
+                page_times[page_num] += time.perf_counter() - t0
 
-        # Hacer la conversión real
-        cv.convert(str(output_docx), start=start, end=end)
+            if progress_callback:
+                progress_callback(2 * total_pages + i, total_steps, f"Página {page_num} generada")
 
         if progress_callback:
-            progress_callback(actual_end - actual_start, actual_end - actual_start, "Conversión completada")
+            progress_callback(total_steps, total_steps, "Guardando documento...")
+
+        with timings.stage("save"):
+            word_doc.save(str(output_docx))
 
     finally:
         cv.close()
 
+    total_time = time.perf_counter() - t_start
+    if progress_callback:
+        progress_callback(total_steps, total_steps, f"Conversión completada en {total_time:.1f}s")
+
+    return {
+        "pages": total_pages,
+        "page_times": page_times,
+        "analyze_time": analyze_time,
+        "total_time": total_time,
+        "page_errors": page_errors,
+        "timings": timings.as_dict()
+    }
+
 
 # ===========================================================================
 # DOCX -> PDF
 # ===========================================================================
 
+@_measured("docx2pdf")
 def docx_to_pdf(
     input_docx: Path,
     output_pdf: Path,
@@ -107,179 +436,1068 @@ def docx_to_pdf(
 
 
 # ===========================================================================
-# PDF -> DOCX (Raster/Imagen)
+# Render de páginas y conversión Pixmap -> PIL/NumPy
 # ===========================================================================
 
-def pdf_to_docx_raster(
-    input_pdf: Path,
-    output_docx: Path,
-    dpi: int = 200,
-    overwrite: bool = False
-) -> None:
-    """Convierte PDF a DOCX renderizando como imágenes (fidelidad exacta)."""
-    if output_docx.exists() and not overwrite:
-        raise FileExistsError(f"El archivo ya existe: {output_docx}")
+def render_page(page: Any, dpi: int, grayscale: bool = False, alpha: bool = False) -> Any:
+    """Renderiza una página fitz a un Pixmap con el espacio de color indicado.
 
+    Renderizar directamente en gris (grayscale=True) reduce a un tercio los
+    píxeles a mover cuando el consumidor no necesita color, p. ej. el OCR.
+    """
     import fitz
-    from docx import Document
-    from docx.shared import Inches
 
-    doc = fitz.open(str(input_pdf))
-    word_doc = Document()
+    mat = fitz.Matrix(dpi / 72, dpi / 72)
+    colorspace = fitz.csGRAY if grayscale else fitz.csRGB
+    return page.get_pixmap(matrix=mat, colorspace=colorspace, alpha=alpha)
 
-    try:
-        for page_num in range(doc.page_count):
-            page = doc[page_num]
-            # Renderizar página como imagen
-            mat = fitz.Matrix(dpi / 72, dpi / 72)
-            pix = page.get_pixmap(matrix=mat)
 
-            # Guardar temporalmente
-            img_data = pix.tobytes("png")
+def _pixmap_mode(pix: Any) -> str:
+    """Modo PIL equivalente a las muestras de un Pixmap."""
+    colorants = pix.n - pix.alpha
+    if colorants == 1:
+        return "LA" if pix.alpha else "L"
+    if colorants == 3:
+        return "RGBA" if pix.alpha else "RGB"
+    if colorants == 4 and not pix.alpha:
+        return "CMYK"
+    raise ValueError(f"Pixmap no soportado: {pix.n} canales (alpha={pix.alpha})")
+
+
+def pixmap_to_pil(pix: Any, copy: bool = True) -> Any:
+    """Construye una imagen PIL a partir de las muestras de un Pixmap.
+
+    Evita el ciclo ``pix.tobytes("png")`` + ``Image.open`` (comprimir y
+    descomprimir PNG solo para pasar píxeles entre librerías). Con
+    copy=False la imagen comparte el buffer del Pixmap sin copiarlo y solo
+    es válida mientras el Pixmap siga vivo.
+    """
+    from PIL import Image
+
+    mode = _pixmap_mode(pix)
+    if mode == "CMYK":
+        import fitz
+        pix = fitz.Pixmap(fitz.csRGB, pix)
+        mode = "RGB"
+        copy = True
+
+    buffer = pix.samples_mv if not copy else pix.samples
+    return Image.frombuffer(mode, (pix.width, pix.height), buffer, "raw", mode, pix.stride, 1)
+
+
+def pixmap_to_numpy(pix: Any, copy: bool = True) -> Any:
+    """Devuelve las muestras de un Pixmap como array NumPy (alto, ancho, canales).
+
+    Igual que pixmap_to_pil, con copy=False el array comparte el buffer del
+    Pixmap y solo es válido mientras este exista.
+    """
+    import numpy as np
+
+    buffer = pix.samples_mv if not copy else pix.samples
+    arr = np.frombuffer(buffer, dtype=np.uint8)
+    return arr.reshape(pix.height, pix.width, pix.n)
+
+
+# ===========================================================================
+# Caché de páginas renderizadas
+# ===========================================================================
+
+class PageRenderCache:
+    """Caché de páginas renderizadas compartida entre raster, OCR y vistas previas.
+
+    La clave es (hash del documento, página, DPI, espacio de color). El nivel
+    en memoria desaloja por presupuesto de bytes (LRU); el nivel en disco es
+    opcional y permite compartir renders entre procesos y ejecuciones. Una
+    página en gris se puede obtener de una ya renderizada en color.
+
+    Los conversores solo la usan si se les pasa en render_cache; con
+    max_bytes=0 no guarda nada en memoria (solo en disco).
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 256 * 1024 ** 2,
+        disk_dir: Optional[Path] = None,
+        disk_max_bytes: int = 2 * 1024 ** 3
+    ):
+        import threading
+        from collections import OrderedDict
+
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._entries: "OrderedDict[tuple, tuple[bytes, int, int, int, bool]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        if disk_dir:
+            disk_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def _pixmap(entry: tuple[bytes, int, int, int, bool]) -> Any:
+        import fitz
+
+        samples, width, height, n, alpha = entry
+        colorspace = fitz.csGRAY if n - alpha == 1 else fitz.csRGB
+        return fitz.Pixmap(colorspace, width, height, samples, alpha)
+
+    def _disk_path(self, key: tuple) -> Path:
+        doc_hash, page_index, dpi, colorspace = key
+        return self.disk_dir / doc_hash / f"p{page_index:05d}_{dpi}_{colorspace}.raw"
+
+    def get(self, key: tuple) -> Optional[Any]:
+        """Devuelve el Pixmap de la clave o None si no está en caché."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return self._pixmap(entry)
+
+        if self.disk_dir:
+            path = self._disk_path(key)
+            try:
+                with open(path, "rb") as f:
+                    header = f.readline().split()
+                    samples = f.read()
+                os.utime(path)
+            except OSError:
+                return None
+            width, height, n, alpha = (int(v) for v in header)
+            entry = (samples, width, height, n, bool(alpha))
+            self._remember(key, entry)
+            return self._pixmap(entry)
+
+        return None
+
+    def put(self, key: tuple, pix: Any) -> None:
+        """Guarda un Pixmap en memoria (y en disco si está configurado)."""
+        if self.max_bytes:
+            self._remember(key, (pix.samples, pix.width, pix.height, pix.n, bool(pix.alpha)))
+
+        if self.disk_dir:
+            path = self._disk_path(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(f"{pix.width} {pix.height} {pix.n} {int(pix.alpha)}\n".encode("ascii"))
+                f.write(pix.samples_mv)
+            os.replace(tmp_path, path)
+            self._evict_disk()
+
+    def _remember(self, key: tuple, entry: tuple[bytes, int, int, int, bool]) -> None:
+        size = len(entry[0])
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous[0])
+            self._entries[key] = entry
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted[0])
+
+    def _evict_disk(self) -> None:
+        entries = []
+        total = 0
+        for folder in os.scandir(self.disk_dir):
+            if not folder.is_dir():
+                continue
+            for entry in os.scandir(folder.path):
+                if not entry.name.endswith(".raw"):
+                    continue
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+
+        if total <= self.disk_max_bytes:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+            if total <= self.disk_max_bytes:
+                break
+
+    def render(self, page: Any, doc_hash: str, dpi: int, grayscale: bool = False) -> Any:
+        """Renderiza una página pasando por la caché."""
+        import fitz
+
+        colorspace = "gray" if grayscale else "rgb"
+        key = (doc_hash, page.number, dpi, colorspace)
+        pix = self.get(key)
+        if pix is not None:
+            return pix
+
+        if grayscale:
+            # Reutilizar un render en color de la misma página (p. ej. raster -> OCR)
+            rgb = self.get((doc_hash, page.number, dpi, "rgb"))
+            if rgb is not None:
+                pix = fitz.Pixmap(fitz.csGRAY, rgb)
+                self.put(key, pix)
+                return pix
+
+        pix = render_page(page, dpi, grayscale=grayscale)
+        self.put(key, pix)
+        return pix
+
+    def clear(self) -> None:
+        """Vacía el nivel en memoria."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+# ===========================================================================
+# DOCX en streaming (memoria acotada)
+# ===========================================================================
+
+_DOCX_NAMESPACES = (
+    'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" '
+    'xmlns:wp="http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing" '
+    'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+    'xmlns:pic="http://schemas.openxmlformats.org/drawingml/2006/picture"'
+)
+
+_DOCX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Default Extension="png" ContentType="image/png"/>'
+    '<Default Extension="jpeg" ContentType="image/jpeg"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+
+_DOCX_PACKAGE_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+
+# Carta con márgenes de 0.5" para que quepan imágenes de 7.5" de ancho
+_DOCX_SECTION = (
+    '<w:sectPr><w:pgSz w:w="12240" w:h="15840"/>'
+    '<w:pgMar w:top="720" w:right="720" w:bottom="720" w:left="720" '
+    'w:header="720" w:footer="720" w:gutter="0"/></w:sectPr>'
+)
+
+_EMU_PER_INCH = 914400
+
+
+class StreamingDocxWriter:
+    """Escribe un DOCX página a página con memoria constante.
+
+    Cada imagen se guarda en el ZIP de salida en cuanto se recibe y el
+    cuerpo de ``document.xml`` se va escribiendo en un archivo temporal,
+    que se vuelca al ZIP al cerrar. Nunca hay más de una imagen en memoria.
+    """
+
+    def __init__(self, output_docx: Path):
+        self.output_docx = output_docx
+        self._zip = zipfile.ZipFile(str(output_docx), 'w', zipfile.ZIP_DEFLATED)
+        self._body = tempfile.TemporaryFile(mode='w+', encoding='utf-8')
+        self._rels: list[tuple[str, str]] = []
+        self._closed = False
+
+    def add_picture(self, data: bytes, width_inches: float, height_inches: float, ext: str = "png") -> None:
+        """Agrega una imagen en su propio párrafo."""
+        index = len(self._rels) + 1
+        media_name = f"media/image{index}.{ext}"
+        rel_id = f"rIdImg{index}"
+
+        # PNG/JPEG ya vienen comprimidos: se guardan sin deflate
+        self._zip.writestr(f"word/{media_name}", data, compress_type=zipfile.ZIP_STORED)
+        self._rels.append((rel_id, media_name))
+
+        cx = int(width_inches * _EMU_PER_INCH)
+        cy = int(height_inches * _EMU_PER_INCH)
+        self._body.write(
+            '<w:p><w:r><w:drawing>'
+            '<wp:inline distT="0" distB="0" distL="0" distR="0">'
+            f'<wp:extent cx="{cx}" cy="{cy}"/>'
+            f'<wp:docPr id="{index}" name="Picture {index}"/>'
+            '<wp:cNvGraphicFramePr><a:graphicFrameLocks noChangeAspect="1"/></wp:cNvGraphicFramePr>'
+            '<a:graphic><a:graphicData uri="http://schemas.openxmlformats.org/drawingml/2006/picture">'
+            f'<pic:pic><pic:nvPicPr><pic:cNvPr id="0" name="image{index}.{ext}"/><pic:cNvPicPr/></pic:nvPicPr>'
+            f'<pic:blipFill><a:blip r:embed="{rel_id}"/><a:stretch><a:fillRect/></a:stretch></pic:blipFill>'
+            '<pic:spPr><a:xfrm><a:off x="0" y="0"/>'
+            f'<a:ext cx="{cx}" cy="{cy}"/></a:xfrm>'
+            '<a:prstGeom prst="rect"><a:avLst/></a:prstGeom></pic:spPr>'
+            '</pic:pic></a:graphicData></a:graphic></wp:inline>'
+            '</w:drawing></w:r></w:p>'
+        )
+
+    def add_paragraph(self, text: str) -> None:
+        """Agrega un párrafo de texto; los saltos de línea se mantienen."""
+        from xml.sax.saxutils import escape
+
+        runs = '<w:br/>'.join(
+            f'<w:t xml:space="preserve">{escape(_strip_xml_invalid(line))}</w:t>'
+            for line in text.split("\n")
+        )
+        self._body.write(f'<w:p><w:r>{runs}</w:r></w:p>')
 
-            # Insertar en Word
-            from io import BytesIO
-            img_stream = BytesIO(img_data)
+    def add_page_break(self) -> None:
+        """Agrega un salto de página."""
+        self._body.write('<w:p><w:r><w:br w:type="page"/></w:r></w:p>')
+
+    def close(self) -> None:
+        """Escribe document.xml y las relaciones y cierra el ZIP."""
+        if self._closed:
+            return
+
+        with self._zip.open("word/document.xml", "w") as dst:
+            dst.write(
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                f'<w:document {_DOCX_NAMESPACES}><w:body>'.encode("utf-8")
+            )
+            self._body.seek(0)
+            while True:
+                chunk = self._body.read(1024 * 1024)
+                if not chunk:
+                    break
+                dst.write(chunk.encode("utf-8"))
+            dst.write(f'{_DOCX_SECTION}</w:body></w:document>'.encode("utf-8"))
+
+        rels = ''.join(
+            f'<Relationship Id="{rel_id}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/image" '
+            f'Target="{target}"/>'
+            for rel_id, target in self._rels
+        )
+        self._zip.writestr(
+            "word/_rels/document.xml.rels",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'{rels}</Relationships>'
+        )
+        self._zip.writestr("[Content_Types].xml", _DOCX_CONTENT_TYPES)
+        self._zip.writestr("_rels/.rels", _DOCX_PACKAGE_RELS)
+
+        self._zip.close()
+        self._body.close()
+        self._closed = True
+
+    def abort(self) -> None:
+        """Descarta el DOCX a medio escribir."""
+        if self._closed:
+            return
+        self._zip.close()
+        self._body.close()
+        self._closed = True
+        try:
+            self.output_docx.unlink()
+        except OSError:
+            pass
+
+    def __enter__(self) -> "StreamingDocxWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+_XML_INVALID_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _strip_xml_invalid(text: str) -> str:
+    """Elimina caracteres de control no permitidos en XML (frecuentes en OCR)."""
+    return _XML_INVALID_CHARS.sub('', text)
 
-            # Calcular tamaño en pulgadas (basado en tamaño de página)
-            width_inches = page.rect.width / 72
-            word_doc.add_picture(img_stream, width=Inches(min(width_inches, 7.5)))
 
-            if page_num < doc.page_count - 1:
-                word_doc.add_page_break()
+# ===========================================================================
+# PDF -> DOCX (Raster/Imagen)
+# ===========================================================================
+
+# Documento abierto por cada proceso del pool de render (ver _init_render_worker)
+_worker_doc: Any = None
+_worker_doc_hash: str = ""
+_worker_render_cache: Optional[PageRenderCache] = None
+
+
+def _init_render_worker(input_pdf: str, doc_hash: str, render_cache_dir: Optional[str]) -> None:
+    """Inicializador del pool: cada proceso abre su propio documento fitz.
+
+    Si el proceso padre usa caché de renders en disco, los hijos la
+    comparten (sin nivel en memoria, que moriría con el proceso).
+    """
+    global _worker_doc, _worker_doc_hash, _worker_render_cache
+    import fitz
+    _worker_doc = fitz.open(input_pdf)
+    _worker_doc_hash = doc_hash
+    if render_cache_dir:
+        _worker_render_cache = PageRenderCache(max_bytes=0, disk_dir=Path(render_cache_dir))
+
+
+def _render_pages_png(page_numbers: list[int], dpi: int) -> list[tuple[int, bytes, float, float, dict]]:
+    """Renderiza un bloque de páginas a PNG dentro de un proceso del pool.
+
+    Cada página lleva los tiempos (reloj, CPU) de render y de codificación.
+    """
+    cache = _worker_render_cache
+    rendered = []
+    for page_num in page_numbers:
+        t0, c0 = time.perf_counter(), time.process_time()
+        page = _worker_doc[page_num]
+        if cache:
+            pix = cache.render(page, _worker_doc_hash, dpi)
+        else:
+            pix = render_page(page, dpi)
+        t1, c1 = time.perf_counter(), time.process_time()
+        png = pix.tobytes("png")
+        times = {
+            "render": (t1 - t0, c1 - c0),
+            "encode_png": (time.perf_counter() - t1, time.process_time() - c1),
+        }
+        rendered.append((page_num, png, page.rect.width, page.rect.height, times))
+    return rendered
+
+
+def _iter_raster_pages(
+    input_pdf: Path,
+    dpi: int,
+    workers: int = 1,
+    cancel_check: Optional[CancelCheck] = None,
+    timings: Optional[Timings] = None,
+    render_cache: Optional[PageRenderCache] = None
+):
+    """Genera (page_num, png_bytes, ancho_pt, alto_pt) en orden de página.
+
+    Con workers > 1 reparte las páginas en bloques entre procesos y
+    reordena los resultados; solo mantiene en vuelo unos pocos bloques
+    para no acumular todas las imágenes en memoria. Los tiempos de render y
+    codificación de cada página se suman a timings.
+
+    Con render_cache las páginas pasan por esa caché. En el pool solo se
+    comparte su nivel en disco: el nivel en memoria del proceso principal
+    no se llena con las páginas que renderizan los hijos.
+    """
+    import fitz
+
+    timings = timings or Timings()
+    doc = fitz.open(str(input_pdf))
+    doc_hash = file_digest(input_pdf) if render_cache else ""
 
-        word_doc.save(str(output_docx))
+    if workers <= 1:
+        try:
+            for page_num in range(doc.page_count):
+                if cancel_check and cancel_check():
+                    raise InterruptedError("Operación cancelada por el usuario")
+                page = doc[page_num]
+                with timings.stage("render", page_num + 1):
+                    if render_cache:
+                        pix = render_cache.render(page, doc_hash, dpi)
+                    else:
+                        pix = render_page(page, dpi)
+                with timings.stage("encode_png", page_num + 1):
+                    png = pix.tobytes("png")
+                yield page_num, png, page.rect.width, page.rect.height
+        finally:
+            doc.close()
+        return
+
+    total_pages = doc.page_count
+    doc.close()
+
+    from concurrent.futures import ProcessPoolExecutor, wait
+
+    # Bloques pequeños para repartir bien la carga y reportar progreso fluido
+    chunk_size = max(1, min(8, total_pages // (workers * 4)))
+    chunks = [
+        list(range(i, min(i + chunk_size, total_pages)))
+        for i in range(0, total_pages, chunk_size)
+    ]
+    max_in_flight = workers * 2
+
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_render_worker,
+        initargs=(
+            str(input_pdf), doc_hash,
+            str(render_cache.disk_dir) if render_cache and render_cache.disk_dir else None
+        )
+    )
+    try:
+        pending = {}
+        next_chunk = 0
+        for chunk_index in range(len(chunks)):
+            while next_chunk < len(chunks) and next_chunk - chunk_index < max_in_flight:
+                pending[next_chunk] = executor.submit(_render_pages_png, chunks[next_chunk], dpi)
+                next_chunk += 1
+
+            future = pending.pop(chunk_index)
+            with timings.stage("wait_pool"):
+                while not future.done():
+                    if cancel_check and cancel_check():
+                        raise InterruptedError("Operación cancelada por el usuario")
+                    wait([future], timeout=0.2)
+            rendered = future.result()
+
+            for page_num, png, width, height, times in rendered:
+                if cancel_check and cancel_check():
+                    raise InterruptedError("Operación cancelada por el usuario")
+                for name, (wall, cpu) in times.items():
+                    timings.add(name, wall, cpu, page_num + 1)
+                yield page_num, png, width, height
     finally:
-        doc.close()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def pdf_to_docx_raster(
+    input_pdf: Path,
+    output_docx: Path,
+    dpi: int = 200,
+    overwrite: bool = False,
+    workers: int = 1,
+    streaming: bool = False,
+    render_cache: Optional[PageRenderCache] = None
+) -> dict:
+    """Convierte PDF a DOCX renderizando como imágenes (fidelidad exacta).
 
+    Con workers > 1 las páginas se renderizan en paralelo en varios procesos.
+    Con streaming=True cada página se escribe al DOCX en cuanto se renderiza.
+    render_cache es opcional (ver PageRenderCache).
+    """
+    return pdf_to_docx_raster_with_progress(
+        input_pdf, output_docx, dpi=dpi, overwrite=overwrite,
+        workers=workers, streaming=streaming, render_cache=render_cache
+    )
 
+
+@_measured("pdf2docx-raster")
 def pdf_to_docx_raster_with_progress(
     input_pdf: Path,
     output_docx: Path,
     dpi: int = 200,
     overwrite: bool = False,
     progress_callback: Optional[ProgressCallback] = None,
-    cancel_check: Optional[CancelCheck] = None
-) -> None:
-    """Convierte PDF a DOCX como imágenes con reporte de progreso."""
+    cancel_check: Optional[CancelCheck] = None,
+    workers: int = 1,
+    streaming: bool = False,
+    render_cache: Optional[PageRenderCache] = None
+) -> dict:
+    """Convierte PDF a DOCX como imágenes con reporte de progreso.
+
+    Devuelve {"pages": n, "timings": ...} con el tiempo de render,
+    codificación PNG, montaje del DOCX y escritura (ver Timings).
+    """
     if output_docx.exists() and not overwrite:
         raise FileExistsError(f"El archivo ya existe: {output_docx}")
 
     import fitz
-    from docx import Document
-    from docx.shared import Inches
-    from io import BytesIO
 
-    doc = fitz.open(str(input_pdf))
-    word_doc = Document()
-    total_pages = doc.page_count
+    timings = Timings()
+    with fitz.open(str(input_pdf)) as doc:
+        total_pages = doc.page_count
+
+    if streaming:
+        word_doc = StreamingDocxWriter(output_docx)
+    else:
+        from docx import Document
+        word_doc = Document()
 
     if progress_callback:
-        progress_callback(0, total_pages, f"Procesando {total_pages} páginas a {dpi} DPI...")
+        mode = f" con {workers} procesos" if workers > 1 else ""
+        progress_callback(0, total_pages, f"Procesando {total_pages} páginas a {dpi} DPI{mode}...")
 
     try:
-        for page_num in range(total_pages):
-            if cancel_check and cancel_check():
-                raise InterruptedError("Operación cancelada por el usuario")
-
+        pages = _iter_raster_pages(input_pdf, dpi, workers, cancel_check, timings, render_cache)
+        for page_num, img_data, page_width, page_height in pages:
             if progress_callback:
                 progress_callback(page_num + 1, total_pages, f"Renderizando página {page_num + 1}/{total_pages}")
 
-            page = doc[page_num]
-            mat = fitz.Matrix(dpi / 72, dpi / 72)
-            pix = page.get_pixmap(matrix=mat)
-            img_data = pix.tobytes("png")
-            img_stream = BytesIO(img_data)
-
-            width_inches = page.rect.width / 72
-            word_doc.add_picture(img_stream, width=Inches(min(width_inches, 7.5)))
-
-            if page_num < total_pages - 1:
-                word_doc.add_page_break()
+            with timings.stage("docx", page_num + 1):
+                # Calcular tamaño en pulgadas (basado en tamaño de página)
+                width_inches = min(page_width / 72, 7.5)
+                if streaming:
+                    # Ajustar también al alto útil (10") de la sección del writer
+                    height_inches = width_inches * page_height / page_width
+                    if height_inches > 10:
+                        width_inches, height_inches = width_inches * 10 / height_inches, 10
+                    word_doc.add_picture(img_data, width_inches, height_inches)
+                else:
+                    from docx.shared import Inches
+                    from io import BytesIO
+                    word_doc.add_picture(BytesIO(img_data), width=Inches(width_inches))
+
+                if page_num < total_pages - 1:
+                    word_doc.add_page_break()
 
         if progress_callback:
             progress_callback(total_pages, total_pages, "Guardando documento...")
 
-        word_doc.save(str(output_docx))
+        with timings.stage("save"):
+            if streaming:
+                word_doc.close()
+            else:
+                word_doc.save(str(output_docx))
+    except BaseException:
+        if streaming:
+            word_doc.abort()
+        raise
 
-    finally:
-        doc.close()
+    return {"pages": total_pages, "timings": timings.as_dict()}
 
 
 # ===========================================================================
 # OCR PDF -> DOCX
 # ===========================================================================
 
+def _init_ocr_worker() -> None:
+    """Inicializador del pool OCR: un hilo de Tesseract por proceso.
+
+    Tesseract usa OpenMP; con varios procesos en paralelo conviene que cada
+    uno use un solo hilo para no sobresuscribir la CPU.
+    """
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+
+def _ocr_image(img: Any, lang: str) -> str:
+    """Ejecuta Tesseract sobre una imagen PIL."""
+    import pytesseract
+
+    return pytesseract.image_to_string(img, lang=lang)
+
+
+def _ocr_samples(samples: bytes, width: int, height: int, mode: str, lang: str) -> tuple[str, float, float]:
+    """Ejecuta OCR sobre los píxeles crudos de una página (en un proceso del pool).
+
+    Devuelve el texto y el tiempo de reloj y de CPU que llevó.
+    """
+    from PIL import Image
+
+    t0, c0 = time.perf_counter(), time.process_time()
+    img = Image.frombuffer(mode, (width, height), samples, "raw", mode, 0, 1)
+    text = _ocr_image(img, lang)
+    # Tesseract corre en un subproceso: su CPU no cuenta en process_time
+    return text, time.perf_counter() - t0, time.process_time() - c0
+
+
+def _iter_ocr_pages(
+    doc: Any,
+    doc_hash: str,
+    dpi: int,
+    lang: str,
+    workers: int = 1,
+    cancel_check: Optional[CancelCheck] = None,
+    timings: Optional[Timings] = None,
+    render_cache: Optional[PageRenderCache] = None
+):
+    """Genera (page_num, texto) en orden de página.
+
+    El hilo actual renderiza las páginas en gris (pasando por render_cache si
+    se indica, que reaprovecha p. ej. una conversión raster previa) y, con
+    workers > 1, envía los píxeles a un pool de procesos que ejecuta
+    Tesseract en paralelo. Se mantienen como mucho 2 páginas por proceso en
+    vuelo para acotar memoria. Los tiempos de render y OCR de cada página se
+    suman a timings.
+    """
+    def check_cancel() -> None:
+        if cancel_check and cancel_check():
+            raise InterruptedError("Operación cancelada por el usuario")
+
+    def render(page_num: int) -> Any:
+        with timings.stage("render", page_num + 1):
+            if render_cache:
+                return render_cache.render(doc[page_num], doc_hash, dpi, grayscale=True)
+            return render_page(doc[page_num], dpi, grayscale=True)
+
+    timings = timings or Timings()
+    total_pages = doc.page_count
+
+    if workers <= 1:
+        for page_num in range(total_pages):
+            check_cancel()
+            pix = render(page_num)
+            with timings.stage("ocr", page_num + 1):
+                text = _ocr_image(pixmap_to_pil(pix, copy=False), lang)
+            yield page_num, text
+        return
+
+    from concurrent.futures import ProcessPoolExecutor, wait
+
+    def submit(page_num: int) -> Any:
+        pix = render(page_num)
+        return executor.submit(_ocr_samples, pix.samples, pix.width, pix.height, _pixmap_mode(pix), lang)
+
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_ocr_worker)
+    try:
+        pending = {}
+        next_page = 0
+        for page_num in range(total_pages):
+            # Etapa de render: adelantar páginas mientras haya hueco en el pool
+            while next_page < total_pages and next_page - page_num < workers * 2:
+                check_cancel()
+                pending[next_page] = submit(next_page)
+                next_page += 1
+
+            future = pending.pop(page_num)
+            with timings.stage("wait_pool"):
+                while not future.done():
+                    check_cancel()
+                    wait([future], timeout=0.2)
+            text, wall, cpu = future.result()
+            timings.add("ocr", wall, cpu, page_num + 1)
+            yield page_num, text
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def ocr_pdf_to_docx(
+    input_pdf: Path,
+    output_docx: Path,
+    dpi: int = 300,
+    lang: str = "spa",
+    streaming: bool = False,
+    workers: int = 1,
+    render_cache: Optional[PageRenderCache] = None
+) -> dict:
+    """Convierte PDF a DOCX usando OCR (solo texto)."""
+    return ocr_pdf_to_docx_with_progress(
+        input_pdf, output_docx, dpi=dpi, lang=lang,
+        streaming=streaming, workers=workers, render_cache=render_cache
+    )
+
+
+@_measured("ocr-pdf2docx")
 def ocr_pdf_to_docx_with_progress(
     input_pdf: Path,
     output_docx: Path,
     dpi: int = 300,
     lang: str = "spa",
     progress_callback: Optional[ProgressCallback] = None,
-    cancel_check: Optional[CancelCheck] = None
-) -> None:
-    """Convierte PDF a DOCX usando OCR (pytesseract)."""
+    cancel_check: Optional[CancelCheck] = None,
+    streaming: bool = False,
+    workers: int = 1,
+    render_cache: Optional[PageRenderCache] = None
+) -> dict:
+    """Convierte PDF a DOCX usando OCR (pytesseract).
+
+    Con workers > 1 varias páginas se reconocen en paralelo en procesos
+    separados; el texto se agrega al documento en el orden original.
+    Con render_cache se reutilizan páginas ya renderizadas. Devuelve {"pages": n, "timings": ...} (ver Timings).
+    """
     import fitz
-    from docx import Document
-    from PIL import Image
-    import pytesseract
-    from io import BytesIO
 
+    timings = Timings()
     doc = fitz.open(str(input_pdf))
-    word_doc = Document()
+    if streaming:
+        word_doc = StreamingDocxWriter(output_docx)
+    else:
+        from docx import Document
+        word_doc = Document()
     total_pages = doc.page_count
 
     if progress_callback:
-        progress_callback(0, total_pages, f"Iniciando OCR ({lang})...")
+        mode = f", {workers} procesos" if workers > 1 else ""
+        progress_callback(0, total_pages, f"Iniciando OCR ({lang}{mode})...")
 
     try:
-        for page_num in range(total_pages):
-            if cancel_check and cancel_check():
-                raise InterruptedError("Operación cancelada por el usuario")
-
+        doc_hash = file_digest(input_pdf) if render_cache else ""
+        pages = _iter_ocr_pages(doc, doc_hash, dpi, lang, workers, cancel_check, timings, render_cache)
+        for page_num, text in pages:
             if progress_callback:
                 progress_callback(page_num + 1, total_pages, f"OCR página {page_num + 1}/{total_pages}")
 
-            page = doc[page_num]
-            mat = fitz.Matrix(dpi / 72, dpi / 72)
-            pix = page.get_pixmap(matrix=mat)
-
-            # Convertir a PIL Image para OCR
-            img_data = pix.tobytes("png")
-            img = Image.open(BytesIO(img_data))
+            with timings.stage("docx", page_num + 1):
+                # Agregar texto al documento
+                if text.strip():
+                    word_doc.add_paragraph(text)
 
-            # Ejecutar OCR
-            text = pytesseract.image_to_string(img, lang=lang)
-
-            # Agregar texto al documento
-            if text.strip():
-                word_doc.add_paragraph(text)
-
-            if page_num < total_pages - 1:
-                word_doc.add_page_break()
+                if page_num < total_pages - 1:
+                    word_doc.add_page_break()
 
         if progress_callback:
             progress_callback(total_pages, total_pages, "Guardando documento...")
 
-        word_doc.save(str(output_docx))
+        with timings.stage("save"):
+            if streaming:
+                word_doc.close()
+            else:
+                word_doc.save(str(output_docx))
+
+    except BaseException:
+        if streaming:
+            word_doc.abort()
+        raise
 
     finally:
         doc.close()
 
+    return {"pages": total_pages, "timings": timings.as_dict()}
+
 
 # ===========================================================================
 # Compresión PDF
 # ===========================================================================
 
+# Presets de compresión de imágenes: resolución objetivo, calidad JPEG y si
+# los escaneos en blanco y negro se pasan a 1 bit
+PDF_COMPRESSION_PRESETS = {
+    "screen": {"dpi": 72, "quality": 40, "bilevel": True},
+    "ebook": {"dpi": 150, "quality": 60, "bilevel": False},
+    "print": {"dpi": 300, "quality": 80, "bilevel": False},
+}
+
+# Solo se reduce una imagen si supera la resolución objetivo en este factor
+_DOWNSAMPLE_THRESHOLD = 1.2
+
+
+def _image_placements(input_pdf: Path) -> dict[int, tuple[float, float]]:
+    """Tamaño máximo (en puntos) al que se dibuja cada imagen, por xref."""
+    import fitz
+
+    placements: dict[int, tuple[float, float]] = {}
+    with fitz.open(str(input_pdf)) as doc:
+        for page in doc:
+            for info in page.get_image_info(xrefs=True):
+                xref = info.get("xref", 0)
+                if not xref:
+                    continue
+                x0, y0, x1, y1 = info["bbox"]
+                w, h = abs(x1 - x0), abs(y1 - y0)
+                prev_w, prev_h = placements.get(xref, (0.0, 0.0))
+                placements[xref] = (max(prev_w, w), max(prev_h, h))
+    return placements
+
+
+def _iter_xobject_dicts(pdf: Any):
+    """Recorre los diccionarios /XObject de páginas y formularios anidados."""
+    import pikepdf
+
+    seen = set()
+    stack = [page.obj.get("/Resources") for page in pdf.pages]
+    while stack:
+        resources = stack.pop()
+        if not isinstance(resources, pikepdf.Dictionary):
+            continue
+        xobjects = resources.get("/XObject")
+        if not isinstance(xobjects, pikepdf.Dictionary):
+            continue
+        yield xobjects
+        for name in list(xobjects.keys()):
+            xobj = xobjects[name]
+            if xobj.get("/Subtype") == "/Form" and xobj.objgen not in seen:
+                seen.add(xobj.objgen)
+                stack.append(xobj.get("/Resources"))
+
+
+def _dedupe_pdf_images(pdf: Any) -> dict[int, int]:
+    """Hace que las imágenes idénticas apunten a un único objeto.
+
+    Devuelve {xref reemplazado: xref conservado}.
+    """
+    import hashlib
+    import pikepdf
+
+    canonical: dict[str, Any] = {}
+    replaced: dict[int, int] = {}
+    for xobjects in _iter_xobject_dicts(pdf):
+        for name in list(xobjects.keys()):
+            xobj = xobjects[name]
+            if xobj.get("/Subtype") != "/Image":
+                continue
+            h = hashlib.sha1(xobj.read_raw_bytes())
+            # El diccionario también cuenta: mismo stream con otro /ColorSpace no es igual
+            for key in sorted(k for k in xobj.keys() if k != "/Length"):
+                h.update(key.encode())
+                value = xobj[key]
+                h.update(repr(value.objgen if isinstance(value, pikepdf.Stream) else value).encode())
+            digest = h.hexdigest()
+            first = canonical.setdefault(digest, xobj)
+            if first.objgen != xobj.objgen:
+                xobjects[name] = first
+                replaced[xobj.objgen[0]] = first.objgen[0]
+    return replaced
+
+
+# Grises intermedios admitidos en una imagen binaria: en total (bordes
+# suavizados incluidos) y lejos de un borde, sobre el total de píxeles y
+# sobre los propios grises (donde el suavizado del escáner no los explica)
+_BILEVEL_MAX_MIDTONES = 0.25
+_BILEVEL_MAX_FLAT_MIDTONES = 0.002
+_BILEVEL_MAX_FLAT_SHARE = 0.05
+# Diferencia máx-mín en un entorno 3x3 por debajo de la cual no hay borde
+_BILEVEL_EDGE_CONTRAST = 64
+
+
+def _is_bilevel(img: Any) -> bool:
+    """True si una imagen en gris es prácticamente blanco y negro (escaneo de texto).
+
+    No basta con que casi todo sea blanco o negro: una foto o un diagrama
+    en gris sobre fondo blanco también lo cumple. En un escaneo de texto los
+    grises intermedios son el borde suavizado de los trazos, así que además
+    tienen que estar junto a un salto de contraste fuerte.
+    """
+    from PIL import ImageChops, ImageFilter
+
+    if img.mode == "1":
+        return True
+    if img.mode != "L":
+        return False
+    total = img.width * img.height
+    if not total:
+        return False
+    histogram = img.histogram()
+    midtones = total - sum(histogram[:32]) - sum(histogram[224:])
+    if midtones > total * _BILEVEL_MAX_MIDTONES:
+        return False
+    if not midtones:
+        return True
+
+    contrast = ImageChops.subtract(img.filter(ImageFilter.MaxFilter(3)), img.filter(ImageFilter.MinFilter(3)))
+    flat = contrast.point(lambda v: 255 if v < _BILEVEL_EDGE_CONTRAST else 0)
+    midtone_mask = img.point(lambda v: 255 if 32 <= v < 224 else 0)
+    flat_midtones = ImageChops.multiply(flat, midtone_mask).histogram()[255]
+    return (
+        flat_midtones <= total * _BILEVEL_MAX_FLAT_MIDTONES
+        and flat_midtones <= midtones * _BILEVEL_MAX_FLAT_SHARE
+    )
+
+
+def _encode_pdf_image(img: Any, quality: int, image_format: str, bilevel: bool = False) -> tuple[bytes, Any, str, int]:
+    """Codifica una imagen PIL para un stream PDF.
+
+    Devuelve (datos, filtro, espacio de color, bits por componente). Las
+    imágenes binarias (escaneos de texto) se guardan en 1 bit con Flate, la
+    alternativa a JBIG2 que pikepdf puede escribir.
+    """
+    import zlib
+    import pikepdf
+
+    if bilevel:
+        if img.mode != "1":
+            img = img.convert("L").point(lambda v: 255 if v >= 128 else 0).convert("1")
+        return zlib.compress(img.tobytes(), 9), pikepdf.Name.FlateDecode, "/DeviceGray", 1
+
+    if img.mode not in ("L", "RGB"):
+        img = img.convert("RGB")
+
+    colorspace = "/DeviceGray" if img.mode == "L" else "/DeviceRGB"
+    buf = io.BytesIO()
+    if image_format == "jpx":
+        img.save(buf, "JPEG2000", quality_mode="rates", quality_layers=[max(1, (100 - quality) // 2)])
+        return buf.getvalue(), pikepdf.Name.JPXDecode, colorspace, 8
+    img.save(buf, "JPEG", quality=quality, optimize=True)
+    return buf.getvalue(), pikepdf.Name.DCTDecode, colorspace, 8
+
+
+def _recompress_pdf_image(
+    xobj: Any,
+    placement: tuple[float, float],
+    target_dpi: Optional[int],
+    quality: int,
+    image_format: str,
+    bilevel: bool = False
+) -> bool:
+    """Reduce y recodifica una imagen del PDF si el resultado es menor.
+
+    Con bilevel los escaneos en blanco y negro se guardan en 1 bit.
+    """
+    import pikepdf
+    from PIL import Image
+
+    # Máscaras, decodificaciones invertidas y máscaras por color no se tocan
+    if xobj.get("/ImageMask", False) or "/Decode" in xobj or "/Mask" in xobj:
+        return False
+    if int(xobj.get("/BitsPerComponent", 8)) != 8:
+        return False
+
+    try:
+        img = pikepdf.PdfImage(xobj).as_pil_image()
+    except Exception:
+        return False
+
+    # Detectar escaneos en blanco y negro antes de suavizarlos al reducir
+    bilevel = bilevel and _is_bilevel(img)
+    width, height = img.size
+    place_w, place_h = placement
+    if target_dpi and place_w > 0 and place_h > 0:
+        effective_dpi = min(width / (place_w / 72), height / (place_h / 72))
+        if effective_dpi > target_dpi * _DOWNSAMPLE_THRESHOLD:
+            scale = target_dpi / effective_dpi
+            new_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            img = img.resize(new_size, Image.LANCZOS)
+
+    data, filter_name, colorspace, bpc = _encode_pdf_image(img, quality, image_format, bilevel)
+    if len(data) >= len(xobj.read_raw_bytes()):
+        return False
+
+    xobj.write(data, filter=filter_name)
+    xobj.Width = img.width
+    xobj.Height = img.height
+    xobj.BitsPerComponent = bpc
+    xobj.ColorSpace = pikepdf.Name(colorspace)
+    if "/DecodeParms" in xobj:
+        del xobj["/DecodeParms"]
+    return True
+
+
+def compress_pdf(
+    input_pdf: Path,
+    output_pdf: Path,
+    preset: Optional[str] = None,
+    target_dpi: Optional[int] = None,
+    quality: Optional[int] = None,
+    image_format: str = "jpeg",
+    bilevel: Optional[bool] = None
+) -> dict:
+    """Optimiza un PDF; con preset/target_dpi también reduce sus imágenes."""
+    return compress_pdf_with_progress(
+        input_pdf, output_pdf, preset=preset, target_dpi=target_dpi,
+        quality=quality, image_format=image_format, bilevel=bilevel
+    )
+
+
+@_measured("compress-pdf")
 def compress_pdf_with_progress(
     input_pdf: Path,
     output_pdf: Path,
     progress_callback: Optional[ProgressCallback] = None,
-    cancel_check: Optional[CancelCheck] = None
+    cancel_check: Optional[CancelCheck] = None,
+    preset: Optional[str] = None,
+    target_dpi: Optional[int] = None,
+    quality: Optional[int] = None,
+    image_format: str = "jpeg",
+    bilevel: Optional[bool] = None
 ) -> dict:
-    """Optimiza/comprime un PDF."""
+    """Optimiza/comprime un PDF.
+
+    Siempre deduplica imágenes idénticas y comprime los streams. Con un
+    preset (screen/ebook/print) o target_dpi/quality, además reduce las
+    imágenes que superan la resolución objetivo para el tamaño al que se
+    dibujan y las recodifica en JPEG (o JPEG2000 con image_format="jpx").
+    Con bilevel=True los escaneos en blanco y negro se guardan en 1 bit;
+    None usa lo que diga el preset (solo "screen"). El resultado incluye el
+    desglose por etapa en "timings" (ver Timings).
+    """
     import pikepdf
 
+    timings = Timings()
+    if preset:
+        if preset not in PDF_COMPRESSION_PRESETS:
+            raise ValueError(f"Preset desconocido: {preset}")
+        target_dpi = target_dpi or PDF_COMPRESSION_PRESETS[preset]["dpi"]
+        quality = quality or PDF_COMPRESSION_PRESETS[preset]["quality"]
+        if bilevel is None:
+            bilevel = PDF_COMPRESSION_PRESETS[preset]["bilevel"]
+    lossy = bool(target_dpi or quality)
+    quality = quality or 75
+
     original_size = input_pdf.stat().st_size
 
     if progress_callback:
@@ -288,21 +1506,61 @@ def compress_pdf_with_progress(
     if cancel_check and cancel_check():
         raise InterruptedError("Operación cancelada")
 
-    with pikepdf.open(str(input_pdf)) as pdf:
+    with timings.stage("placements"):
+        placements = _image_placements(input_pdf) if lossy else {}
+    images_recompressed = 0
+
+    with timings.stage("open"):
+        pdf = pikepdf.open(str(input_pdf))
+    with pdf:
         if progress_callback:
             progress_callback(1, 3, "Optimizando contenido...")
 
+        with timings.stage("dedupe"):
+            replaced = _dedupe_pdf_images(pdf)
+            images_deduplicated = len(replaced)
+            # La copia que queda se dibuja donde se dibujaba cualquiera de las otras
+            for old_xref, kept_xref in replaced.items():
+                if old_xref in placements:
+                    old_w, old_h = placements.pop(old_xref)
+                    kept_w, kept_h = placements.get(kept_xref, (0.0, 0.0))
+                    placements[kept_xref] = (max(kept_w, old_w), max(kept_h, old_h))
+        if progress_callback and images_deduplicated:
+            progress_callback(1, 3, f"{images_deduplicated} imágenes duplicadas unificadas")
+
+        if lossy:
+            images = {}
+            for xobjects in _iter_xobject_dicts(pdf):
+                for name in list(xobjects.keys()):
+                    xobj = xobjects[name]
+                    if xobj.get("/Subtype") == "/Image":
+                        images[xobj.objgen] = xobj
+
+            total_images = len(images)
+            for i, (objgen, xobj) in enumerate(images.items()):
+                if cancel_check and cancel_check():
+                    raise InterruptedError("Operación cancelada")
+
+                placement = placements.get(objgen[0], (0.0, 0.0))
+                with timings.stage("images"):
+                    if _recompress_pdf_image(xobj, placement, target_dpi, quality, image_format, bool(bilevel)):
+                        images_recompressed += 1
+
+                if progress_callback:
+                    progress_callback(1, 3, f"Imagen {i + 1}/{total_images}")
+
         if cancel_check and cancel_check():
             raise InterruptedError("Operación cancelada")
 
         if progress_callback:
             progress_callback(2, 3, "Guardando PDF optimizado...")
 
-        pdf.save(
-            str(output_pdf),
-            compress_streams=True,
-            object_stream_mode=pikepdf.ObjectStreamMode.generate
-        )
+        with timings.stage("save"):
+            pdf.save(
+                str(output_pdf),
+                compress_streams=True,
+                object_stream_mode=pikepdf.ObjectStreamMode.generate
+            )
 
     new_size = output_pdf.stat().st_size
     reduction = ((original_size - new_size) / original_size) * 100 if original_size > 0 else 0
@@ -313,7 +1571,10 @@ def compress_pdf_with_progress(
     return {
         "original_size": original_size,
         "new_size": new_size,
-        "reduction_percent": max(0, reduction)
+        "reduction_percent": max(0, reduction),
+        "images_recompressed": images_recompressed,
+        "images_deduplicated": images_deduplicated,
+        "timings": timings.as_dict()
     }
 
 
@@ -321,105 +1582,356 @@ def compress_pdf_with_progress(
 # Compresión imágenes DOCX
 # ===========================================================================
 
-def compress_docx_images_with_progress(
-    input_docx: Path,
-    output_docx: Path,
-    quality: int = 75,
-    max_width: Optional[int] = None,
-    max_height: Optional[int] = None,
-    progress_callback: Optional[ProgressCallback] = None,
-    cancel_check: Optional[CancelCheck] = None
-) -> dict:
-    """Comprime las imágenes dentro de un archivo DOCX."""
-    from PIL import Image
+# Formatos vectoriales (o que Pillow no puede recodificar sin perder calidad)
+_DOCX_VECTOR_EXTS = {".emf", ".wmf", ".emz", ".wmz", ".svg", ".eps"}
 
-    original_size = input_docx.stat().st_size
 
-    # Crear directorio temporal
-    with tempfile.TemporaryDirectory() as tmpdir:
-        tmpdir_path = Path(tmpdir)
-        extract_dir = tmpdir_path / "extracted"
+def _recompress_docx_image(
+    data: bytes,
+    quality: int,
+    max_width: Optional[int],
+    max_height: Optional[int],
+    resample: str = "lanczos"
+) -> Optional[bytes]:
+    """Recodifica una imagen de word/media como JPEG (en un proceso del pool).
 
-        if progress_callback:
-            progress_callback(0, 4, "Extrayendo DOCX...")
+    Devuelve los bytes nuevos, o None si la imagen no se puede abrir o el
+    resultado no es más pequeño que el original.
+    """
+    from PIL import Image
 
-        # Extraer DOCX (es un ZIP)
-        with zipfile.ZipFile(str(input_docx), 'r') as zip_ref:
-            zip_ref.extractall(str(extract_dir))
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            # Calcular el tamaño final antes de decodificar (para draft)
+            target = None
+            if max_width or max_height:
+                w, h = img.size
+                new_w, new_h = w, h
+
+                if max_width and w > max_width:
+                    ratio = max_width / w
+                    new_w = max_width
+                    new_h = max(1, int(h * ratio))
+
+                if max_height and new_h > max_height:
+                    ratio = max_height / new_h
+                    new_h = max_height
+                    new_w = max(1, int(new_w * ratio))
+
+                if new_w != w or new_h != h:
+                    target = (new_w, new_h)
+            _draft_image(img, [target])
+
+            # Convertir a RGB si es necesario (JPEG no admite alfa ni paleta)
+            if img.mode not in ('RGB', 'L'):
+                img = img.convert('RGB')
 
+            img = _resize_image(img, target, resample)
+
+            buf = io.BytesIO()
+            img.save(buf, 'JPEG', quality=quality, optimize=True)
+    except Exception:
+        # Si falla, dejar la imagen original
+        return None
+
+    new_data = buf.getvalue()
+    if len(new_data) >= len(data):
+        return None
+    return new_data
+
+
+_JPEG_EXTS = {".jpg", ".jpeg"}
+_RELS_TARGET_RE = re.compile(rb'(\bTarget=")([^"]*)(")')
+_CT_OVERRIDE_RE = re.compile(rb'<Override\b[^>]*/>')
+
+
+def _copy_zip_entry_raw(src: zipfile.ZipFile, dst: zipfile.ZipFile, info: zipfile.ZipInfo) -> None:
+    """Copia una entrada de src a dst sin descomprimirla ni recomprimirla.
+
+    Lee los bytes comprimidos tal cual desde el ZIP de origen (saltando la
+    cabecera local) y los escribe en el destino con una cabecera nueva.
+    ZipFile no tiene API pública para esto, así que se usan sus campos
+    internos del mismo modo que lo hace ZipFile.write.
+    """
+    import struct
+
+    src.fp.seek(info.header_offset)
+    header = struct.unpack(zipfile.structFileHeader, src.fp.read(zipfile.sizeFileHeader))
+    if header[zipfile._FH_SIGNATURE] != zipfile.stringFileHeader:
+        raise zipfile.BadZipFile(f"Cabecera local inválida: {info.filename}")
+    src.fp.seek(header[zipfile._FH_FILENAME_LENGTH] + header[zipfile._FH_EXTRA_FIELD_LENGTH], os.SEEK_CUR)
+
+    new_info = zipfile.ZipInfo(info.filename, info.date_time)
+    new_info.compress_type = info.compress_type
+    new_info.create_system = info.create_system
+    new_info.external_attr = info.external_attr
+    new_info.CRC = info.CRC
+    new_info.compress_size = info.compress_size
+    new_info.file_size = info.file_size
+    # Sin descriptor de datos: tamaños y CRC ya se conocen y van en la cabecera
+    new_info.flag_bits = info.flag_bits & ~0x08
+
+    dst.fp.seek(dst.start_dir)
+    new_info.header_offset = dst.fp.tell()
+    dst.fp.write(new_info.FileHeader())
+
+    remaining = info.compress_size
+    while remaining > 0:
+        chunk = src.fp.read(min(remaining, 1024 * 1024))
+        if not chunk:
+            raise zipfile.BadZipFile(f"Entrada truncada: {info.filename}")
+        dst.fp.write(chunk)
+        remaining -= len(chunk)
+
+    dst.start_dir = dst.fp.tell()
+    dst.filelist.append(new_info)
+    dst.NameToInfo[new_info.filename] = new_info
+    dst._didModify = True
+
+
+def _docx_part_renames(names: list[str], changed: list[str]) -> dict[str, str]:
+    """Nombres nuevos (.jpeg) para las imágenes recodificadas que no eran JPEG."""
+    taken = set(names)
+    renames = {}
+    for name in changed:
+        stem, ext = os.path.splitext(name)
+        if ext.lower() in _JPEG_EXTS:
+            continue
+        new_name = f"{stem}.jpeg"
+        counter = 1
+        while new_name in taken:
+            new_name = f"{stem}_{counter}.jpeg"
+            counter += 1
+        taken.add(new_name)
+        renames[name] = new_name
+    return renames
+
+
+def _update_docx_rels(rels_name: str, data: bytes, renames: dict[str, str]) -> Optional[bytes]:
+    """Actualiza los Target de un .rels que apunten a partes renombradas.
+
+    Los destinos son relativos a la carpeta de la parte origen
+    (p. ej. word/_rels/document.xml.rels -> word/). Devuelve None si no hay
+    cambios.
+    """
+    import posixpath
+
+    base_dir = posixpath.dirname(posixpath.dirname(rels_name))
+    changed = False
+
+    def replace(match: "re.Match[bytes]") -> bytes:
+        nonlocal changed
+        target = match.group(2).decode("utf-8")
+        if "://" in target:
+            return match.group(0)
+        if target.startswith("/"):
+            resolved = target.lstrip("/")
+        else:
+            resolved = posixpath.normpath(posixpath.join(base_dir, target))
+        new_name = renames.get(resolved)
+        if new_name is None:
+            return match.group(0)
+        changed = True
+        new_target = posixpath.join(posixpath.dirname(target), posixpath.basename(new_name))
+        return match.group(1) + new_target.encode("utf-8") + match.group(3)
+
+    new_data = _RELS_TARGET_RE.sub(replace, data)
+    return new_data if changed else None
+
+
+def _update_docx_content_types(data: bytes, renames: dict[str, str]) -> bytes:
+    """Registra la extensión jpeg y corrige los Override de partes renombradas."""
+    overrides = {f"/{old}".encode("utf-8"): f"/{new}".encode("utf-8") for old, new in renames.items()}
+
+    def replace(match: "re.Match[bytes]") -> bytes:
+        element = match.group(0)
+        part = re.search(rb'PartName="([^"]*)"', element)
+        if part is None or part.group(1) not in overrides:
+            return element
+        element = element.replace(part.group(0), b'PartName="' + overrides[part.group(1)] + b'"')
+        return re.sub(rb'ContentType="[^"]*"', b'ContentType="image/jpeg"', element)
+
+    data = _CT_OVERRIDE_RE.sub(replace, data)
+    if not re.search(rb'<Default\b[^>]*Extension="jpeg"', data, re.IGNORECASE):
+        data = data.replace(
+            b"</Types>",
+            b'<Default Extension="jpeg" ContentType="image/jpeg"/></Types>'
+        )
+    return data
+
+
+def _rewrite_docx(
+    src: zipfile.ZipFile,
+    output_docx: Path,
+    replaced: dict[str, bytes],
+    cancel_check: Optional[CancelCheck] = None
+) -> None:
+    """Escribe un DOCX nuevo a partir de src cambiando solo las imágenes dadas.
+
+    Las entradas sin cambios se copian comprimidas tal cual; las imágenes
+    recodificadas que no eran JPEG pasan a .jpeg y se actualizan
+    [Content_Types].xml y los .rels que las referencian.
+    """
+    names = src.namelist()
+    renames = _docx_part_renames(names, list(replaced))
+
+    # Partes XML a regenerar por los renombrados
+    rewritten: dict[str, bytes] = {}
+    if renames:
+        for name in names:
+            if name == "[Content_Types].xml":
+                rewritten[name] = _update_docx_content_types(src.read(name), renames)
+            elif name.endswith(".rels"):
+                new_data = _update_docx_rels(name, src.read(name), renames)
+                if new_data is not None:
+                    rewritten[name] = new_data
+
+    with zipfile.ZipFile(str(output_docx), "w") as dst:
+        for info in src.infolist():
+            if cancel_check and cancel_check():
+                raise InterruptedError("Operación cancelada")
+
+            name = info.filename
+            if name in replaced:
+                # JPEG ya está comprimido: guardarlo sin deflate
+                new_info = zipfile.ZipInfo(renames.get(name, name), info.date_time)
+                new_info.compress_type = zipfile.ZIP_STORED
+                dst.writestr(new_info, replaced[name])
+            elif name in rewritten:
+                new_info = zipfile.ZipInfo(name, info.date_time)
+                new_info.compress_type = zipfile.ZIP_DEFLATED
+                dst.writestr(new_info, rewritten[name])
+            else:
+                _copy_zip_entry_raw(src, dst, info)
+
+
+def compress_docx_images(
+    input_docx: Path,
+    output_docx: Path,
+    quality: int = 75,
+    max_width: Optional[int] = None,
+    max_height: Optional[int] = None,
+    workers: int = 1,
+    resample: str = "lanczos"
+) -> dict:
+    """Comprime las imágenes dentro de un DOCX."""
+    return compress_docx_images_with_progress(
+        input_docx, output_docx, quality=quality, max_width=max_width,
+        max_height=max_height, workers=workers, resample=resample
+    )
+
+
+@_measured("compress-docx")
+def compress_docx_images_with_progress(
+    input_docx: Path,
+    output_docx: Path,
+    quality: int = 75,
+    max_width: Optional[int] = None,
+    max_height: Optional[int] = None,
+    progress_callback: Optional[ProgressCallback] = None,
+    cancel_check: Optional[CancelCheck] = None,
+    workers: int = 1,
+    resample: str = "lanczos"
+) -> dict:
+    """Comprime las imágenes dentro de un archivo DOCX.
+
+    Con workers > 1 las imágenes se recodifican en paralelo en varios
+    procesos. Se omiten los formatos vectoriales (EMF/WMF/SVG) y se conserva
+    el original cuando la versión recodificada no ocupa menos. El resto del
+    paquete se copia sin recomprimir (ver _rewrite_docx). Al reducir con
+    max_width/max_height, resample elige el filtro (ver RESAMPLE_FILTERS).
+    El resultado incluye el desglose por etapa en "timings" (ver Timings).
+    """
+    _resample_filter(resample)
+    original_size = input_docx.stat().st_size
+    timings = Timings()
+
+    def check_cancel() -> None:
         if cancel_check and cancel_check():
             raise InterruptedError("Operación cancelada")
 
-        # Buscar imágenes
-        media_dir = extract_dir / "word" / "media"
-        images_processed = 0
-
-        if media_dir.exists():
-            image_files = list(media_dir.glob("*"))
-            total_images = len(image_files)
+    if progress_callback:
+        progress_callback(0, 4, "Leyendo DOCX...")
 
-            if progress_callback:
-                progress_callback(1, 4, f"Comprimiendo {total_images} imágenes...")
+    with zipfile.ZipFile(str(input_docx), 'r') as src:
+        # Buscar imágenes
+        image_names = [
+            info.filename for info in src.infolist()
+            if info.filename.startswith("word/media/") and not info.is_dir()
+            and os.path.splitext(info.filename)[1].lower() not in _DOCX_VECTOR_EXTS
+        ]
+        total_images = len(image_names)
+        # Solo se guardan en memoria las imágenes recodificadas (ya más pequeñas)
+        replaced: dict[str, bytes] = {}
 
-            for i, img_path in enumerate(image_files):
-                if cancel_check and cancel_check():
-                    raise InterruptedError("Operación cancelada")
+        if progress_callback:
+            progress_callback(1, 4, f"Comprimiendo {total_images} imágenes...")
 
-                try:
-                    # Abrir imagen
-                    with Image.open(img_path) as img:
-                        # Convertir a RGB si es necesario
-                        if img.mode in ('RGBA', 'P'):
-                            img = img.convert('RGB')
-
-                        # Redimensionar si se especificó
-                        if max_width or max_height:
-                            w, h = img.size
-                            new_w, new_h = w, h
-
-                            if max_width and w > max_width:
-                                ratio = max_width / w
-                                new_w = max_width
-                                new_h = int(h * ratio)
-
-                            if max_height and new_h > max_height:
-                                ratio = max_height / new_h
-                                new_h = max_height
-                                new_w = int(new_w * ratio)
-
-                            if new_w != w or new_h != h:
-                                img = img.resize((new_w, new_h), Image.LANCZOS)
-
-                        # Guardar como JPEG comprimido
-                        new_path = img_path.with_suffix('.jpeg')
-                        img.save(str(new_path), 'JPEG', quality=quality, optimize=True)
-
-                        # Eliminar original si es diferente
-                        if new_path != img_path:
-                            img_path.unlink()
-
-                        images_processed += 1
-
-                except Exception:
-                    # Si falla, dejar la imagen original
-                    pass
+        done_count = 0
 
-                if progress_callback and total_images > 0:
-                    progress_callback(1, 4, f"Imagen {i + 1}/{total_images}")
+        def store(name: str, new_data: Optional[bytes]) -> None:
+            nonlocal done_count
+            if new_data is not None:
+                replaced[name] = new_data
+            done_count += 1
+            if progress_callback:
+                progress_callback(1, 4, f"Imagen {done_count}/{total_images}")
+
+        if workers <= 1 or total_images < 2:
+            for name in image_names:
+                check_cancel()
+                with timings.stage("read"):
+                    data = src.read(name)
+                with timings.stage("recompress"):
+                    new_data = _recompress_docx_image(data, quality, max_width, max_height, resample)
+                store(name, new_data)
+        else:
+            from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+            # Como mucho 2 imágenes por proceso en vuelo para acotar memoria
+            max_in_flight = workers * 2
+            executor = ProcessPoolExecutor(max_workers=min(workers, total_images))
+            try:
+                pending = {}
+                queue = iter(image_names)
+                exhausted = False
+                while pending or not exhausted:
+                    while not exhausted and len(pending) < max_in_flight:
+                        name = next(queue, None)
+                        if name is None:
+                            exhausted = True
+                            break
+                        with timings.stage("read"):
+                            data = src.read(name)
+                        future = executor.submit(
+                            _recompress_docx_image, data,
+                            quality, max_width, max_height, resample
+                        )
+                        pending[future] = name
+
+                    check_cancel()
+                    with timings.stage("wait_pool"):
+                        done, _ = wait(list(pending), timeout=0.2, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        store(pending.pop(future), future.result())
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
 
         if progress_callback:
             progress_callback(2, 4, "Reempaquetando DOCX...")
 
-        if cancel_check and cancel_check():
-            raise InterruptedError("Operación cancelada")
+        check_cancel()
+        # Escribir a un temporal y renombrar al cerrar la entrada: la salida
+        # puede ser el mismo archivo de entrada
+        tmp_path = output_docx.with_name(f"{output_docx.name}.{os.getpid()}.tmp")
+        try:
+            with timings.stage("rewrite_zip"):
+                _rewrite_docx(src, tmp_path, replaced, cancel_check)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
 
-        # Crear nuevo DOCX
-        with zipfile.ZipFile(str(output_docx), 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for root, dirs, files in os.walk(str(extract_dir)):
-                for file in files:
-                    file_path = Path(root) / file
-                    arcname = file_path.relative_to(extract_dir)
-                    zipf.write(str(file_path), str(arcname))
+    os.replace(tmp_path, output_docx)
 
     if progress_callback:
         progress_callback(4, 4, "Compresión completada")
@@ -431,7 +1943,8 @@ def compress_docx_images_with_progress(
         "original_size": original_size,
         "new_size": new_size,
         "reduction_percent": max(0, reduction),
-        "images_processed": images_processed
+        "images_processed": len(replaced),
+        "timings": timings.as_dict()
     }
 
 
@@ -439,6 +1952,120 @@ def compress_docx_images_with_progress(
 # Conversión de Imágenes
 # ===========================================================================
 
+def _image_ext(output_format: str) -> str:
+    """Extensión de archivo para un formato de salida (jpeg -> jpg)."""
+    ext = output_format.lower()
+    return "jpg" if ext == "jpeg" else ext
+
+
+def _prepare_image_mode(img: Any, output_format: str) -> Any:
+    """Convierte el modo de color al que admite el formato de salida."""
+    from PIL import Image
+
+    # Para ICO necesitamos RGBA
+    if output_format.lower() == "ico":
+        if img.mode != 'RGBA':
+            img = img.convert('RGBA')
+    # Para JPEG necesitamos RGB
+    elif output_format.lower() in ('jpg', 'jpeg'):
+        if img.mode in ('RGBA', 'P', 'LA'):
+            background = Image.new('RGB', img.size, (255, 255, 255))
+            if img.mode == 'P':
+                img = img.convert('RGBA')
+            background.paste(img, mask=img.split()[-1] if 'A' in img.mode else None)
+            img = background
+        elif img.mode != 'RGB':
+            img = img.convert('RGB')
+    return img
+
+
+def _resample_filter(name: str) -> int:
+    """Filtro de Pillow para un nombre de RESAMPLE_FILTERS."""
+    from PIL import Image
+
+    if name not in RESAMPLE_FILTERS:
+        raise ValueError(f"Filtro no válido: {name} (usa {', '.join(RESAMPLE_FILTERS)})")
+    return getattr(Image, name.upper())
+
+
+def _target_size(
+    size: tuple[int, int],
+    resize: Optional[tuple[int, int]],
+    maintain_aspect: bool
+) -> Optional[tuple[int, int]]:
+    """Tamaño final según resize, o None si no hay que redimensionar.
+
+    Con maintain_aspect solo reduce y conserva la proporción.
+    """
+    if not resize:
+        return None
+    target_w, target_h = resize
+    orig_w, orig_h = size
+
+    if maintain_aspect:
+        ratio_w = target_w / orig_w if target_w > 0 else float('inf')
+        ratio_h = target_h / orig_h if target_h > 0 else float('inf')
+        ratio = min(ratio_w, ratio_h)
+
+        if ratio < 1:  # Solo reducir, no ampliar
+            return max(1, int(orig_w * ratio)), max(1, int(orig_h * ratio))
+    elif target_w > 0 and target_h > 0 and (target_w, target_h) != (orig_w, orig_h):
+        return target_w, target_h
+    return None
+
+
+def _draft_image(img: Any, targets: list[Optional[tuple[int, int]]]) -> None:
+    """Si todas las salidas se reducen, decodifica el JPEG ya escalado.
+
+    Image.draft hace que libjpeg decodifique a 1/2, 1/4 o 1/8 sin quedar
+    por debajo del mayor tamaño pedido, mucho más rápido que decodificar la
+    foto entera. Hay que llamarlo antes de cargar la imagen; en otros
+    formatos no hace nada.
+    """
+    if not targets or any(target is None for target in targets):
+        return
+    img.draft(None, (max(t[0] for t in targets), max(t[1] for t in targets)))
+
+
+def _resize_image(img: Any, target: Optional[tuple[int, int]], resample: str = "lanczos") -> Any:
+    """Redimensiona a target con el filtro elegido.
+
+    Con reducing_gap Pillow reduce primero por bloques hasta quedar a
+    _REDUCING_GAP veces el tamaño final y solo aplica el filtro al final.
+    """
+    if target is None or target == img.size:
+        return img
+    return img.resize(target, _resample_filter(resample), reducing_gap=_REDUCING_GAP)
+
+
+def _save_image(img: Any, output_path: Path, output_format: str, quality: int, optimize: bool = True) -> None:
+    """Guarda la imagen con las opciones propias de cada formato.
+
+    optimize=False evita la pasada extra de PNG/JPEG optimizado (varias veces
+    más lenta en PNG), p. ej. al extraer imágenes.
+    """
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    save_kwargs: dict[str, Any] = {}
+
+    if output_format.lower() in ('jpg', 'jpeg'):
+        save_kwargs['quality'] = quality
+        save_kwargs['optimize'] = optimize
+    elif output_format.lower() == 'png':
+        save_kwargs['optimize'] = optimize
+    elif output_format.lower() == 'webp':
+        save_kwargs['quality'] = quality
+    elif output_format.lower() == 'ico':
+        # ICO tiene tamaños específicos
+        sizes = [(256, 256), (128, 128), (64, 64), (48, 48), (32, 32), (16, 16)]
+        img.save(str(output_path), format='ICO', sizes=sizes)
+        return
+
+    pil_format = 'JPEG' if output_format.lower() in ('jpg', 'jpeg') else output_format.upper()
+    img.save(str(output_path), format=pil_format, **save_kwargs)
+
+
+@_measured("convert-image")
 def convert_image(
     input_path: Path,
     output_path: Path,
@@ -446,70 +2073,78 @@ def convert_image(
     quality: int = 95,
     resize: Optional[tuple[int, int]] = None,
     maintain_aspect: bool = True,
-    overwrite: bool = False
+    overwrite: bool = False,
+    resample: str = "lanczos"
 ) -> None:
-    """Convierte una imagen a otro formato."""
+    """Convierte una imagen a otro formato.
+
+    resample elige el filtro de reducción (ver RESAMPLE_FILTERS), de más
+    calidad a más rápido.
+    """
     if output_path.exists() and not overwrite:
         raise FileExistsError(f"El archivo ya existe: {output_path}")
 
     from PIL import Image
 
     with Image.open(input_path) as img:
-        # Convertir modo si es necesario
-        original_mode = img.mode
-
-        # Para ICO necesitamos RGBA
-        if output_format.lower() == "ico":
-            if img.mode != 'RGBA':
-                img = img.convert('RGBA')
-        # Para JPEG necesitamos RGB
-        elif output_format.lower() in ('jpg', 'jpeg'):
-            if img.mode in ('RGBA', 'P', 'LA'):
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                background.paste(img, mask=img.split()[-1] if 'A' in img.mode else None)
-                img = background
-            elif img.mode != 'RGB':
-                img = img.convert('RGB')
+        target = _target_size(img.size, resize, maintain_aspect)
+        _draft_image(img, [target])
+        img = _prepare_image_mode(img, output_format)
+        img = _resize_image(img, target, resample)
+        _save_image(img, output_path, output_format, quality)
+
+
+def image_output_paths(input_path: Path, output_dir: Path, outputs: list[dict]) -> list[Path]:
+    """Rutas de salida de convert_image_multi: <stem><suffix>.<ext> en output_dir."""
+    paths = [
+        output_dir / f"{input_path.stem}{spec.get('suffix', '')}.{_image_ext(spec['format'])}"
+        for spec in outputs
+    ]
+    if len(set(paths)) != len(paths):
+        raise ValueError("Dos salidas tienen el mismo nombre; usa un 'suffix' distinto en cada una")
+    return paths
+
+
+@_measured("convert-image")
+def convert_image_multi(
+    input_path: Path,
+    output_dir: Path,
+    outputs: list[dict],
+    overwrite: bool = False
+) -> list[Path]:
+    """Decodifica una imagen una sola vez y escribe varias salidas.
 
-        # Redimensionar si se especificó
-        if resize:
-            target_w, target_h = resize
-            orig_w, orig_h = img.size
+    Cada salida es un dict con "format" y, opcionalmente, "quality" (95),
+    "resize" ((ancho, alto)), "maintain_aspect" (True), "resample"
+    ("lanczos") y "suffix" para el nombre, p. ej. una WebP, una miniatura
+    JPEG y un ICO::
 
-            if maintain_aspect:
-                ratio_w = target_w / orig_w if target_w > 0 else float('inf')
-                ratio_h = target_h / orig_h if target_h > 0 else float('inf')
-                ratio = min(ratio_w, ratio_h)
+        [{"format": "webp", "quality": 80},
+         {"format": "jpeg", "quality": 85, "resize": (256, 256), "suffix": "_thumb"},
+         {"format": "ico"}]
 
-                if ratio < 1:  # Solo reducir, no ampliar
-                    new_w = int(orig_w * ratio)
-                    new_h = int(orig_h * ratio)
-                    img = img.resize((new_w, new_h), Image.LANCZOS)
-            else:
-                if target_w > 0 and target_h > 0:
-                    img = img.resize((target_w, target_h), Image.LANCZOS)
+    Devuelve las rutas escritas (ver image_output_paths).
+    """
+    paths = image_output_paths(input_path, output_dir, outputs)
+    if not overwrite:
+        for path in paths:
+            if path.exists():
+                raise FileExistsError(f"El archivo ya existe: {path}")
 
-        # Guardar
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-
-        save_kwargs: dict[str, Any] = {}
-
-        if output_format.lower() in ('jpg', 'jpeg'):
-            save_kwargs['quality'] = quality
-            save_kwargs['optimize'] = True
-        elif output_format.lower() == 'png':
-            save_kwargs['optimize'] = True
-        elif output_format.lower() == 'webp':
-            save_kwargs['quality'] = quality
-        elif output_format.lower() == 'ico':
-            # ICO tiene tamaños específicos
-            sizes = [(256, 256), (128, 128), (64, 64), (48, 48), (32, 32), (16, 16)]
-            img.save(str(output_path), format='ICO', sizes=sizes)
-            return
+    from PIL import Image
 
-        img.save(str(output_path), format=output_format.upper(), **save_kwargs)
+    with Image.open(input_path) as src:
+        targets = [
+            _target_size(src.size, spec.get("resize"), spec.get("maintain_aspect", True))
+            for spec in outputs
+        ]
+        _draft_image(src, targets)
+        src.load()
+        for spec, path, target in zip(outputs, paths, targets):
+            img = _prepare_image_mode(src, spec["format"])
+            img = _resize_image(img, target, spec.get("resample", "lanczos"))
+            _save_image(img, path, spec["format"], spec.get("quality", 95))
+    return paths
 
 
 def get_image_info(input_path: Path) -> dict:
@@ -541,49 +2176,146 @@ def get_image_info(input_path: Path) -> dict:
     }
 
 
+def _call_with_metrics(func: Callable, *args: Any) -> tuple[Any, dict]:
+    """Ejecuta func(*args) en un proceso del pool y devuelve (resultado, delta de metrics).
+
+    Si func falla, el delta viaja en el atributo metrics_delta de la excepción.
+    """
+    snapshot = metrics.REGISTRY.snapshot()
+    try:
+        result = func(*args)
+    except Exception as e:
+        e.metrics_delta = metrics.REGISTRY.delta(snapshot)
+        raise
+    return result, metrics.REGISTRY.delta(snapshot)
+
+
+def _map_bounded(
+    func: Callable,
+    jobs: Any,
+    workers: int,
+    on_done: Callable[[Any, Any, Optional[Exception]], None],
+    check_cancel: Callable[[], None]
+) -> None:
+    """Ejecuta func(*args) por cada (clave, args) de jobs, en serie o en un pool.
+
+    Con workers > 1 usa un pool de procesos con como mucho 2 trabajos por
+    proceso en vuelo, así jobs puede ser un generador perezoso sin que la
+    memoria crezca con el total. on_done(clave, resultado, error) se llama en
+    este proceso al terminar cada trabajo; check_cancel se consulta entre
+    trabajos y cada 200 ms. Lo que func registre en metrics dentro del pool
+    se suma al registro de este proceso.
+    """
+    if workers <= 1:
+        for key, args in jobs:
+            check_cancel()
+            try:
+                result = func(*args)
+            except Exception as e:
+                on_done(key, None, e)
+            else:
+                on_done(key, result, None)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+    max_in_flight = workers * 2
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        pending = {}
+        queue = iter(jobs)
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < max_in_flight:
+                job = next(queue, None)
+                if job is None:
+                    exhausted = True
+                    break
+                key, args = job
+                pending[executor.submit(_call_with_metrics, func, *args)] = key
+
+            check_cancel()
+            if not pending:
+                continue
+            done, _ = wait(list(pending), timeout=0.2, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = pending.pop(future)
+                try:
+                    result, delta = future.result()
+                except Exception as e:
+                    metrics.REGISTRY.merge(getattr(e, "metrics_delta", None))
+                    on_done(key, None, e)
+                else:
+                    metrics.REGISTRY.merge(delta)
+                    on_done(key, result, None)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
 def batch_convert_images(
     input_files: list[Path],
     output_dir: Path,
-    output_format: str,
+    output_format: Optional[str] = None,
     quality: int = 95,
     resize: Optional[tuple[int, int]] = None,
     maintain_aspect: bool = True,
     overwrite: bool = False,
     progress_callback: Optional[ProgressCallback] = None,
-    cancel_check: Optional[CancelCheck] = None
+    cancel_check: Optional[CancelCheck] = None,
+    workers: int = 1,
+    outputs: Optional[list[dict]] = None,
+    resample: str = "lanczos"
 ) -> dict:
-    """Convierte múltiples imágenes en lote."""
+    """Convierte múltiples imágenes en lote.
+
+    Con outputs (ver convert_image_multi) cada imagen se decodifica una vez y
+    se escriben todas sus salidas; si no, se usa una sola salida con
+    output_format/quality/resize/resample. Con workers > 1 las imágenes se convierten
+    en paralelo en varios procesos. Devuelve {"total", "converted",
+    "outputs", "errors"}, con errors como lista de (nombre, mensaje).
+    """
+    if outputs is None:
+        if not output_format:
+            raise ValueError("Indica output_format u outputs")
+        outputs = [{
+            "format": output_format, "quality": quality,
+            "resize": resize, "maintain_aspect": maintain_aspect, "resample": resample,
+        }]
+    # Detectar nombres repetidos y filtros no válidos antes de empezar
+    for spec in outputs:
+        _resample_filter(spec.get("resample", "lanczos"))
+    image_output_paths(Path("imagen"), output_dir, outputs)
     output_dir.mkdir(parents=True, exist_ok=True)
 
     total = len(input_files)
     converted = 0
+    written = 0
     errors = []
 
-    for i, input_path in enumerate(input_files):
+    def check_cancel() -> None:
         if cancel_check and cancel_check():
             raise InterruptedError("Operación cancelada")
 
+    def store(input_path: Path, paths: Optional[list[Path]], error: Optional[Exception]) -> None:
+        nonlocal converted, written
+        if error is None:
+            converted += 1
+            written += len(paths)
+        else:
+            errors.append((input_path.name, str(error)))
         if progress_callback:
-            progress_callback(i + 1, total, f"Convirtiendo {input_path.name}")
+            progress_callback(converted + len(errors), total, f"Convertida {input_path.name}")
 
-        try:
-            ext = output_format.lower()
-            if ext == "jpeg":
-                ext = "jpg"
-            output_path = output_dir / f"{input_path.stem}.{ext}"
-
-            convert_image(
-                input_path, output_path, output_format,
-                quality, resize, maintain_aspect, overwrite
-            )
-            converted += 1
-
-        except Exception as e:
-            errors.append((input_path.name, str(e)))
+    _map_bounded(
+        convert_image_multi,
+        ((path, (path, output_dir, outputs, overwrite)) for path in input_files),
+        min(workers, total), store, check_cancel
+    )
 
     return {
         "total": total,
         "converted": converted,
+        "outputs": written,
         "errors": errors
     }
 
@@ -592,49 +2324,293 @@ def batch_convert_images(
 # Extracción de imágenes
 # ===========================================================================
 
+# Filtros cuyo stream es un archivo de imagen completo que PIL abre tal cual
+_PDF_ENCODED_FILTERS = {"DCTDecode": "jpeg", "JPXDecode": "jpx"}
+
+
+def _pdf_image_native_ext(image_filter: str) -> str:
+    """Extensión que devuelve extract_image para una imagen con ese filtro."""
+    return _PDF_ENCODED_FILTERS.get(image_filter, "png")
+
+
+def _pdf_image_bytes(doc: Any, xref: int) -> tuple[bytes, str]:
+    """Bytes de la imagen xref tal como se guardan sin recodificar, y su extensión.
+
+    extract_image devuelve el stream original si es JPEG/JPX y PNG si no;
+    JBIG2 y similares se pasan por un Pixmap.
+    """
+    import fitz
+
+    info = doc.extract_image(xref)
+    ext = (info.get("ext") or "").lower()
+    if info.get("image") and ext in ("png", "jpeg", "jpg", "jpx", "jp2"):
+        return info["image"], ext
+    pix = fitz.Pixmap(doc, xref)
+    if pix.colorspace and pix.colorspace.n not in (1, 3):
+        pix = fitz.Pixmap(fitz.csRGB, pix)
+    return pix.tobytes("png"), "png"
+
+
+def _pdf_image_source(doc: Any, xref: int, image_filter: str) -> tuple:
+    """Lo mínimo para reconstruir la imagen xref en otro proceso.
+
+    JPEG y JPX viajan comprimidos (hay que decodificarlos igualmente); el
+    resto viaja como muestras crudas de un Pixmap, sin pasar por PNG.
+    """
+    import fitz
+
+    if image_filter in _PDF_ENCODED_FILTERS:
+        info = doc.extract_image(xref)
+        if info.get("image") and info.get("ext") in ("jpeg", "jpx"):
+            return ("encoded", info["image"])
+    pix = fitz.Pixmap(doc, xref)
+    if pix.colorspace and pix.colorspace.n not in (1, 3):
+        pix = fitz.Pixmap(fitz.csRGB, pix)
+    return ("raw", pix.samples, pix.width, pix.height, _pixmap_mode(pix), pix.stride)
+
+
+def _open_pdf_image(source: tuple) -> Any:
+    """Imagen PIL a partir de lo que devuelve _pdf_image_source."""
+    from PIL import Image
+
+    if source[0] == "encoded":
+        img = Image.open(io.BytesIO(source[1]))
+        img.load()
+        return img
+    _, samples, width, height, mode, stride = source
+    return Image.frombuffer(mode, (width, height), samples, "raw", mode, stride, 1)
+
+
+def _transcode_pdf_image(
+    source: tuple,
+    mask_source: Optional[tuple],
+    output_path: Path,
+    output_format: str
+) -> None:
+    """Decodifica una imagen extraída de un PDF, aplica su SMask y la guarda.
+
+    Se ejecuta en un proceso del pool; recibe lo que devuelve _pdf_image_source.
+    """
+    from PIL import Image
+
+    img = _open_pdf_image(source)
+    if mask_source is not None:
+        mask = _open_pdf_image(mask_source).convert("L")
+        if mask.size != img.size:
+            mask = mask.resize(img.size, Image.BILINEAR)
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        img = img.convert("RGBA" if img.mode == "RGB" else "LA")
+        img.putalpha(mask)
+    elif img.mode == "CMYK" and output_format.lower() not in ("jpg", "jpeg", "tiff"):
+        img = img.convert("RGB")
+    img = _prepare_image_mode(img, output_format)
+    _save_image(img, output_path, output_format, 95, optimize=False)
+
+
 def extract_images_from_pdf(
     input_pdf: Path,
     output_dir: Path,
     output_format: str = "png"
 ) -> list[Path]:
     """Extrae todas las imágenes de un PDF."""
+    return extract_images_from_pdf_with_progress(input_pdf, output_dir, output_format)["extracted"]
+
+
+@_measured("extract-pdf")
+def extract_images_from_pdf_with_progress(
+    input_pdf: Path,
+    output_dir: Path,
+    output_format: str = "png",
+    progress_callback: Optional[ProgressCallback] = None,
+    cancel_check: Optional[CancelCheck] = None,
+    workers: int = 1
+) -> dict:
+    """Extrae las imágenes de un PDF, cada una una sola vez.
+
+    Una imagen usada en muchas páginas comparte xref y se extrae una vez; las
+    incrustadas varias veces con el mismo contenido se detectan por hash del
+    stream. Si el formato nativo coincide con output_format (p. ej. JPEG a
+    jpg) y no tiene máscara, se escriben los bytes originales sin recodificar.
+    El resto se decodifica, se le aplica la SMask como canal alfa y se
+    guarda, en paralelo con workers > 1. Devuelve {"extracted": rutas en
+    orden de aparición, "native": n, "transcoded": n, "duplicates": n,
+    "errors": [(xref, mensaje)]}.
+    """
     import fitz
-    from PIL import Image
-    from io import BytesIO
+    import hashlib
 
+    fmt = output_format.lower()
+    ext = _image_ext(fmt)
     output_dir.mkdir(parents=True, exist_ok=True)
-    extracted = []
 
-    doc = fitz.open(str(input_pdf))
+    def check_cancel() -> None:
+        if cancel_check and cancel_check():
+            raise InterruptedError("Operación cancelada")
 
+    doc = fitz.open(str(input_pdf))
     try:
-        img_count = 0
-        for page_num in range(doc.page_count):
-            page = doc[page_num]
-            image_list = page.get_images()
+        # 1) Imágenes únicas por xref, en orden de aparición. Las usadas como
+        # SMask de otra se aplican a esa y no se extraen solas.
+        xrefs: list[int] = []
+        smasks: dict[int, int] = {}
+        geometry: dict[int, tuple] = {}
+        seen = set()
+        counts = {"native": 0, "transcoded": 0, "duplicates": 0}
+        for page in doc:
+            check_cancel()
+            for item in page.get_images(full=True):
+                xref, smask = item[0], item[1]
+                if xref in seen:
+                    counts["duplicates"] += 1
+                    continue
+                seen.add(xref)
+                xrefs.append(xref)
+                # ancho, alto, bpc, espacio de color y filtro
+                geometry[xref] = (*item[2:6], item[8])
+                if smask:
+                    smasks[xref] = smask
+        mask_xrefs = set(smasks.values())
+        xrefs = [x for x in xrefs if x not in mask_xrefs]
+        total = len(xrefs)
+
+        extracted: dict[int, Path] = {}
+        errors: list[tuple[int, str]] = []
+        hashes: dict[str, int] = {}
+
+        processed = 0
+
+        def report() -> None:
+            nonlocal processed
+            processed += 1
+            if progress_callback:
+                progress_callback(processed, total, f"Imagen {processed}/{total}")
 
-            for img_index, img in enumerate(image_list):
-                xref = img[0]
-                base_image = doc.extract_image(xref)
-                image_bytes = base_image["image"]
+        def on_done(xref: int, _result: Any, error: Optional[Exception]) -> None:
+            if error is None:
+                counts["transcoded"] += 1
+            else:
+                failed = extracted.pop(xref)
+                for other in [x for x, p in extracted.items() if p == failed]:
+                    del extracted[other]
+                errors.append((xref, str(error)))
+            report()
+
+        def jobs():
+            number = 0
+            for xref in xrefs:
+                check_cancel()
+                smask = smasks.get(xref)
+                try:
+                    # 2) Mismo contenido con otro xref: se extrae una vez
+                    digest = hashlib.sha1(repr(geometry[xref]).encode())
+                    digest.update(doc.xref_stream_raw(xref) or b"")
+                    if smask:
+                        digest.update(doc.xref_stream_raw(smask) or b"")
+                    key = digest.hexdigest()
+                    if hashes.get(key) in extracted:
+                        extracted[xref] = extracted[hashes[key]]
+                        counts["duplicates"] += 1
+                        report()
+                        continue
+                    hashes[key] = xref
+
+                    number += 1
+                    output_path = output_dir / f"imagen_{number:04d}.{ext}"
+                    extracted[xref] = output_path
+                    # 3) Mismo formato y sin máscara: copiar el stream tal cual
+                    image_filter = geometry[xref][-1]
+                    if not smask and _image_ext(_pdf_image_native_ext(image_filter)) == ext:
+                        data, native_ext = _pdf_image_bytes(doc, xref)
+                        if _image_ext(native_ext) == ext:
+                            output_path.write_bytes(data)
+                            counts["native"] += 1
+                            report()
+                            continue
+                    source = _pdf_image_source(doc, xref, image_filter)
+                    mask_source = _pdf_image_source(doc, smask, "") if smask else None
+                except (RuntimeError, ValueError) as e:
+                    extracted.pop(xref, None)
+                    errors.append((xref, str(e)))
+                    report()
+                    continue
+                yield xref, (source, mask_source, output_path, fmt)
+
+        _map_bounded(_transcode_pdf_image, jobs(), workers, on_done, check_cancel)
+    finally:
+        doc.close()
 
-                # Convertir a formato deseado
-                pil_img = Image.open(BytesIO(image_bytes))
+    # Rutas únicas en orden de aparición (los duplicados apuntan a la primera)
+    paths = []
+    for xref in xrefs:
+        path = extracted.get(xref)
+        if path is not None and path not in paths:
+            paths.append(path)
+    return {
+        "extracted": paths,
+        "native": counts["native"],
+        "transcoded": counts["transcoded"],
+        "duplicates": counts["duplicates"],
+        "errors": errors,
+    }
 
-                if output_format.lower() in ('jpg', 'jpeg') and pil_img.mode in ('RGBA', 'P'):
-                    pil_img = pil_img.convert('RGB')
 
-                img_count += 1
-                ext = "jpg" if output_format.lower() == "jpeg" else output_format.lower()
-                output_path = output_dir / f"imagen_{img_count:04d}.{ext}"
+# Tamaño de bloque al copiar imágenes del ZIP a disco
+_ZIP_COPY_CHUNK = 1024 * 1024
 
-                pil_img.save(str(output_path))
-                extracted.append(output_path)
 
-    finally:
-        doc.close()
+def _normalize_image_types(types: Optional[Any]) -> Optional[set[str]]:
+    """Extensiones admitidas en minúsculas y sin punto (jpeg equivale a jpg)."""
+    if not types:
+        return None
+    normalized = {t.lower().lstrip(".") for t in types}
+    if normalized & {"jpg", "jpeg"}:
+        normalized |= {"jpg", "jpeg"}
+    return normalized
+
 
-    return extracted
+def _file_sha1(path: Path) -> str:
+    """SHA-1 de un archivo leído por bloques."""
+    import hashlib
+
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_ZIP_COPY_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _zip_member_sha1(zipf: zipfile.ZipFile, info: zipfile.ZipInfo) -> str:
+    """SHA-1 del contenido descomprimido de una entrada del ZIP, por bloques."""
+    import hashlib
+
+    digest = hashlib.sha1()
+    with zipf.open(info) as src:
+        for chunk in iter(lambda: src.read(_ZIP_COPY_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _docx_member_is_duplicate(
+    zipf: zipfile.ZipFile,
+    info: zipfile.ZipInfo,
+    seen: dict[tuple[int, int], list[list]]
+) -> bool:
+    """Indica si la entrada ya se extrajo con el mismo contenido.
+
+    El CRC y el tamaño vienen en el directorio del ZIP; solo cuando coinciden
+    se calcula el SHA-1 para descartar colisiones.
+    """
+    candidates = seen.get((info.CRC, info.file_size))
+    if not candidates:
+        return False
+    digest = _zip_member_sha1(zipf, info)
+    for candidate in candidates:
+        if candidate[1] is None:
+            candidate[1] = _file_sha1(candidate[0])
+        if candidate[1] == digest:
+            return True
+    return False
 
 
 def extract_images_from_docx(
@@ -642,18 +2618,1388 @@ def extract_images_from_docx(
     output_dir: Path
 ) -> list[Path]:
     """Extrae todas las imágenes de un archivo DOCX."""
-    output_dir.mkdir(parents=True, exist_ok=True)
-    extracted = []
+    return extract_images_from_docx_with_progress(input_docx, output_dir, dedupe=False)["extracted"]
 
-    with zipfile.ZipFile(str(input_docx), 'r') as zipf:
-        for name in zipf.namelist():
-            if name.startswith("word/media/"):
-                # Extraer imagen
-                img_data = zipf.read(name)
-                img_name = Path(name).name
-                output_path = output_dir / img_name
 
-                output_path.write_bytes(img_data)
+@_measured("extract-docx")
+def extract_images_from_docx_with_progress(
+    input_docx: Path,
+    output_dir: Path,
+    min_size: int = 0,
+    types: Optional[Any] = None,
+    dedupe: bool = True,
+    progress_callback: Optional[ProgressCallback] = None,
+    cancel_check: Optional[CancelCheck] = None
+) -> dict:
+    """Extrae las imágenes de word/media/ copiándolas a disco por bloques.
+
+    Ninguna imagen se carga entera en memoria, así que sirve para DOCX con
+    gigas de contenido incrustado. Se omiten las de menos de min_size bytes y,
+    si se da types (p. ej. ["png", "jpg"]), las de otras extensiones. Con
+    dedupe, las entradas con el mismo CRC y tamaño que una ya extraída se
+    comparan por SHA-1 y solo se escribe la primera. Devuelve {"extracted":
+    rutas, "duplicates": n, "skipped": n, "bytes": bytes escritos}.
+    """
+    allowed = _normalize_image_types(types)
+
+    def check_cancel() -> None:
+        if cancel_check and cancel_check():
+            raise InterruptedError("Operación cancelada")
+
+    extracted: list[Path] = []
+    skipped = 0
+    duplicates = 0
+    written = 0
+    # (crc, tamaño) -> [(ruta extraída, sha1 o None si aún no se calculó)]
+    seen: dict[tuple[int, int], list[list]] = {}
+
+    with zipfile.ZipFile(str(input_docx), "r") as zipf:
+        members = [
+            info for info in zipf.infolist()
+            if info.filename.startswith("word/media/") and not info.is_dir()
+        ]
+        total = len(members)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        for index, info in enumerate(members, 1):
+            check_cancel()
+            # Solo el nombre: evita rutas fuera de output_dir
+            output_path = output_dir / Path(info.filename).name
+            ext = output_path.suffix.lower().lstrip(".")
+
+            if info.file_size < min_size or (allowed is not None and ext not in allowed):
+                skipped += 1
+            elif dedupe and _docx_member_is_duplicate(zipf, info, seen):
+                duplicates += 1
+            else:
+                tmp_path = output_path.with_name(f"{output_path.name}.{os.getpid()}.tmp")
+                try:
+                    with zipf.open(info) as src, open(tmp_path, "wb") as dst:
+                        shutil.copyfileobj(src, dst, _ZIP_COPY_CHUNK)
+                except BaseException:
+                    tmp_path.unlink(missing_ok=True)
+                    raise
+                os.replace(tmp_path, output_path)
                 extracted.append(output_path)
+                written += info.file_size
+                if dedupe:
+                    seen.setdefault((info.CRC, info.file_size), []).append([output_path, None])
+
+            if progress_callback:
+                progress_callback(index, total, f"Imagen {Path(info.filename).name}")
+
+    return {"extracted": extracted, "duplicates": duplicates, "skipped": skipped, "bytes": written}
+
+
+def batch_extract_images_from_docx(
+    input_files: list[Path],
+    output_dir: Path,
+    min_size: int = 0,
+    types: Optional[Any] = None,
+    dedupe: bool = True,
+    workers: int = 1,
+    progress_callback: Optional[ProgressCallback] = None,
+    cancel_check: Optional[CancelCheck] = None
+) -> dict:
+    """Extrae las imágenes de varios DOCX, cada uno en su subcarpeta.
+
+    Las imágenes de cada DOCX van a output_dir/<nombre del DOCX>/ (con
+    sufijo numérico si dos archivos se llaman igual). Con workers > 1 cada
+    DOCX se procesa en su propio proceso. La deduplicación es por archivo.
+    Devuelve {"total", "extracted", "duplicates", "skipped", "bytes",
+    "errors": [(nombre, mensaje)]}.
+    """
+    _normalize_image_types(types)
+    total = len(input_files)
+    summary = {"total": total, "extracted": 0, "duplicates": 0, "skipped": 0, "bytes": 0, "errors": []}
+    done = 0
+
+    def check_cancel() -> None:
+        if cancel_check and cancel_check():
+            raise InterruptedError("Operación cancelada")
+
+    def jobs():
+        used: set[str] = set()
+        for input_path in input_files:
+            name = input_path.stem
+            n = 1
+            while name.lower() in used:
+                n += 1
+                name = f"{input_path.stem}_{n}"
+            used.add(name.lower())
+            args = (input_path, output_dir / name, min_size, types, dedupe)
+            yield input_path, args
+
+    def store(input_path: Path, result: Optional[dict], error: Optional[Exception]) -> None:
+        nonlocal done
+        done += 1
+        if error is None:
+            summary["extracted"] += len(result["extracted"])
+            for key in ("duplicates", "skipped", "bytes"):
+                summary[key] += result[key]
+        else:
+            summary["errors"].append((input_path.name, str(error)))
+        if progress_callback:
+            progress_callback(done, total, f"Extraído {input_path.name}")
+
+    _map_bounded(
+        extract_images_from_docx_with_progress, jobs(),
+        min(workers, total), store, check_cancel
+    )
+    return summary
+
+
+# ===========================================================================
+# Caché de resultados de conversión
+# ===========================================================================
+
+# Versión de cada conversor: se incrementa cuando cambia su salida para que
+# los resultados antiguos de la caché dejen de coincidir.
+CONVERTER_VERSIONS = {
+    "pdf2docx": "1",
+    "pdf2docx-raster": "1",
+    "ocr-pdf2docx": "1",
+    "compress-pdf": "2",
+    "compress-docx": "2",
+}
+
+# Paquete del que depende la salida de cada conversor
+_CONVERTER_PACKAGES = {
+    "pdf2docx": "pdf2docx",
+    "pdf2docx-raster": "PyMuPDF",
+    "ocr-pdf2docx": "pytesseract",
+    "compress-pdf": "pikepdf",
+    "compress-docx": "Pillow",
+}
+
+# Hashes memorizados como mucho (los procesos largos, como watch o serve,
+# ven un archivo nuevo por cada subida o modificación)
+_DIGEST_MEMO_SIZE = 4096
+
+
+@functools.lru_cache(maxsize=_DIGEST_MEMO_SIZE)
+def _digest_for(path: str, size: int, mtime_ns: int) -> str:
+    """Hash de path; size y mtime_ns solo forman parte de la clave."""
+    import hashlib
+
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def file_digest(path: Path) -> str:
+    """Hash BLAKE2b del contenido de un archivo (memorizado por tamaño y mtime)."""
+    st = path.stat()
+    return _digest_for(str(path.resolve()), st.st_size, st.st_mtime_ns)
+
+
+def default_cache_dir() -> Path:
+    """Carpeta de caché por defecto según el sistema operativo."""
+    base = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME")
+    if base:
+        return Path(base) / "apppdf" / "cache"
+    return Path.home() / ".cache" / "apppdf"
+
+
+def _package_version(package: Optional[str]) -> str:
+    if not package:
+        return ""
+    from importlib import metadata
+    try:
+        return metadata.version(package)
+    except metadata.PackageNotFoundError:
+        return ""
+
+
+# Puts entre recorridos completos de la ConversionCache aunque la estimación
+# de tamaño no supere el límite
+_CACHE_RESCAN_PUTS = 64
+
+
+class ConversionCache:
+    """Caché en disco de resultados, direccionada por contenido.
+
+    La clave combina el hash del archivo de entrada con el conversor, su
+    versión (y la del paquete que usa) y los parámetros. Cada entrada guarda
+    el archivo de salida y el resultado devuelto por el conversor. Al
+    superar ``max_bytes`` se eliminan las entradas usadas hace más tiempo.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int = 2 * 1024 ** 3, hardlink: bool = False):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        # Un hardlink comparte el archivo con la caché: si luego se sobrescribe
+        # la salida en sitio también se altera la entrada, por eso es opcional.
+        self.hardlink = hardlink
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Tamaño estimado (un recorrido completo al primer put y luego se suman
+        # las entradas nuevas); None obliga a recorrer la caché
+        self._size_estimate: Optional[int] = None
+        self._puts_since_scan = 0
+
+    def key(self, input_path: Path, converter: str, params: dict) -> str:
+        """Calcula la clave de caché para una conversión."""
+        import hashlib
+        import json
+
+        payload = json.dumps({
+            "input": file_digest(input_path),
+            "converter": converter,
+            "version": CONVERTER_VERSIONS.get(converter, "0"),
+            "package": _package_version(_CONVERTER_PACKAGES.get(converter)),
+            "params": params,
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _entry_paths(self, key: str) -> tuple[Path, Path]:
+        folder = self.cache_dir / key[:2]
+        return folder / key, folder / f"{key}.json"
+
+    def get(self, key: str, output_path: Path) -> Optional[dict]:
+        """Si la clave existe, materializa la salida y devuelve sus metadatos."""
+        import json
+
+        data_path, meta_path = self._entry_paths(key)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            # Marcar como usada recientemente (LRU por mtime)
+            os.utime(data_path)
+        except (OSError, ValueError):
+            return None
+
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        if output_path.exists():
+            output_path.unlink()
+        try:
+            if self.hardlink:
+                try:
+                    os.link(data_path, output_path)
+                    return meta
+                except OSError:
+                    pass
+            shutil.copyfile(data_path, output_path)
+        except FileNotFoundError:
+            # La entrada se desalojó entre la lectura y la copia
+            return None
+        return meta
+
+    def put(self, key: str, output_path: Path, result: Any = None) -> None:
+        """Guarda la salida de una conversión y desaloja si se excede el tamaño."""
+        import json
+
+        data_path, meta_path = self._entry_paths(key)
+        data_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Escribir a temporal y renombrar: otros procesos nunca ven entradas a medias
+        tmp_path = data_path.with_name(f"{key}.{os.getpid()}.tmp")
+        shutil.copyfile(output_path, tmp_path)
+        try:
+            replaced_size = data_path.stat().st_size
+        except OSError:
+            replaced_size = 0
+        size = tmp_path.stat().st_size
+        os.replace(tmp_path, data_path)
+        meta_path.write_text(json.dumps({"result": result}, default=str), encoding="utf-8")
+
+        # Recorrer la caché entera en cada put cuesta un stat por entrada.
+        # Solo se recorre cuando la estimación pasa del límite o cada
+        # _CACHE_RESCAN_PUTS puts (otros procesos también escriben en ella).
+        self._puts_since_scan += 1
+        if self._size_estimate is not None:
+            self._size_estimate += size - replaced_size
+            if self._size_estimate <= self.max_bytes and self._puts_since_scan < _CACHE_RESCAN_PUTS:
+                return
+        self._evict()
+
+    def _evict(self) -> None:
+        self._puts_since_scan = 0
+        entries = []
+        total = 0
+        for folder in os.scandir(self.cache_dir):
+            if not folder.is_dir():
+                continue
+            for entry in os.scandir(folder.path):
+                if entry.name.endswith((".json", ".tmp")):
+                    continue
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+
+        if total > self.max_bytes:
+            entries.sort()
+            for _, size, path in entries:
+                for victim in (path, f"{path}.json"):
+                    try:
+                        os.remove(victim)
+                    except OSError:
+                        pass
+                total -= size
+                if total <= self.max_bytes:
+                    break
+        self._size_estimate = total
+
+    def clear(self) -> None:
+        """Elimina todas las entradas."""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._size_estimate = 0
+
+
+def run_cached(
+    cache: Optional[ConversionCache],
+    converter: str,
+    input_path: Path,
+    output_path: Path,
+    params: dict,
+    func: Callable[[], Any],
+    overwrite: bool = True,
+    on_hit: Optional[Callable[[], None]] = None
+) -> Any:
+    """Ejecuta func() salvo que la caché ya tenga el resultado.
+
+    En un acierto la salida se copia (o enlaza) desde la caché, se llama a
+    on_hit y se devuelve el resultado guardado; si no, se ejecuta la
+    conversión y se almacena.
+    """
+    if output_path.exists() and not overwrite:
+        raise FileExistsError(f"El archivo ya existe: {output_path}")
 
-    return extracted
+    if cache is None:
+        return func()
+
+    key = cache.key(input_path, converter, dict(params, output_suffix=output_path.suffix.lower()))
+    hit = cache.get(key, output_path)
+    if hit is not None:
+        metrics.CACHE_HITS.inc(converter)
+        if on_hit:
+            on_hit()
+        result = hit.get("result")
+        if isinstance(result, dict):
+            result = dict(result, cached=True)
+        return result
+
+    result = func()
+    try:
+        cache.put(key, output_path, result)
+    except OSError:
+        # La caché es una optimización: un fallo al guardar no invalida la conversión
+        pass
+    return result
+
+
+# ===========================================================================
+# Procesamiento por lotes
+# ===========================================================================
+
+def _batch_worker_loop(conn: Any) -> None:
+    """Bucle de un proceso del pool de lotes.
+
+    Recibe (func, args) por la tubería, ejecuta y responde
+    ("ok", resultado, métricas) o ("error", mensaje, métricas), donde
+    métricas es lo registrado en metrics durante el trabajo. Termina al
+    recibir None o al cerrarse la tubería (p. ej. si el proceso padre murió).
+    """
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            return
+        if job is None:
+            return
+
+        func, args = job
+        snapshot = metrics.REGISTRY.snapshot()
+        try:
+            reply = ("ok", func(*args))
+        except BaseException as e:
+            reply = ("error", f"{type(e).__name__}: {e}")
+        delta = metrics.REGISTRY.delta(snapshot)
+        try:
+            conn.send(reply + (delta,))
+        except Exception as e:
+            # Resultado no serializable: informar el error en su lugar
+            conn.send(("error", f"{type(e).__name__}: {e}", delta))
+
+
+class _BatchSlot:
+    """Un proceso del pool de lotes con su tubería y el trabajo en curso."""
+
+    def __init__(self) -> None:
+        import multiprocessing
+
+        self.conn, child_conn = multiprocessing.Pipe()
+        # No daemon: los conversores pueden abrir sus propios pools de procesos
+        self.process = multiprocessing.Process(target=_batch_worker_loop, args=(child_conn,))
+        self.process.start()
+        child_conn.close()
+        self.job_index: Optional[int] = None
+        self.started = 0.0
+
+    def submit(self, job_index: int, func: Callable[..., Any], args: tuple) -> None:
+        self.conn.send((func, args))
+        self.job_index = job_index
+        self.started = time.perf_counter()
+
+    def stop(self, kill: bool = False) -> None:
+        if kill:
+            self.process.terminate()
+        else:
+            try:
+                self.conn.send(None)
+            except OSError:
+                pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+def run_batch(
+    jobs: list[tuple[Path, Callable[..., Any], tuple]],
+    workers: int = 1,
+    timeout: Optional[float] = None,
+    progress_callback: Optional[ProgressCallback] = None,
+    cancel_check: Optional[CancelCheck] = None,
+    on_result: Optional[Callable[[dict], None]] = None
+) -> list[dict]:
+    """Ejecuta trabajos (ruta, func, args) en un pool de procesos.
+
+    Los archivos más grandes se programan primero para que los procesos
+    terminen a la vez. Cada trabajo queda aislado: una excepción, un cierre
+    inesperado del proceso (p. ej. un fallo de MuPDF) o superar timeout
+    segundos se registran como error de ese archivo y el proceso se
+    reemplaza. func debe ser una función de nivel de módulo (se envía por
+    pickle).
+
+    Devuelve un dict por trabajo, en el orden original, con "index",
+    "input", "status" ("ok", "error" o "timeout"), "result", "error" y
+    "elapsed".
+    on_result se llama en el hilo actual con cada dict al terminar.
+    Con workers <= 1 y sin timeout los trabajos se ejecutan en este proceso.
+    """
+    total = len(jobs)
+    results: list[Optional[dict]] = [None] * total
+    done_count = 0
+
+    def check_cancel() -> None:
+        if cancel_check and cancel_check():
+            raise InterruptedError("Operación cancelada por el usuario")
+
+    def finish(index: int, status: str, result: Any, error: Optional[str], elapsed: float) -> None:
+        nonlocal done_count
+        entry = {
+            "index": index,
+            "input": jobs[index][0],
+            "status": status,
+            "result": result,
+            "error": error,
+            "elapsed": elapsed,
+        }
+        results[index] = entry
+        done_count += 1
+        if on_result:
+            on_result(entry)
+        if progress_callback:
+            progress_callback(done_count, total, f"{done_count}/{total} archivos")
+
+    def file_size(path: Path) -> int:
+        try:
+            return path.stat().st_size
+        except OSError:
+            return 0
+
+    order = sorted(range(total), key=lambda i: file_size(jobs[i][0]), reverse=True)
+
+    if workers <= 1 and timeout is None:
+        for index in order:
+            check_cancel()
+            _, func, args = jobs[index]
+            t0 = time.perf_counter()
+            try:
+                result = func(*args)
+            except InterruptedError:
+                raise
+            except Exception as e:
+                finish(index, "error", None, f"{type(e).__name__}: {e}", time.perf_counter() - t0)
+            else:
+                finish(index, "ok", result, None, time.perf_counter() - t0)
+        return results
+
+    from collections import deque
+    from multiprocessing.connection import wait
+
+    queue = deque(order)
+    slots: list[Optional[_BatchSlot]] = [None] * min(max(1, workers), max(1, total))
+    try:
+        while queue or any(slot and slot.job_index is not None for slot in slots):
+            check_cancel()
+
+            # Repartir trabajos a los procesos libres (arrancándolos si hace falta)
+            for i, slot in enumerate(slots):
+                if not queue:
+                    break
+                if slot is None:
+                    slot = slots[i] = _BatchSlot()
+                if slot.job_index is None:
+                    index = queue.popleft()
+                    _, func, args = jobs[index]
+                    slot.submit(index, func, args)
+
+            busy = [slot for slot in slots if slot and slot.job_index is not None]
+            ready = wait([slot.conn for slot in busy], timeout=0.2)
+
+            for i, slot in enumerate(slots):
+                if slot is None or slot.job_index is None:
+                    continue
+                index = slot.job_index
+                elapsed = time.perf_counter() - slot.started
+
+                if slot.conn in ready:
+                    try:
+                        status, payload, delta = slot.conn.recv()
+                    except (EOFError, OSError):
+                        # El proceso murió sin responder: reemplazarlo
+                        slot.process.join(timeout=5)
+                        code = slot.process.exitcode
+                        slot.stop(kill=True)
+                        slots[i] = None
+                        finish(index, "error", None, f"El proceso terminó inesperadamente (código {code})", elapsed)
+                        continue
+                    slot.job_index = None
+                    metrics.REGISTRY.merge(delta)
+                    if status == "ok":
+                        finish(index, "ok", payload, None, elapsed)
+                    else:
+                        finish(index, "error", None, payload, elapsed)
+                elif timeout is not None and elapsed > timeout:
+                    slot.stop(kill=True)
+                    slots[i] = None
+                    finish(index, "timeout", None, f"Tiempo límite superado ({timeout:g} s)", elapsed)
+    except BaseException:
+        for slot in slots:
+            if slot:
+                slot.stop(kill=True)
+        raise
+    else:
+        for slot in slots:
+            if slot:
+                slot.stop()
+
+    return results
+
+
+# Conversores de batch_convert_file: tipo de entrada y extensión de salida
+BATCH_CONVERTERS = {
+    "pdf2docx": ("pdf", ".docx"),
+    "pdf2docx-raster": ("pdf", ".docx"),
+    "ocr-pdf2docx": ("pdf", ".docx"),
+    "compress-pdf": ("pdf", ".pdf"),
+    "docx2pdf": ("docx", ".pdf"),
+    "compress-docx": ("docx", ".docx"),
+    "convert-image": ("image", None),
+}
+
+# Parámetros (y valores por defecto) que acepta cada conversor de batch_convert_file
+BATCH_CONVERTER_PARAMS = {
+    "pdf2docx": {"start": None, "end": None},
+    "pdf2docx-raster": {"dpi": 200, "streaming": False},
+    "ocr-pdf2docx": {"dpi": 300, "lang": "spa", "streaming": False},
+    "compress-pdf": {"preset": None, "target_dpi": None, "quality": None, "image_format": "jpeg", "bilevel": None},
+    "docx2pdf": {},
+    "compress-docx": {"quality": 75, "max_width": None, "max_height": None, "resample": "lanczos"},
+    "convert-image": {"format": "png", "quality": 95, "resize": None, "resample": "lanczos"},
+}
+
+
+def batch_convert_file(
+    converter: str,
+    input_path: Path,
+    output_path: Path,
+    params: dict,
+    overwrite: bool,
+    cache: Optional[ConversionCache],
+    page_workers: int = 1
+) -> dict:
+    """Convierte un archivo con el conversor indicado, pasando por la caché.
+
+    Pensada como trabajo de run_batch (es picklable). Conversores (ver
+    BATCH_CONVERTERS): "pdf2docx", "pdf2docx-raster", "ocr-pdf2docx",
+    "compress-pdf", "docx2pdf", "compress-docx" y "convert-image".
+    page_workers son los procesos por archivo de raster, OCR y compress-docx;
+    no forma parte de params porque no cambia la salida (ni la clave de
+    caché). Devuelve
+    {"cached": bool, "result": resultado del conversor, "input_hash": str,
+    "metrics": lo registrado en metrics durante la llamada}; quien la ejecuta
+    en otro proceso suma "metrics" a su registro con metrics.REGISTRY.merge.
+    """
+    snapshot = metrics.REGISTRY.snapshot()
+    funcs = {
+        "pdf2docx": lambda: pdf_to_docx(
+            input_path, output_path, params.get("start"), params.get("end"), True
+        ),
+        "pdf2docx-raster": lambda: pdf_to_docx_raster(
+            input_path, output_path, dpi=params.get("dpi", 200), overwrite=True,
+            streaming=params.get("streaming", False), workers=page_workers
+        ),
+        "ocr-pdf2docx": lambda: ocr_pdf_to_docx(
+            input_path, output_path, dpi=params.get("dpi", 300), lang=params.get("lang", "spa"),
+            streaming=params.get("streaming", False), workers=page_workers
+        ),
+        "compress-pdf": lambda: compress_pdf(
+            input_path, output_path, preset=params.get("preset"), target_dpi=params.get("target_dpi"),
+            quality=params.get("quality"), image_format=params.get("image_format", "jpeg"),
+            bilevel=params.get("bilevel")
+        ),
+        "docx2pdf": lambda: docx_to_pdf(input_path, output_path, True),
+        "compress-docx": lambda: compress_docx_images(
+            input_path, output_path, quality=params.get("quality", 75),
+            max_width=params.get("max_width"), max_height=params.get("max_height"),
+            workers=page_workers, resample=params.get("resample", "lanczos")
+        ),
+        "convert-image": lambda: convert_image(
+            input_path, output_path, params["format"], quality=params.get("quality", 95),
+            resize=tuple(params["resize"]) if params.get("resize") else None, overwrite=True,
+            resample=params.get("resample", "lanczos")
+        ),
+    }
+    hit = False
+
+    def on_hit() -> None:
+        nonlocal hit
+        hit = True
+
+    # docx2pdf depende de Word y no se guarda en caché
+    if converter not in CONVERTER_VERSIONS:
+        cache = None
+    result = run_cached(
+        cache, converter, input_path, output_path, params, funcs[converter],
+        overwrite=overwrite, on_hit=on_hit
+    )
+    # Con caché el hash ya está memorizado en este proceso
+    return {
+        "cached": hit, "result": result, "input_hash": file_digest(input_path),
+        "metrics": metrics.REGISTRY.delta(snapshot),
+    }
+
+
+class JobManifest:
+    """Registro persistente (JSONL) del estado de cada archivo de un lote.
+
+    Cada línea guarda conversor, ruta de entrada, hash, tamaño y mtime de
+    la entrada, parámetros, salida, estado, intentos fallidos y error; la
+    última línea de cada (conversor, entrada) manda. Las escrituras se
+    acumulan y se vuelcan cada flush_every registros o flush_interval
+    segundos (y al cerrar): si el proceso muere se pierden como mucho esos
+    registros, que simplemente se vuelven a convertir al reanudar.
+    """
+
+    def __init__(self, path: Path, flush_every: int = 50, flush_interval: float = 2.0):
+        self.path = Path(path)
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._records: dict[str, dict] = {}
+        self._buffer: list[str] = []
+        self._last_flush = time.monotonic()
+        self._cwd = os.getcwd()
+        self._load()
+
+    def _abspath(self, path: Any) -> str:
+        # Sin resolve() ni getcwd() por llamada: importa con 100k archivos
+        path = os.fspath(path)
+        if not os.path.isabs(path):
+            path = os.path.join(self._cwd, path)
+        return os.path.normcase(os.path.normpath(path))
+
+    def _key(self, converter: str, input_path: Path) -> str:
+        return f"{converter}|{self._abspath(input_path)}"
+
+    @staticmethod
+    def _same_params(stored: Any, params: dict) -> bool:
+        import json
+
+        return stored == params or stored == json.loads(json.dumps(params, default=str))
+
+    def _load(self) -> None:
+        import json
+
+        if not self.path.exists():
+            return
+        lines = 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    # Las rutas se guardan ya normalizadas
+                    key = f"{record['converter']}|{record['input']}"
+                except (ValueError, KeyError, TypeError):
+                    # Línea cortada por un cierre abrupto
+                    continue
+                if record.get("status") == "deleted":
+                    self._records.pop(key, None)
+                else:
+                    self._records[key] = record
+                lines += 1
+
+        # Compactar si la mayoría de las líneas ya están reemplazadas
+        if lines > 2 * len(self._records) + 100:
+            tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for record in self._records.values():
+                    f.write(json.dumps(record, default=str) + "\n")
+            os.replace(tmp_path, self.path)
+
+    def get(self, converter: str, input_path: Path) -> Optional[dict]:
+        """Último registro de una entrada, o None."""
+        return self._records.get(self._key(converter, input_path))
+
+    def is_done(
+        self,
+        converter: str,
+        input_path: Path,
+        params: dict,
+        use_hash: bool = False,
+        output_path: Optional[Path] = None
+    ) -> bool:
+        """True si la entrada ya se convirtió con estos parámetros y no cambió.
+
+        Por defecto compara tamaño y mtime (y el hash solo si el mtime
+        cambió); con use_hash compara siempre el hash del contenido. Con
+        output_path la salida registrada además tiene que ser esa (otra
+        carpeta de salida u otra estructura de carpetas no cuenta).
+        """
+        record = self.get(converter, input_path)
+        if not record or record.get("status") != "ok":
+            return False
+        if not self._same_params(record.get("params"), params):
+            return False
+        if output_path is not None and record.get("output") != self._abspath(output_path):
+            return False
+        if not os.path.exists(record.get("output", "")):
+            return False
+        try:
+            st = os.stat(input_path)
+        except OSError:
+            return False
+        if st.st_size != record.get("size"):
+            return False
+        if not use_hash and st.st_mtime_ns == record.get("mtime_ns"):
+            return True
+        # Tocado pero quizá idéntico: decidir por contenido
+        return file_digest(Path(input_path)) == record.get("hash")
+
+    def failed_attempts(self, converter: str, input_path: Path, params: dict) -> int:
+        """Intentos fallidos seguidos de una entrada con estos parámetros."""
+        record = self.get(converter, input_path)
+        if not record or not self._same_params(record.get("params"), params):
+            return 0
+        return record.get("attempts", 0)
+
+    def record(
+        self,
+        converter: str,
+        input_path: Path,
+        params: dict,
+        output_path: Path,
+        status: str,
+        input_hash: Optional[str] = None,
+        error: Optional[str] = None,
+        elapsed: float = 0.0
+    ) -> None:
+        """Registra el resultado de una entrada (se escribe en el próximo volcado)."""
+        import json
+
+        try:
+            st = Path(input_path).stat()
+            size, mtime_ns = st.st_size, st.st_mtime_ns
+        except OSError:
+            size, mtime_ns = None, None
+
+        attempts = 0 if status == "ok" else self.failed_attempts(converter, input_path, params) + 1
+        record = {
+            "converter": converter,
+            "input": self._abspath(input_path),
+            "hash": input_hash,
+            "size": size,
+            "mtime_ns": mtime_ns,
+            "params": json.loads(json.dumps(params, default=str)),
+            "output": self._abspath(output_path),
+            "status": status,
+            "attempts": attempts,
+            "error": error,
+            "elapsed": round(elapsed, 3),
+            "time": time.time(),
+        }
+        self._records[self._key(converter, input_path)] = record
+        self._buffer.append(json.dumps(record, default=str))
+
+        if len(self._buffer) >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def orphans(self, root: Path, scanned: Iterable[Path]) -> list[dict]:
+        """Registros bajo root cuya entrada falta en un escaneo ya hecho de root.
+
+        scanned son las rutas que devolvió ese escaneo. Si root no es una
+        carpeta o el escaneo vino vacío (carpeta equivocada, no montada o
+        ilegible) no se devuelve nada: no se puede distinguir de que se hayan
+        borrado todas las entradas. Además la entrada no debe existir, para
+        no tocar archivos que el escaneo no vio (subcarpeta ilegible, filtros).
+        """
+        present = {self._abspath(p) for p in scanned}
+        if not present or not os.path.isdir(root):
+            return []
+        prefix = os.path.join(self._abspath(root), "")
+        return [
+            record for record in self._records.values()
+            if record["input"].startswith(prefix)
+            and record["input"] not in present
+            and not os.path.exists(record["input"])
+        ]
+
+    def forget(self, converter: str, input_path: Path) -> None:
+        """Elimina una entrada del manifiesto (se escribe como "deleted")."""
+        import json
+
+        key = self._key(converter, input_path)
+        if self._records.pop(key, None) is None:
+            return
+        self._buffer.append(json.dumps({
+            "converter": converter,
+            "input": self._abspath(input_path),
+            "status": "deleted",
+            "time": time.time(),
+        }))
+
+    def flush(self) -> None:
+        """Escribe los registros pendientes al archivo."""
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(self._buffer) + "\n")
+        self._buffer.clear()
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> "JobManifest":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def scan_files(
+    folder: Path,
+    recursive: bool = True,
+    include: Optional[list[str]] = None,
+    exclude: Optional[list[str]] = None
+) -> tuple[list[Path], list[Path]]:
+    """Busca PDFs y DOCXs en una carpeta y devuelve (pdfs, docxs) ordenados.
+
+    Usa os.scandir, que trae el tipo de cada entrada en el propio listado
+    (sin un stat por archivo). include/exclude son patrones glob que se
+    comparan con la ruta relativa a folder (separada por "/") y con el
+    nombre, p. ej. ["informes/*"] o ["*borrador*"]; una carpeta excluida
+    no se recorre. Se omiten las carpetas ocultas y los archivos de
+    bloqueo de Word (~$...).
+    """
+    from fnmatch import fnmatch
+
+    def matches(rel: str, name: str, patterns: list[str]) -> bool:
+        return any(fnmatch(rel, p) or fnmatch(name, p) for p in patterns)
+
+    pdfs: list[Path] = []
+    docxs: list[Path] = []
+    stack = [(str(folder), "")]
+    while stack:
+        path, rel_dir = stack.pop()
+        try:
+            entries = os.scandir(path)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                name = entry.name
+                rel = f"{rel_dir}{name}"
+                if exclude and matches(rel, name, exclude):
+                    continue
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    continue
+                if is_dir:
+                    if recursive and not name.startswith("."):
+                        stack.append((entry.path, f"{rel}/"))
+                    continue
+                if name.startswith("~$"):
+                    continue
+                ext = os.path.splitext(name)[1].lower()
+                if ext not in (".pdf", ".docx"):
+                    continue
+                if include and not matches(rel, name, include):
+                    continue
+                (pdfs if ext == ".pdf" else docxs).append(Path(entry.path))
+
+    # Ordenar por cadena: comparar objetos Path es varias veces más lento
+    pdfs.sort(key=os.fspath)
+    docxs.sort(key=os.fspath)
+    return pdfs, docxs
+
+
+def _batch_output_paths(inputs: list[Path], outdir: Path, suffix: str, root: Optional[Path]) -> list[Path]:
+    """Rutas de salida de los archivos de un lote, conservando subcarpetas bajo root.
+
+    Trabaja con cadenas en lugar de PurePath.relative_to: con carpetas de
+    100k archivos la diferencia se nota.
+    """
+    outdir_str = os.fspath(outdir)
+    root_prefix = os.path.join(os.fspath(root), "") if root is not None else None
+    outputs = []
+    for input_path in inputs:
+        path = os.fspath(input_path)
+        directory, name = os.path.split(path)
+        target_dir = outdir_str
+        if root_prefix is not None and path.startswith(root_prefix):
+            rel_dir = directory[len(root_prefix):]
+            if rel_dir:
+                target_dir = os.path.join(outdir_str, rel_dir)
+        outputs.append(Path(target_dir, os.path.splitext(name)[0] + suffix))
+    return outputs
+
+
+def _output_is_fresh(input_path: Path, output_path: Path) -> bool:
+    """True si la salida existe y es al menos tan reciente como la entrada."""
+    try:
+        return os.stat(output_path).st_mtime_ns >= os.stat(input_path).st_mtime_ns
+    except OSError:
+        return False
+
+
+def _run_file_batch(
+    converter: str,
+    params: dict,
+    files: list[tuple[Path, Path]],
+    overwrite: bool,
+    workers: int,
+    cache: Optional[ConversionCache],
+    timeout: Optional[float],
+    progress_callback: Optional[ProgressCallback],
+    cancel_check: Optional[CancelCheck],
+    on_result: Optional[Callable[[dict], None]],
+    manifest: Optional[JobManifest] = None,
+    resume: bool = False,
+    max_retries: int = 2,
+    sync: bool = False,
+    use_hash: bool = False,
+    page_workers: int = 1
+) -> list[dict]:
+    """Convierte pares (entrada, salida) con run_batch y arma el resultado por archivo.
+
+    Cada dict tiene "input", "output", "status" ("ok", "error", "timeout"
+    o "skipped" si la salida existe y no se sobrescribe), "error",
+    "elapsed", "input_bytes", "output_bytes" y "cached".
+
+    Con manifest se registra el resultado de cada archivo convertido. Con
+    resume además se omiten los ya completados según el manifiesto y los
+    fallidos se reintentan (sobrescribiendo su salida) hasta max_retries
+    veces; después se informan como error sin volver a intentarlo.
+
+    sync (requiere manifest) es un resume incremental: solo se convierten
+    las entradas nuevas o cambiadas (por tamaño/mtime, o por hash con
+    use_hash) y se sobrescriben sus salidas. Una salida previa sin registro
+    en el manifiesto y más nueva que su entrada se adopta sin convertir.
+    """
+    if sync:
+        resume = True
+    total = len(files)
+    records: list[dict] = []
+    done_count = 0
+
+    def file_size(path: Path) -> Optional[int]:
+        try:
+            return os.stat(path).st_size
+        except OSError:
+            return None
+
+    def report(record: dict) -> None:
+        nonlocal done_count
+        done_count += 1
+        if on_result:
+            on_result(record)
+        if progress_callback:
+            progress_callback(done_count, total, f"{done_count}/{total} archivos")
+
+    jobs = []
+    job_records = []
+    for input_path, output_path in files:
+        record = {
+            "input": input_path,
+            "output": output_path,
+            "status": None,
+            "error": None,
+            "elapsed": 0.0,
+            "input_bytes": file_size(input_path),
+            "output_bytes": None,
+            "cached": False,
+        }
+        records.append(record)
+        # Las salidas registradas en el manifiesto son del propio lote: se pueden rehacer
+        in_manifest = False
+        if manifest is not None and resume:
+            if manifest.is_done(converter, input_path, params, use_hash=use_hash, output_path=output_path):
+                record["status"] = "skipped"
+                report(record)
+                continue
+            if sync and manifest.get(converter, input_path) is None and _output_is_fresh(input_path, output_path):
+                manifest.record(
+                    converter, input_path, params, output_path, "ok",
+                    input_hash=file_digest(input_path) if use_hash else None
+                )
+                record["status"] = "skipped"
+                report(record)
+                continue
+            attempts = manifest.failed_attempts(converter, input_path, params)
+            if attempts > max_retries:
+                record["status"] = "error"
+                record["error"] = f"Reintentos agotados ({attempts} intentos fallidos)"
+                report(record)
+                continue
+            in_manifest = manifest.get(converter, input_path) is not None
+        if output_path.exists() and not overwrite and not in_manifest and not sync:
+            record["status"] = "skipped"
+            record["output_bytes"] = file_size(output_path)
+            report(record)
+            continue
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        jobs.append((
+            input_path, batch_convert_file,
+            (converter, input_path, output_path, params, True, cache, page_workers)
+        ))
+        job_records.append(record)
+
+    def on_job(entry: dict) -> None:
+        record = job_records[entry["index"]]
+        record["status"] = entry["status"]
+        record["error"] = entry["error"]
+        record["elapsed"] = entry["elapsed"]
+        input_hash = None
+        if entry["status"] == "ok":
+            record["cached"] = entry["result"]["cached"]
+            record["output_bytes"] = file_size(record["output"])
+            input_hash = entry["result"]["input_hash"]
+        if manifest is not None:
+            manifest.record(
+                converter, record["input"], params, record["output"], record["status"],
+                input_hash=input_hash, error=record["error"], elapsed=record["elapsed"]
+            )
+        report(record)
+
+    try:
+        run_batch(jobs, workers=workers, timeout=timeout, cancel_check=cancel_check, on_result=on_job)
+    finally:
+        if manifest is not None:
+            manifest.flush()
+    return records
+
+
+def batch_pdf_to_docx(
+    pdfs: list[Path],
+    outdir: Path,
+    mode: str = "editable",
+    overwrite: bool = False,
+    dpi: int = 200,
+    workers: int = 1,
+    cache: Optional[ConversionCache] = None,
+    root: Optional[Path] = None,
+    timeout: Optional[float] = None,
+    progress_callback: Optional[ProgressCallback] = None,
+    cancel_check: Optional[CancelCheck] = None,
+    on_result: Optional[Callable[[dict], None]] = None,
+    manifest: Optional[JobManifest] = None,
+    resume: bool = False,
+    max_retries: int = 2,
+    sync: bool = False,
+    use_hash: bool = False,
+    page_workers: int = 1
+) -> list[dict]:
+    """Convierte varios PDF a DOCX ("editable" o "raster") en paralelo.
+
+    workers es el número de archivos a la vez (ver run_batch) y page_workers
+    los procesos que renderizan páginas de cada archivo en modo raster; en
+    total se usan hasta workers * page_workers procesos. Si se da
+    root, las salidas conservan las subcarpetas de cada PDF respecto a root.
+    manifest/resume/max_retries permiten reanudar un lote interrumpido y
+    sync/use_hash convertir solo lo nuevo o cambiado.
+    Devuelve un dict por PDF (ver _run_file_batch), en el orden recibido.
+    """
+    if mode == "editable":
+        converter, params = "pdf2docx", {"start": None, "end": None}
+    elif mode == "raster":
+        converter, params = "pdf2docx-raster", {"dpi": dpi, "streaming": False}
+    else:
+        raise ValueError(f"Modo no soportado: {mode}")
+
+    files = list(zip(pdfs, _batch_output_paths(pdfs, outdir, ".docx", root)))
+    return _run_file_batch(
+        converter, params, files, overwrite, workers, cache, timeout,
+        progress_callback, cancel_check, on_result,
+        manifest=manifest, resume=resume, max_retries=max_retries,
+        sync=sync, use_hash=use_hash, page_workers=page_workers
+    )
+
+
+def batch_docx_to_pdf(
+    docxs: list[Path],
+    outdir: Path,
+    overwrite: bool = False,
+    root: Optional[Path] = None,
+    timeout: Optional[float] = None,
+    progress_callback: Optional[ProgressCallback] = None,
+    cancel_check: Optional[CancelCheck] = None,
+    on_result: Optional[Callable[[dict], None]] = None,
+    manifest: Optional[JobManifest] = None,
+    resume: bool = False,
+    max_retries: int = 2,
+    sync: bool = False,
+    use_hash: bool = False
+) -> list[dict]:
+    """Convierte varios DOCX a PDF, de a uno (Word no admite conversiones simultáneas).
+
+    Devuelve un dict por DOCX (ver _run_file_batch), en el orden recibido.
+    """
+    files = list(zip(docxs, _batch_output_paths(docxs, outdir, ".pdf", root)))
+    return _run_file_batch(
+        "docx2pdf", {}, files, overwrite, 1, None, timeout,
+        progress_callback, cancel_check, on_result,
+        manifest=manifest, resume=resume, max_retries=max_retries,
+        sync=sync, use_hash=use_hash
+    )
+
+
+def delete_orphan_outputs(manifest: JobManifest, root: Path, scanned: Iterable[Path]) -> list[Path]:
+    """Borra las salidas cuyas entradas ya no existen y las quita del manifiesto.
+
+    root es la carpeta escaneada y scanned lo que devolvió scan_files sobre
+    ella; con un escaneo vacío no se borra nada (ver JobManifest.orphans).
+    Devuelve las salidas borradas.
+    """
+    deleted = []
+    for record in manifest.orphans(root, scanned):
+        output = Path(record["output"])
+        try:
+            output.unlink()
+            deleted.append(output)
+        except FileNotFoundError:
+            pass
+        manifest.forget(record["converter"], Path(record["input"]))
+    manifest.flush()
+    return deleted
+
+
+# ===========================================================================
+# Cola de trabajos
+# ===========================================================================
+
+# Un trabajo recibe el callback de progreso y la función de cancelación
+JobFunc = Callable[[ProgressCallback, CancelCheck], Any]
+
+
+class JobHandle:
+    """Trabajo encolado en una JobQueue.
+
+    Expone el estado ("queued", "running", "done", "error", "cancelled"), el
+    último progreso reportado, la cancelación y el resultado. ``future`` es un
+    concurrent.futures.Future; el handle también se puede esperar con await.
+    """
+
+    def __init__(self, queue: "JobQueue", func: JobFunc, name: str, cost: int):
+        from concurrent.futures import Future
+
+        self.name = name
+        self.cost = cost
+        self.status = "queued"
+        self.progress: Optional[tuple[int, int, str]] = None
+        self.future = Future()
+        self._queue = queue
+        self._func = func
+        self._cancelled = False
+        self._progress_listeners: list[ProgressCallback] = []
+        self._start_listeners: list[Callable[["JobHandle"], None]] = []
+
+    def is_cancelled(self) -> bool:
+        """True si se pidió cancelar el trabajo (es el cancel_check que recibe)."""
+        return self._cancelled
+
+    def cancel(self) -> bool:
+        """Cancela el trabajo.
+
+        Si aún no empezó se descarta; si está en curso se le pide parar y
+        terminará con InterruptedError en cuanto compruebe cancel_check.
+        Devuelve False si ya había terminado.
+        """
+        if self.future.done():
+            return False
+        self._cancelled = True
+        self._queue._discard(self)
+        return True
+
+    def report(self, current: int, total: int, message: str = "") -> None:
+        """Publica un evento de progreso a los oyentes (es el progress_callback que recibe)."""
+        self.progress = (current, total, message)
+        for listener in list(self._progress_listeners):
+            listener(current, total, message)
+
+    def add_progress_listener(self, listener: ProgressCallback) -> None:
+        self._progress_listeners.append(listener)
+
+    def add_start_listener(self, listener: Callable[["JobHandle"], None]) -> None:
+        self._start_listeners.append(listener)
+
+    def add_done_callback(self, fn: Callable[["JobHandle"], None]) -> None:
+        """fn(handle) se llama al terminar (en el hilo del trabajo, o ya mismo si terminó)."""
+        self.future.add_done_callback(lambda _future: fn(self))
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def result(self, timeout: Optional[float] = None) -> Any:
+        """Espera y devuelve el resultado (o relanza la excepción del trabajo)."""
+        return self.future.result(timeout)
+
+    def exception(self, timeout: Optional[float] = None) -> Optional[BaseException]:
+        return self.future.exception(timeout)
+
+    def __await__(self):
+        import asyncio
+
+        return asyncio.wrap_future(self.future).__await__()
+
+    def _run(self) -> None:
+        if not self.future.set_running_or_notify_cancel():
+            return
+        self.status = "running"
+        try:
+            # Dentro del try: si un listener falla, el future termina con su error
+            for listener in list(self._start_listeners):
+                listener(self)
+            if self._cancelled:
+                raise InterruptedError("Operación cancelada por el usuario")
+            result = self._func(self.report, self.is_cancelled)
+        except BaseException as e:
+            self.status = "cancelled" if isinstance(e, InterruptedError) else "error"
+            self.future.set_exception(e)
+        else:
+            self.status = "done"
+            self.future.set_result(result)
+
+
+class JobQueue:
+    """Cola de trabajos con un número acotado de hilos y un presupuesto de CPU.
+
+    Cada trabajo declara su coste (los procesos que usa por dentro, p. ej. los
+    workers de OCR o de un lote). Un trabajo solo arranca si el coste de los
+    que están en curso más el suyo cabe en ``cpu_budget``; uno que lo supera
+    por sí solo corre cuando no hay otro. Los trabajos arrancan en orden de
+    llegada, así uno caro no queda relegado por los baratos que llegan después.
+    """
+
+    def __init__(self, max_workers: int = 2, cpu_budget: Optional[int] = None):
+        import threading
+        from collections import deque
+
+        self.max_workers = max(1, max_workers)
+        self.cpu_budget = max(1, cpu_budget or os.cpu_count() or 1)
+        self._cond = threading.Condition()
+        self._queue: "deque[JobHandle]" = deque()
+        self._running: list[JobHandle] = []
+        self._threads: list[threading.Thread] = []
+        self._shutdown = False
+
+    def submit(
+        self,
+        func: JobFunc,
+        name: str = "",
+        cost: int = 1,
+        on_progress: Optional[ProgressCallback] = None,
+        on_start: Optional[Callable[[JobHandle], None]] = None
+    ) -> JobHandle:
+        """Encola func(progress_callback, cancel_check) y devuelve su handle."""
+        import threading
+
+        handle = JobHandle(self, func, name, max(1, cost))
+        if on_progress:
+            handle.add_progress_listener(on_progress)
+        if on_start:
+            handle.add_start_listener(on_start)
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("La cola de trabajos está cerrada")
+            self._queue.append(handle)
+            if len(self._threads) < self.max_workers:
+                thread = threading.Thread(target=self._worker, name=f"JobQueue-{len(self._threads)}", daemon=True)
+                self._threads.append(thread)
+                thread.start()
+            self._cond.notify_all()
+        return handle
+
+    def stats(self) -> dict:
+        """Trabajos en cola y en curso, y el coste en uso."""
+        with self._cond:
+            return {
+                "queued": len(self._queue),
+                "running": len(self._running),
+                "cost_in_use": sum(job.cost for job in self._running),
+                "cpu_budget": self.cpu_budget,
+            }
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = False) -> None:
+        """Cierra la cola; los trabajos en cola se ejecutan salvo cancel_pending."""
+        with self._cond:
+            self._shutdown = True
+            pending = list(self._queue) if cancel_pending else []
+            self._cond.notify_all()
+        for handle in pending:
+            handle.cancel()
+        if wait:
+            for thread in list(self._threads):
+                thread.join()
+
+    def _discard(self, handle: JobHandle) -> None:
+        """Quita de la cola un trabajo cancelado antes de empezar."""
+        with self._cond:
+            try:
+                self._queue.remove(handle)
+            except ValueError:
+                return
+            handle.status = "cancelled"
+            self._cond.notify_all()
+        handle.future.cancel()
+
+    def _next_job(self) -> Optional[JobHandle]:
+        with self._cond:
+            while True:
+                if self._queue:
+                    handle = self._queue[0]
+                    in_use = sum(job.cost for job in self._running)
+                    if not self._running or in_use + handle.cost <= self.cpu_budget:
+                        self._queue.popleft()
+                        self._running.append(handle)
+                        return handle
+                elif self._shutdown:
+                    return None
+                self._cond.wait()
+
+    def _worker(self) -> None:
+        while True:
+            handle = self._next_job()
+            if handle is None:
+                return
+            try:
+                handle._run()
+            finally:
+                with self._cond:
+                    self._running.remove(handle)
+                    self._cond.notify_all()
@@ -0,0 +1,645 @@
+"""
+Carpeta vigilada: convierte automáticamente los archivos que se dejan en una
+carpeta de entrada (PDF, DOCX e imágenes) con los conversores de tools.
+
+- Detecta cambios con inotify (Linux, vía ctypes) o, si no está disponible
+  (Windows, macOS, sistemas de archivos de red), sondeando con os.scandir.
+- Un archivo solo se encola cuando su tamaño y fecha no cambian durante
+  "settle" segundos, para no convertir archivos a medio copiar.
+- Las conversiones corren en un pool de procesos acotado; como mucho
+  max_queue archivos están en vuelo y como mucho max_pending esperan a
+  estabilizarse. Lo que exceda esos límites se recupera en el siguiente
+  reescaneo, así que la memoria no crece con el tamaño de la carpeta.
+- Las reglas de ruteo (conversor, DPI, calidad... por subcarpeta) se leen
+  de un archivo JSON (ver load_watch_config).
+"""
+import json
+import os
+import threading
+import time
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Optional, Callable, Any
+
+import metrics
+from tools import (
+    BATCH_CONVERTERS,
+    BATCH_CONVERTER_PARAMS,
+    SUPPORTED_IMAGE_FORMATS,
+    ConversionCache,
+    JobManifest,
+    batch_convert_file,
+)
+
+
+# Conversores que no admiten varias conversiones a la vez (Word)
+_SERIAL_CONVERTERS = {"docx2pdf"}
+
+_IMAGE_EXTS = {f".{fmt}" for fmt in SUPPORTED_IMAGE_FORMATS} | {".tif"}
+
+# Reglas por defecto: PDF -> DOCX editable, DOCX -> PDF, imágenes se ignoran
+DEFAULT_WATCH_RULES = [{"match": "*", "pdf": "pdf2docx", "docx": "docx2pdf"}]
+
+WatchEventCallback = Callable[[str, dict], None]
+
+
+# ===========================================================================
+# Configuración y ruteo
+# ===========================================================================
+
+def load_watch_config(path: Optional[Path]) -> dict:
+    """Lee y valida la configuración de una carpeta vigilada.
+
+    Formato (JSON)::
+
+        {
+          "settle": 2, "workers": 4, "max_queue": 16,
+          "rules": [
+            {"match": "escaneos/*", "pdf": "ocr-pdf2docx", "dpi": 300, "lang": "spa"},
+            {"match": "fotos/*", "image": "webp", "quality": 80, "outdir": "web"},
+            {"match": "*", "pdf": "pdf2docx", "docx": "docx2pdf"}
+          ]
+        }
+
+    Cada regla tiene un patrón glob "match" (sobre la ruta relativa a la
+    carpeta vigilada, con "/"), el conversor para "pdf" y "docx" (ver
+    tools.BATCH_CONVERTERS) o el formato de salida para "image", una
+    subcarpeta de salida opcional "outdir" y los parámetros del conversor.
+    Gana la primera regla que coincide y trata ese tipo de archivo; un
+    valor null hace que ese tipo se ignore.
+    """
+    config: dict = {}
+    if path is not None:
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        if not isinstance(config, dict):
+            raise ValueError("La configuración debe ser un objeto JSON")
+
+    rules = config.get("rules", DEFAULT_WATCH_RULES)
+    if not isinstance(rules, list) or not rules:
+        raise ValueError("'rules' debe ser una lista no vacía")
+
+    for i, rule in enumerate(rules):
+        if not isinstance(rule, dict):
+            raise ValueError(f"Regla {i + 1}: debe ser un objeto")
+        for kind in ("pdf", "docx"):
+            converter = rule.get(kind)
+            if converter is None:
+                continue
+            if BATCH_CONVERTERS.get(converter, (None,))[0] != kind:
+                raise ValueError(f"Regla {i + 1}: conversor no válido para {kind}: {converter}")
+        image_format = rule.get("image")
+        if image_format is not None and image_format.lower() not in SUPPORTED_IMAGE_FORMATS:
+            raise ValueError(f"Regla {i + 1}: formato de imagen no soportado: {image_format}")
+
+    config["rules"] = rules
+    return config
+
+
+def _file_kind(name: str) -> Optional[str]:
+    ext = os.path.splitext(name)[1].lower()
+    if ext == ".pdf":
+        return "pdf"
+    if ext == ".docx":
+        return "docx"
+    if ext in _IMAGE_EXTS:
+        return "image"
+    return None
+
+
+def route_file(rules: list[dict], rel_path: str) -> Optional[tuple[str, dict, str]]:
+    """Conversor, parámetros y subcarpeta de salida para un archivo, o None.
+
+    rel_path es la ruta relativa a la carpeta vigilada, separada por "/".
+    """
+    kind = _file_kind(rel_path)
+    if kind is None:
+        return None
+
+    for rule in rules:
+        if not fnmatch(rel_path, rule.get("match", "*")):
+            continue
+        if kind not in rule:
+            continue
+        target = rule[kind]
+        if target is None:
+            return None
+
+        if kind == "image":
+            converter = "convert-image"
+            options = dict(rule, format=target.lower())
+        else:
+            converter = target
+            options = rule
+        # Solo los parámetros del conversor: así la clave del manifiesto es estable
+        params = {
+            name: options.get(name, default)
+            for name, default in BATCH_CONVERTER_PARAMS[converter].items()
+        }
+        return converter, params, rule.get("outdir", "")
+
+    return None
+
+
+def _output_path(outdir: Path, sub_outdir: str, rel_path: str, converter: str, params: dict) -> Path:
+    rel_dir, name = os.path.split(rel_path)
+    stem, ext = os.path.splitext(name)
+    if converter == "convert-image":
+        ext = "." + ("jpg" if params["format"] == "jpeg" else params["format"])
+    else:
+        ext = BATCH_CONVERTERS[converter][1]
+    return outdir / sub_outdir / rel_dir / (stem + ext)
+
+
+def _ignored_name(name: str) -> bool:
+    """Ocultos, bloqueos de Word y temporales de descargas/copias."""
+    return (
+        name.startswith((".", "~$"))
+        or name.lower().endswith((".tmp", ".part", ".partial", ".crdownload", ".download"))
+    )
+
+
+def _skipped_dir(path: str, skip_dirs: set[str]) -> bool:
+    return bool(skip_dirs) and os.path.normcase(os.path.abspath(path)) in skip_dirs
+
+
+def _scan_tree(root: str, recursive: bool, skip_dirs: set[str]):
+    """Genera (ruta, tamaño, mtime_ns) de los archivos bajo root."""
+    stack = [root]
+    while stack:
+        path = stack.pop()
+        try:
+            entries = os.scandir(path)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if _ignored_name(entry.name):
+                    continue
+                try:
+                    if entry.is_dir():
+                        if recursive and not _skipped_dir(entry.path, skip_dirs):
+                            stack.append(entry.path)
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    continue
+                yield entry.path, st.st_size, st.st_mtime_ns
+
+
+# ===========================================================================
+# Detección de cambios: inotify y sondeo
+# ===========================================================================
+
+class _InotifyWatcher:
+    """Cambios de archivos vía inotify (Linux), con ctypes sobre libc."""
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_ISDIR = 0x40000000
+
+    WATCH_MASK = (
+        IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+    )
+
+    def __init__(self, root: str, recursive: bool, skip_dirs: set[str]):
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        # AttributeError si libc no tiene inotify: open_watcher cae a sondeo
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self._ctypes = ctypes
+
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1: {os.strerror(errno)}")
+
+        self.root = root
+        self.recursive = recursive
+        self.skip_dirs = skip_dirs
+        self._dirs: dict[int, str] = {}
+        # True tras un desbordamiento de la cola del kernel: hay que reescanear
+        self.overflowed = False
+        self._watch_tree(root)
+
+    def _watch_dir(self, path: str) -> bool:
+        wd = self._add_watch(self.fd, os.fsencode(path), self.WATCH_MASK)
+        if wd < 0:
+            return False
+        self._dirs[wd] = path
+        return True
+
+    def _watch_tree(self, path: str) -> list[str]:
+        """Vigila path (y subcarpetas); devuelve los archivos que ya contiene."""
+        files = []
+        stack = [path]
+        while stack:
+            current = stack.pop()
+            if not self._watch_dir(current):
+                continue
+            if not self.recursive and current != path:
+                continue
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if _ignored_name(entry.name):
+                            continue
+                        try:
+                            is_dir = entry.is_dir()
+                        except OSError:
+                            continue
+                        if is_dir:
+                            if self.recursive and not _skipped_dir(entry.path, self.skip_dirs):
+                                stack.append(entry.path)
+                        else:
+                            files.append(entry.path)
+            except OSError:
+                continue
+        return files
+
+    def poll(self, timeout: float) -> set[str]:
+        """Espera hasta timeout segundos y devuelve los archivos tocados."""
+        import select
+        import struct
+
+        changed: set[str] = set()
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return changed
+
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = struct.unpack_from("iIII", data, offset)
+                offset += 16
+                name = data[offset:offset + length].rstrip(b"\0").decode("utf-8", "surrogateescape")
+                offset += length
+
+                if mask & self.IN_Q_OVERFLOW:
+                    self.overflowed = True
+                    continue
+                if mask & self.IN_IGNORED:
+                    self._dirs.pop(wd, None)
+                    continue
+                directory = self._dirs.get(wd)
+                if directory is None or not name or _ignored_name(name):
+                    continue
+
+                path = os.path.join(directory, name)
+                if mask & self.IN_ISDIR:
+                    if mask & (self.IN_CREATE | self.IN_MOVED_TO) and self.recursive \
+                            and not _skipped_dir(path, self.skip_dirs):
+                        # Los archivos creados antes de vigilar la carpeta no generan evento
+                        changed.update(self._watch_tree(path))
+                    continue
+                changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class _PollingWatcher:
+    """Cambios de archivos comparando listados periódicos (os.scandir)."""
+
+    def __init__(self, root: str, recursive: bool, skip_dirs: set[str], interval: float = 2.0):
+        self.root = root
+        self.recursive = recursive
+        self.skip_dirs = skip_dirs
+        self.interval = interval
+        self.overflowed = False
+        self._snapshot: dict[str, tuple[int, int]] = {}
+        self._next_scan = 0.0
+
+    def poll(self, timeout: float) -> set[str]:
+        now = time.monotonic()
+        if now < self._next_scan:
+            time.sleep(min(timeout, self._next_scan - now))
+            return set()
+        self._next_scan = now + self.interval
+
+        changed = set()
+        snapshot = {}
+        for path, size, mtime_ns in _scan_tree(self.root, self.recursive, self.skip_dirs):
+            snapshot[path] = (size, mtime_ns)
+            if self._snapshot.get(path) != (size, mtime_ns):
+                changed.add(path)
+        self._snapshot = snapshot
+        return changed
+
+    def close(self) -> None:
+        self._snapshot.clear()
+
+
+def open_watcher(root: Path, recursive: bool = True, skip_dirs: Optional[set[str]] = None,
+                 force_polling: bool = False, poll_interval: float = 2.0) -> Any:
+    """Crea el detector de cambios: inotify si se puede, si no sondeo."""
+    skip_dirs = skip_dirs or set()
+    if not force_polling and hasattr(os, "O_CLOEXEC"):
+        try:
+            return _InotifyWatcher(str(root), recursive, skip_dirs)
+        except (OSError, AttributeError):
+            pass
+    return _PollingWatcher(str(root), recursive, skip_dirs, poll_interval)
+
+
+# ===========================================================================
+# Servicio
+# ===========================================================================
+
+def _init_watch_worker() -> None:
+    """Los procesos del pool ignoran Ctrl+C: el servicio decide cuándo parar."""
+    import signal
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+class FolderWatchService:
+    """Vigila una carpeta y convierte lo que llega, con memoria acotada.
+
+    Los archivos pasan por tres etapas: pendientes (esperando a que dejen de
+    cambiar), en vuelo (enviados al pool) y terminados (registrados en el
+    manifiesto de outdir, para no repetirlos al reiniciar). Un archivo que
+    falla más de max_retries veces no se vuelve a encolar hasta que cambie.
+    status() devuelve la profundidad de cada etapa.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        outdir: Path,
+        config: dict,
+        workers: int = 2,
+        max_queue: int = 8,
+        max_pending: int = 10000,
+        settle: float = 2.0,
+        recursive: bool = True,
+        force_polling: bool = False,
+        poll_interval: float = 2.0,
+        rescan_interval: float = 300.0,
+        max_retries: int = 2,
+        cache: Optional[ConversionCache] = None,
+        on_event: Optional[WatchEventCallback] = None
+    ):
+        self.root = Path(root)
+        self.outdir = Path(outdir)
+        self.rules = config["rules"]
+        self.workers = max(1, workers)
+        self.max_queue = max(self.workers, max_queue)
+        self.max_pending = max_pending
+        self.settle = settle
+        self.recursive = recursive
+        self.force_polling = force_polling
+        self.poll_interval = poll_interval
+        self.rescan_interval = rescan_interval
+        self.max_retries = max_retries
+        self.cache = cache
+        self.on_event = on_event
+
+        root_abs = os.path.normcase(os.path.abspath(self.root))
+        out_abs = os.path.normcase(os.path.abspath(self.outdir))
+        if out_abs == root_abs:
+            raise ValueError("La carpeta de salida no puede ser la carpeta vigilada")
+        self._root_prefix = os.path.join(str(self.root), "")
+        # Si la salida está dentro de la entrada no se vigila (evita bucles)
+        self._skip_dirs = {out_abs}
+
+        self.manifest = JobManifest(self.outdir / ".apppdf-watch.jsonl")
+        self._pending: dict[str, list] = {}
+        self._in_flight: dict[Any, tuple] = {}
+        self._executors: dict[bool, Any] = {}
+        self._stop = threading.Event()
+        self._needs_rescan = True
+        self._last_rescan = 0.0
+        self.done = 0
+        self.errors = 0
+        self.dropped = 0
+
+    # --- estado ---
+
+    def status(self) -> dict:
+        """Profundidad de colas y contadores (para monitorizar la contrapresión)."""
+        now = time.monotonic()
+        ready = sum(1 for entry in self._pending.values() if now - entry[2] >= self.settle)
+        return {
+            "pending": len(self._pending),
+            "ready_waiting": ready,
+            "in_flight": len(self._in_flight),
+            "max_queue": self.max_queue,
+            "max_pending": self.max_pending,
+            "workers": self.workers,
+            "done": self.done,
+            "errors": self.errors,
+            "dropped": self.dropped,
+        }
+
+    def stop(self) -> None:
+        """Pide detener el servicio (seguro desde otro hilo o un manejador de señal)."""
+        self._stop.set()
+
+    def _emit(self, kind: str, info: dict) -> None:
+        if self.on_event:
+            self.on_event(kind, info)
+
+    # --- etapas ---
+
+    def _rel_path(self, path: str) -> Optional[str]:
+        if not path.startswith(self._root_prefix):
+            return None
+        return path[len(self._root_prefix):].replace(os.sep, "/")
+
+    def _add_pending(self, path: str) -> None:
+        if path in self._pending:
+            # Nuevo evento: reiniciar la espera de estabilidad
+            self._pending[path][2] = time.monotonic()
+            return
+        if len(self._pending) >= self.max_pending:
+            # Sin sitio: se recupera en el próximo reescaneo
+            self.dropped += 1
+            self._needs_rescan = True
+            return
+        self._pending[path] = [-1, -1, time.monotonic()]
+
+    def _rescan(self) -> None:
+        self._needs_rescan = False
+        self._last_rescan = time.monotonic()
+        for path, _size, _mtime in _scan_tree(str(self.root), self.recursive, self._skip_dirs):
+            if len(self._pending) >= self.max_pending:
+                self._needs_rescan = True
+                break
+            if path in self._pending or any(item[0] == path for item in self._in_flight.values()):
+                continue
+            rel = self._rel_path(path)
+            route = route_file(self.rules, rel) if rel else None
+            if route and self._needs_conversion(path, rel, route):
+                self._add_pending(path)
+
+    def _needs_conversion(self, path: str, rel: str, route: tuple[str, dict, str]) -> bool:
+        """False si ya está convertido o si falló más de max_retries veces sin cambiar.
+
+        Igual que en los lotes con --resume (JobManifest.failed_attempts), pero
+        un archivo reemplazado o modificado desde el último fallo se reintenta.
+        Convertido quiere decir a la salida que le toca ahora: si cambió outdir
+        o la regla, se vuelve a convertir.
+        """
+        converter, params, sub_outdir = route
+        input_path = Path(path)
+        output_path = _output_path(self.outdir, sub_outdir, rel, converter, params)
+        if self.manifest.is_done(converter, input_path, params, output_path=output_path):
+            return False
+        if self.manifest.failed_attempts(converter, input_path, params) <= self.max_retries:
+            return True
+        record = self.manifest.get(converter, input_path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        return (st.st_size, st.st_mtime_ns) != (record.get("size"), record.get("mtime_ns"))
+
+    def _executor(self, serial: bool) -> Any:
+        from concurrent.futures import ProcessPoolExecutor
+
+        executor = self._executors.get(serial)
+        if executor is None:
+            executor = ProcessPoolExecutor(max_workers=1 if serial else self.workers, initializer=_init_watch_worker)
+            self._executors[serial] = executor
+        return executor
+
+    def _promote(self) -> None:
+        """Envía al pool los pendientes estables mientras haya sitio."""
+        now = time.monotonic()
+        for path in list(self._pending):
+            if len(self._in_flight) >= self.max_queue:
+                return
+            entry = self._pending[path]
+            try:
+                st = os.stat(path)
+            except OSError:
+                # Borrado o movido antes de estabilizarse
+                del self._pending[path]
+                continue
+            if (st.st_size, st.st_mtime_ns) != (entry[0], entry[1]):
+                entry[0], entry[1], entry[2] = st.st_size, st.st_mtime_ns, now
+                continue
+            if now - entry[2] < self.settle:
+                continue
+
+            del self._pending[path]
+            rel = self._rel_path(path)
+            route = route_file(self.rules, rel) if rel else None
+            if route is None:
+                continue
+            if not self._needs_conversion(path, rel, route):
+                continue
+            converter, params, sub_outdir = route
+            input_path = Path(path)
+
+            output_path = _output_path(self.outdir, sub_outdir, rel, converter, params)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            serial = converter in _SERIAL_CONVERTERS
+            future = self._executor(serial).submit(
+                batch_convert_file, converter, input_path, output_path, params, True, self.cache
+            )
+            self._in_flight[future] = (path, converter, params, output_path, serial, time.perf_counter())
+            self._emit("queued", {"input": path, "converter": converter, "output": str(output_path)})
+
+    def _collect(self) -> None:
+        """Registra las conversiones terminadas."""
+        from concurrent.futures.process import BrokenProcessPool
+
+        for future in [f for f in self._in_flight if f.done()]:
+            path, converter, params, output_path, serial, t0 = self._in_flight.pop(future)
+            if future.cancelled():
+                # Cancelado al detener: el próximo arranque lo vuelve a encontrar
+                continue
+            elapsed = time.perf_counter() - t0
+            try:
+                result = future.result()
+            except BrokenProcessPool as e:
+                # Un proceso murió (p. ej. fallo de MuPDF): rehacer ese pool
+                executor = self._executors.pop(serial, None)
+                if executor is not None:
+                    executor.shutdown(wait=False, cancel_futures=True)
+                error = f"El proceso terminó inesperadamente: {e}"
+                # Lo que registró el proceso hijo se perdió con la excepción
+                metrics.record_conversion(converter, elapsed, "error", dpi=params.get("dpi"), error=e)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                metrics.record_conversion(converter, elapsed, "error", dpi=params.get("dpi"), error=e)
+            else:
+                self.done += 1
+                metrics.REGISTRY.merge(result.get("metrics"))
+                self.manifest.record(
+                    converter, Path(path), params, output_path, "ok",
+                    input_hash=result["input_hash"], elapsed=elapsed
+                )
+                self._emit("done", {
+                    "input": path, "output": str(output_path), "converter": converter,
+                    "elapsed": elapsed, "cached": result["cached"],
+                })
+                continue
+
+            self.errors += 1
+            self.manifest.record(converter, Path(path), params, output_path, "error", error=error, elapsed=elapsed)
+            self._emit("error", {"input": path, "converter": converter, "error": error})
+
+    # --- bucle ---
+
+    def run(self, status_interval: float = 5.0) -> None:
+        """Bucle principal; vuelve cuando se llama a stop()."""
+        watcher = open_watcher(
+            self.root, self.recursive, self._skip_dirs,
+            force_polling=self.force_polling, poll_interval=self.poll_interval
+        )
+        mode = "inotify" if isinstance(watcher, _InotifyWatcher) else "sondeo"
+        self._emit("started", {"root": str(self.root), "outdir": str(self.outdir), "mode": mode})
+        next_status = time.monotonic() + status_interval
+        try:
+            while not self._stop.is_set():
+                for path in watcher.poll(0.5):
+                    rel = self._rel_path(path)
+                    route = route_file(self.rules, rel) if rel else None
+                    if route and self._needs_conversion(path, rel, route):
+                        self._add_pending(path)
+
+                now = time.monotonic()
+                if watcher.overflowed:
+                    watcher.overflowed = False
+                    self._needs_rescan = True
+                if self.rescan_interval and now - self._last_rescan >= self.rescan_interval:
+                    self._needs_rescan = True
+                # Reescanear solo con margen en la cola de pendientes
+                if self._needs_rescan and len(self._pending) < self.max_pending // 2:
+                    self._rescan()
+
+                self._collect()
+                self._promote()
+
+                if now >= next_status:
+                    next_status = now + status_interval
+                    self.manifest.flush()
+                    self._emit("status", self.status())
+        finally:
+            watcher.close()
+            for executor in self._executors.values():
+                executor.shutdown(wait=True, cancel_futures=True)
+            self._collect()
+            self.manifest.close()
+            self._emit("stopped", self.status())